@@ -11,17 +11,47 @@ if SRC_DIR not in sys.path:
     sys.path.insert(0, SRC_DIR)
 
 NOTICIAS_DIR_DEFAULT = os.path.join(BASE_DIR, "noticias")
+INDICE_DIR_DEFAULT = os.path.join(BASE_DIR, "indice")
+# Noticias por página en la lista (la búsqueda pagina en el motor, no en la app)
+TAM_PAGINA_LISTA = 200
+# Motor en modo de memoria reducida (textos en disco, TF-IDF float32) y mapeado en memoria,
+# para que varios procesos de la app compartan el mismo índice. RECOMENDADOR_COMPACTO=0 vuelve
+# al motor con todo en memoria; RECOMENDADOR_TIPO_VECTORES=float16/int8 reduce también los
+# embeddings, a cambio de consultas por texto más lentas con el índice exacto
+COMPACTO = os.getenv("RECOMENDADOR_COMPACTO", "1") != "0"
+TIPO_VECTORES = os.getenv("RECOMENDADOR_TIPO_VECTORES", "float32")
 
 
 @st.cache_resource(show_spinner=False)
-def build_engine(noticias_dir: str):
+def build_engine(noticias_dir: str, indice_dir: str):
     """
     Construye el motor UNA sola vez (cacheado por Streamlit).
+    Si hay un índice guardado en indice_dir y las noticias no han cambiado,
+    se carga directamente sin reentrenar.
     Si NLTK no tiene recursos (punkt/stopwords), el motor puede fallar:
     lo capturamos arriba en la UI con un mensaje claro.
     """
-    from motor_recomendacion import MotorRecomendacion  # del ZIP
-    return MotorRecomendacion(base_path_noticias=noticias_dir)
+    from motor_recomendacion import MotorRecomendacion, K_VECINOS  # del ZIP
+    # Con la tabla de vecinos, "recomendar por noticia" no recalcula similitudes en cada clic
+    motor = MotorRecomendacion.cargar_o_construir(
+        noticias_dir, indice_dir, k_vecinos=K_VECINOS,
+        compacto=COMPACTO, tipo_vectores=TIPO_VECTORES if COMPACTO else None, mmap=True,
+    )
+    # Sin print por consulta: la app mide con el registro de métricas (ver sidebar)
+    motor.silencioso = True
+    return motor
+
+
+@st.cache_resource(show_spinner=False)
+def build_client(url_servicio: str):
+    """
+    Cliente del servicio de recomendación (src/servicio_recomendacion.py). Con la
+    variable RECOMENDADOR_URL la app no carga el motor: es un cliente más del servicio.
+    """
+    from cliente_recomendacion import ClienteRecomendacion
+    cliente = ClienteRecomendacion(url_servicio)
+    cliente.salud()  # falla aquí (con un error claro) si el servicio no responde
+    return cliente
 
 
 def _format_date_maybe(value) -> str:
@@ -49,6 +79,39 @@ def _extract_id_from_label(label: str) -> int | None:
     return int(m.group(1))
 
 
+def _sidebar_filtros(motor) -> dict:
+    """
+    Controles de filtrado de las recomendaciones (categorías y rango de fechas de
+    publicación). Devuelve los kwargs para recomendar_por_texto / recomendar_por_noticia;
+    el motor aplica los filtros antes de elegir las top N.
+    """
+    facetas = motor.facetas()
+    st.sidebar.subheader("Filtros")
+    categorias = st.sidebar.multiselect(
+        "Categorías",
+        options=sorted(facetas["categorias"]),
+        format_func=lambda c: f"{c} ({facetas['categorias'][c]})",
+        help="Vacío = todas",
+    )
+    filtros = {"categorias": categorias} if categorias else {}
+
+    fecha_min = pd.to_datetime(facetas.get("fecha_min"))
+    fecha_max = pd.to_datetime(facetas.get("fecha_max"))
+    if pd.notna(fecha_min) and pd.notna(fecha_max) and st.sidebar.checkbox("Filtrar por fecha de publicación"):
+        rango = st.sidebar.date_input(
+            "Publicadas entre",
+            value=(fecha_min.date(), fecha_max.date()),
+            min_value=fecha_min.date(),
+            max_value=fecha_max.date(),
+        )
+        # Mientras se elige el rango, date_input devuelve solo la primera fecha
+        if isinstance(rango, (list, tuple)) and len(rango) == 2:
+            filtros["desde"], filtros["hasta"] = rango
+        elif isinstance(rango, (list, tuple)) and len(rango) == 1:
+            filtros["desde"] = rango[0]
+    return filtros
+
+
 def main():
     st.set_page_config(page_title="Recomendador de Noticias", layout="wide")
     st.title("Recomendador de Noticias")
@@ -66,9 +129,10 @@ def main():
 
     metodo = st.sidebar.selectbox(
         "Método de recomendación",
-        options=["tfidf", "embeddings"],
+        options=["tfidf", "embeddings", "hibrido"],
         index=0,
-        help="TF-IDF es el obligatorio. Embeddings es opcional si está instalado sentence-transformers.",
+        help="TF-IDF es el obligatorio. Embeddings es opcional si está instalado sentence-transformers. "
+             "Híbrido combina los dos (candidatos con TF-IDF, reordenados con embeddings).",
     )
 
     top_n = st.sidebar.slider("Top N recomendaciones", 3, 15, 5, 1)
@@ -87,7 +151,11 @@ def main():
     # -------------------------
     try:
         with st.spinner("Inicializando motor de recomendación..."):
-            motor = build_engine(noticias_dir)
+            url_servicio = os.getenv("RECOMENDADOR_URL")
+            if url_servicio:
+                motor = build_client(url_servicio)
+            else:
+                motor = build_engine(noticias_dir, os.getenv("INDICE_DIR", INDICE_DIR_DEFAULT))
     except Exception as e:
         st.error("No se pudo inicializar el motor de recomendación.")
         st.code(str(e))
@@ -100,8 +168,26 @@ def main():
         )
         return
 
-    df = motor.df.copy()
-    if df.empty:
+    filtros = _sidebar_filtros(motor)
+
+    # Las métricas solo existen con el motor en proceso (el servicio las da en /metrics)
+    if hasattr(motor, "metricas"):
+        with st.sidebar.expander("Métricas del motor"):
+            cache = motor.estadisticas_cache()
+            if cache is not None:
+                st.caption(f"Caché de resultados: {cache['entradas']}/{cache['capacidad']} entradas, "
+                           f"{cache['aciertos']} aciertos, {cache['fallos']} fallos")
+            metricas = motor.metricas.a_dict()
+            for tiempo in metricas["tiempos"]:
+                etiquetas = ", ".join(f"{k}={v}" for k, v in tiempo["etiquetas"].items())
+                st.caption(f"{tiempo['nombre']}{{{etiquetas}}}: n={tiempo['n']}, p50={tiempo.get('p50_ms')} ms, "
+                           f"p95={tiempo.get('p95_ms')} ms")
+            st.download_button("Descargar (Prometheus)", motor.metricas.a_prometheus(), file_name="metricas.prom")
+            st.download_button("Descargar (JSON)", motor.metricas.a_json(indent=2), file_name="metricas.json")
+
+    # Sin copiar la tabla del motor: las noticias se piden por página o por id
+    n_noticias, _ = motor.listar_noticias(0, 0)
+    if n_noticias == 0:
         st.warning("El motor cargó 0 noticias. Verifica la ruta a la carpeta 'noticias/'.")
         return
 
@@ -118,32 +204,27 @@ def main():
             st.subheader("Lista de noticias")
 
             search = st.text_input("Buscar (título o cuerpo)", value="")
+            pagina = st.number_input("Página", min_value=1, value=1, step=1)
+            desde = (int(pagina) - 1) * TAM_PAGINA_LISTA
 
+            # Búsqueda con el índice invertido del motor (palabras sin acentos ni mayúsculas,
+            # la última como prefijo): solo se traen las noticias de la página pedida
             if search.strip():
-                # regex=False para tratar el texto literalmente (frases, símbolos, etc.)
-                mask = (
-                    df["titulo"].astype(str).str.contains(search, case=False, na=False, regex=False)
-                    | df["cuerpo"].astype(str).str.contains(search, case=False, na=False, regex=False)
-                )
-                view = df[mask].copy()
+                total, noticias = motor.buscar_noticias(search, desde, TAM_PAGINA_LISTA)
             else:
-                view = df.copy()
+                total, noticias = motor.listar_noticias(desde, TAM_PAGINA_LISTA)
 
-            st.caption(f"Mostrando: {len(view)} / {len(df)}")
+            st.caption(f"Mostrando: {len(noticias)} de {total} / {n_noticias} (página {int(pagina)})")
 
             # Si no hay resultados, no intentes construir selectbox ni hacer split
-            if view.empty:
-                st.warning("No hay resultados para esa búsqueda.")
+            if not noticias:
+                st.warning("No hay resultados para esa búsqueda." if total == 0 else "No hay más páginas.")
                 st.stop()
 
             # Label legible (id + título + categoría)
-            view = view.reset_index(drop=True)
-            view["label"] = view.apply(
-                lambda r: f"[{r['id']}] ({r.get('categoria','')}) {str(r.get('titulo',''))[:90]}",
-                axis=1,
-            )
-
-            labels = view["label"].tolist()
+            labels = [
+                f"[{n['id']}] ({n.get('categoria', '')}) {str(n.get('titulo', ''))[:90]}" for n in noticias
+            ]
             selected_label = st.selectbox("Selecciona una noticia", labels)
 
             selected_id = _extract_id_from_label(selected_label)
@@ -152,13 +233,11 @@ def main():
                 st.stop()
 
         with col_right:
-            selected_rows = df[df["id"] == selected_id]
-            if selected_rows.empty:
+            sel = motor.obtener_noticia(selected_id)
+            if sel is None:
                 st.error(f"No existe una noticia con id={selected_id} en el dataset.")
                 st.stop()
 
-            sel = selected_rows.iloc[0]
-
             st.subheader("Detalle de la noticia seleccionada")
             st.markdown(f"**Título:** {sel.get('titulo','')}")
             st.markdown(f"**Categoría:** {sel.get('categoria','')}")
@@ -173,23 +252,23 @@ def main():
             st.subheader("Recomendaciones (por noticia)")
 
             try:
-                recs = motor.recomendar_por_noticia(selected_id, metodo=metodo, top_n=top_n)
+                recs = motor.recomendar_por_noticia(selected_id, metodo=metodo, top_n=top_n, **filtros)
             except Exception as e:
                 st.error("Error generando recomendaciones.")
                 st.code(str(e))
                 return
 
             if not recs:
-                st.info("No hay recomendaciones para esta noticia (o el método no está disponible).")
+                st.info("No hay recomendaciones para esta noticia (o el método no está disponible, o ninguna cumple los filtros).")
                 return
 
-            # Mostrar recomendaciones enriquecidas con datos reales del df
+            # Mostrar recomendaciones enriquecidas con la noticia completa del motor
             for rec in recs:
                 rec_id = rec.get("id", None)
                 sim = rec.get("similitud", None)
 
-                if rec_id is not None and (df["id"] == rec_id).any():
-                    row = df[df["id"] == rec_id].iloc[0]
+                row = motor.obtener_noticia(rec_id) if rec_id is not None else None
+                if row is not None:
                     title = row.get("titulo", rec.get("titulo", ""))
                     cat = row.get("categoria", "")
                     body = row.get("contenido_completo", row.get("cuerpo", ""))
@@ -225,22 +304,22 @@ def main():
                 return
 
             try:
-                recs = motor.recomendar_por_texto(query, metodo=metodo, top_n=top_n)
+                recs = motor.recomendar_por_texto(query, metodo=metodo, top_n=top_n, **filtros)
             except Exception as e:
                 st.error("Error generando recomendaciones por query.")
                 st.code(str(e))
                 return
 
             if not recs:
-                st.info("No hubo recomendaciones para esa query.")
+                st.info("No hubo recomendaciones para esa query (revisa también los filtros).")
                 return
 
             for rec in recs:
                 rec_id = rec.get("id", None)
                 sim = rec.get("similitud", None)
 
-                if rec_id is not None and (df["id"] == rec_id).any():
-                    row = df[df["id"] == rec_id].iloc[0]
+                row = motor.obtener_noticia(rec_id) if rec_id is not None else None
+                if row is not None:
                     title = row.get("titulo", rec.get("titulo", ""))
                     cat = row.get("categoria", "")
                     body = row.get("contenido_completo", row.get("cuerpo", ""))
@@ -0,0 +1,562 @@
+import os
+import sys
+import json
+import time
+import zlib
+import shutil
+import platform
+import argparse
+import datetime
+import tempfile
+import subprocess
+import contextlib
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from corpus_sintetico import generar_corpus
+# Medición de memoria: psutil si está instalado; si no, resource (no existe en Windows)
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TAMANOS = [1000, 10000, 100000, 1000000]
+N_CONSULTAS = 200
+TOP_N = 5
+DIM_EMBEDDINGS = 384
+PERCENTILES = (50, 90, 95, 99)
+
+# Una métrica empeora si supera a la de referencia en más de esta fracción (ver comparar)
+TOLERANCIA = 0.2
+
+
+class ModeloEmbeddingsFalso:
+    """
+    Sustituto del modelo de sentence-transformers para medir sin red ni GPU: cada palabra
+    suma +-1 en una dimensión elegida por hash (proyección aleatoria de la bolsa de palabras),
+    así que textos con palabras en común siguen teniendo coseno alto. Es determinista
+    y mucho más rápido que el modelo real: mide el coste del motor alrededor del modelo.
+    """
+
+    def __init__(self, dim=DIM_EMBEDDINGS):
+        self.dim = dim
+        # Identidad del modelo para la caché de embeddings y el índice (ver nombre_modelo_embeddings)
+        self.nombre = f"modelo-falso-{dim}"
+        self._columnas = {}
+
+    def _columna(self, palabra):
+        """Índice con signo de la palabra: dimensión en [0, dim) o en [dim, 2*dim) si resta."""
+        columna = self._columnas.get(palabra)
+        if columna is None:
+            h = zlib.crc32(palabra.encode("utf-8"))
+            columna = self._columnas[palabra] = h % self.dim + (self.dim if (h >> 16) & 1 else 0)
+        return columna
+
+    def encode(self, textos, batch_size=32, show_progress_bar=False, **kwargs):
+        columnas = []
+        filas = []
+        for i, texto in enumerate(textos):
+            cols = [self._columna(palabra) for palabra in texto.lower().split()]
+            columnas.extend(cols)
+            filas.extend([i] * len(cols))
+        cuentas = np.bincount(
+            np.asarray(filas, dtype=np.int64) * 2 * self.dim + np.asarray(columnas, dtype=np.int64),
+            minlength=len(textos) * 2 * self.dim,
+        ).reshape(len(textos), 2, self.dim)
+        vectores = (cuentas[:, 0] - cuentas[:, 1]).astype(np.float32)
+        normas = np.linalg.norm(vectores, axis=1, keepdims=True)
+        return vectores / np.maximum(normas, 1e-12)
+
+
+def memoria_mb():
+    """(RSS actual, pico de RSS del proceso) en MB; None si no se puede medir en esta plataforma."""
+    actual = pico = None
+    if PSUTIL_AVAILABLE:
+        info = psutil.Process().memory_info()
+        actual = info.rss / 2 ** 20
+        if hasattr(info, "peak_wset"):
+            pico = info.peak_wset / 2 ** 20
+    if pico is None and RESOURCE_AVAILABLE:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux lo da en KB y macOS en bytes
+        pico = maxrss / 2 ** 20 if sys.platform == "darwin" else maxrss / 2 ** 10
+    if actual is None and os.path.exists("/proc/self/statm"):
+        with open("/proc/self/statm") as f:
+            actual = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    if actual is not None and pico is not None:
+        pico = max(pico, actual)
+    return actual, pico
+
+
+def medir(funcion):
+    """Ejecuta funcion() y devuelve su duración y la memoria del proceso al terminar."""
+    inicio = time.perf_counter()
+    funcion()
+    segundos = time.perf_counter() - inicio
+    actual, pico = memoria_mb()
+    return {"segundos": round(segundos, 4), "rss_mb": _redondear(actual), "rss_max_mb": _redondear(pico)}
+
+
+def resumen_latencias(segundos):
+    """Percentiles, media y consultas por segundo de una lista de duraciones (en segundos)."""
+    ms = np.asarray(segundos) * 1000
+    resumen = {f"p{p}_ms": round(float(np.percentile(ms, p)), 3) for p in PERCENTILES}
+    resumen["media_ms"] = round(float(ms.mean()), 3)
+    resumen["consultas_por_segundo"] = round(float(1000 / ms.mean()), 1) if ms.mean() > 0 else None
+    return resumen
+
+
+def _redondear(valor):
+    return round(valor, 1) if valor is not None else None
+
+
+def _progreso(mensaje):
+    # El motor escribe en stdout (que se descarta); el progreso del benchmark va a stderr
+    print(mensaje, file=sys.stderr, flush=True)
+
+
+def construir_por_fases(ruta_corpus, n_procesos=None, dim_embeddings=DIM_EMBEDDINGS, k_vecinos=None,
+                        compacto=False, tipo_vectores='float32'):
+    """
+    Construye un MotorRecomendacion con los mismos pasos que su __init__, pero midiendo cada fase.
+    :param compacto: Termina pasando el motor al modo de memoria reducida (ver MotorRecomendacion.compactar)
+    :param tipo_vectores: Tipo en que se guardan los embeddings
+    :return: (motor, dict fase -> medición)
+    """
+    from motor_recomendacion import MotorRecomendacion
+
+    motor = MotorRecomendacion.__new__(MotorRecomendacion)
+    motor._inicializar_estado(ruta_corpus)
+    motor.usar_modelo_embeddings(ModeloEmbeddingsFalso(dim_embeddings))
+    motor.silencioso = True
+    motor.tipo_vectores = tipo_vectores
+
+    def preprocesar():
+        motor.df['texto_procesado'] = motor.preprocesador.procesar_lote(
+            motor.df['contenido_completo'].tolist(), n_procesos=n_procesos
+        )
+
+    def agrupar_duplicados():
+        motor._agrupar_duplicados(motor.df['id'].tolist(), motor.df['texto_procesado'].tolist())
+        motor._actualizar_columnas()
+
+    pasos = [
+        ("carga", motor._cargar_noticias),
+        ("preprocesado", preprocesar),
+        ("duplicados", agrupar_duplicados),
+        ("tfidf", motor._entrenar_tfidf),
+        ("embeddings", motor._generar_embeddings),
+    ]
+    if k_vecinos:
+        pasos.append(("tabla_vecinos", lambda: motor.construir_tabla_vecinos(k=k_vecinos)))
+    if compacto:
+        pasos.append(("compactar", motor.compactar))
+
+    fases = {}
+    for nombre, paso in pasos:
+        _progreso(f"  {nombre}...")
+        fases[nombre] = medir(paso)
+    return motor, fases
+
+
+def medir_consultas(motor, metodo, n_consultas=N_CONSULTAS, top_n=TOP_N, semilla=0):
+    """
+    Latencias de recomendar_por_texto (con títulos del corpus como queries), de
+    recomendar_por_noticia (ids al azar) y coste por query de recomendar_por_textos,
+    todas con la caché de resultados vacía, y de las mismas queries repetidas (servidas
+    desde la caché).
+    """
+    rng = np.random.default_rng(semilla)
+    posiciones = rng.choice(len(motor.df), min(n_consultas, len(motor.df)), replace=False)
+    queries = motor.df['titulo'].iloc[posiciones].tolist()
+    ids = motor.df['id'].iloc[posiciones].tolist()
+
+    def vaciar_cache():
+        if motor.cache_resultados is not None:
+            motor.cache_resultados.invalidar()
+
+    # Una consulta de calentamiento (carga perezosa del modelo, cachés de numpy/scipy)
+    motor.recomendar_por_texto(queries[0], metodo=metodo, top_n=top_n)
+
+    resultado = {}
+    for nombre, consulta, argumentos in (
+        ("texto", motor.recomendar_por_texto, queries),
+        ("noticia", motor.recomendar_por_noticia, ids),
+    ):
+        vaciar_cache()
+        tiempos = []
+        for argumento in argumentos:
+            inicio = time.perf_counter()
+            consulta(argumento, metodo=metodo, top_n=top_n)
+            tiempos.append(time.perf_counter() - inicio)
+        resultado[nombre] = resumen_latencias(tiempos)
+
+    if motor.cache_resultados is not None:
+        tiempos = []
+        for query in queries:
+            inicio = time.perf_counter()
+            motor.recomendar_por_texto(query, metodo=metodo, top_n=top_n)
+            tiempos.append(time.perf_counter() - inicio)
+        resultado["texto_repetida"] = resumen_latencias(tiempos)
+
+    vaciar_cache()
+    inicio = time.perf_counter()
+    motor.recomendar_por_textos(queries, metodo=metodo, top_n=top_n)
+    resultado["texto_lote"] = {"ms_por_consulta": round((time.perf_counter() - inicio) * 1000 / len(queries), 3)}
+    return resultado
+
+
+def medir_calidad(motor, metodos, n_consultas=N_CONSULTAS, top_n=TOP_N, semilla=1):
+    """
+    Aproximación de la calidad de cada método sin juicios de relevancia: fracción de las
+    top_n recomendaciones por noticia que son de la misma categoría que la noticia consultada.
+    """
+    rng = np.random.default_rng(semilla)
+    posiciones = rng.choice(len(motor.df), min(n_consultas, len(motor.df)), replace=False)
+    ids = motor.df['id'].iloc[posiciones].tolist()
+    categoria_por_id = dict(zip(motor.df['id'], motor.df['categoria']))
+    resultado = {}
+    for metodo in metodos:
+        aciertos = total = 0
+        for id_noticia in ids:
+            recomendaciones = motor.recomendar_por_noticia(id_noticia, metodo=metodo, top_n=top_n)
+            aciertos += sum(categoria_por_id[r["id"]] == categoria_por_id[id_noticia] for r in recomendaciones)
+            total += len(recomendaciones)
+        resultado[metodo] = {"precision_categoria": round(aciertos / total, 4) if total else None}
+    return resultado
+
+
+def medir_puntuacion_tfidf(motor, n_consultas=N_CONSULTAS, top_n=TOP_N, semilla=0):
+    """
+    Latencia media de la puntuación TF-IDF (sin materializar resultados) con cada modo
+    de MotorRecomendacion.configurar_puntuacion_tfidf, para queries de texto (títulos)
+    y para noticias del corpus (vectores con muchos más términos).
+    """
+    from motor_recomendacion import PUNTUACIONES_TFIDF
+    rng = np.random.default_rng(semilla)
+    posiciones = rng.choice(len(motor.df), min(n_consultas, len(motor.df)), replace=False)
+    vectores = {
+        "texto": [motor._vectorizar([motor._preprocesar_texto(t)]) for t in motor.df['titulo'].iloc[posiciones]],
+        "noticia": [motor.matrix_tfidf[pos] for pos in posiciones],
+    }
+    k = motor._k_busqueda(top_n)
+    modo_original = motor.puntuacion_tfidf
+    resultado = {}
+    for modo in PUNTUACIONES_TFIDF:
+        motor.configurar_puntuacion_tfidf(modo)
+        motor._top_tfidf(vectores["texto"][0], k)  # construye el índice por términos fuera de la medida
+        resultado[modo] = {}
+        for tipo, lista in vectores.items():
+            inicio = time.perf_counter()
+            for vector in lista:
+                motor._top_tfidf(vector, k)
+            resultado[modo][tipo] = {"ms_por_consulta": round((time.perf_counter() - inicio) * 1000 / len(lista), 3)}
+    motor.configurar_puntuacion_tfidf(modo_original)
+    return resultado
+
+
+def medir_modelos_lexicos(motor, especificaciones, n_consultas=N_CONSULTAS, top_n=TOP_N):
+    """
+    Tamaño, latencia y calidad del método tfidf con cada configuración del modelo léxico,
+    reentrenando el motor con cada una (y dejando al final la que tenía).
+    :param especificaciones: Lista de descripciones de ModeloLexico (p. ej. 'bm25',
+                             'tfidf:min_df=2,max_terminos=50000', 'tfidf:hashing')
+    """
+    from modelo_lexico import parametros_desde_texto
+    originales = motor.modelo_lexico.parametros()
+    resultados = {}
+    for especificacion in especificaciones:
+        construccion = medir(lambda: motor.configurar_modelo_lexico(**parametros_desde_texto(especificacion)))
+        matriz = motor.matrix_tfidf
+        consultas = medir_consultas(motor, 'tfidf', n_consultas, top_n)
+        resultados[especificacion] = {
+            "terminos": motor.modelo_lexico.n_terminos(),
+            "nnz": int(matriz.nnz),
+            "mb_matriz": round((matriz.data.nbytes + matriz.indices.nbytes + matriz.indptr.nbytes) / 2 ** 20, 2),
+            "mb_modelo": round(motor.modelo_lexico.memoria() / 2 ** 20, 2),
+            "segundos_ajuste": construccion["segundos"],
+            "texto_p50_ms": consultas["texto"]["p50_ms"],
+            "noticia_p50_ms": consultas["noticia"]["p50_ms"],
+            "precision_categoria": medir_calidad(motor, ('tfidf',), n_consultas, top_n)["tfidf"]["precision_categoria"],
+        }
+    motor.configurar_modelo_lexico(**originales)
+    return resultados
+
+
+def medir_indices(motor, indices, n_consultas=N_CONSULTAS, k=10):
+    """
+    Recall@k, latencia y memoria de cada índice vectorial frente a la búsqueda exacta,
+    sobre los embeddings del motor (consultas: noticias del corpus, excluyendo la propia).
+    :param indices: Lista de 'tipo' o 'tipo:cuantizacion' (p. ej. 'ivf', 'cuantizado:pq')
+    """
+    resultados = {}
+    for nombre in indices:
+        tipo, _, cuantizacion = nombre.partition(":")
+        parametros = {"cuantizacion": cuantizacion} if cuantizacion else {}
+        construccion = medir(lambda: motor.configurar_indice_embeddings(tipo, **parametros))
+        evaluacion = motor.evaluar_indice_embeddings(n_consultas=n_consultas, k=k)
+        bytes_indice = sum(int(a.nbytes) for a in motor.indice_embeddings.estructuras())
+        resultados[nombre] = {
+            "recall": round(evaluacion["recall"], 4),
+            "ms_por_consulta_indice": round(evaluacion["ms_por_consulta_indice"], 3),
+            "ms_por_consulta_exacto": round(evaluacion["ms_por_consulta_exacto"], 3),
+            "segundos_construccion": construccion["segundos"],
+            "mb_estructuras": round(bytes_indice / 2 ** 20, 2),
+            # Cuántas veces más pequeño que la matriz de embeddings que se recorre en el exacto
+            "reduccion_vs_vectores": round(motor.matrix_embeddings.nbytes / bytes_indice, 1) if bytes_indice else None,
+        }
+    return resultados
+
+
+def medir_tamano(ruta_corpus, n_consultas=N_CONSULTAS, top_n=TOP_N, n_procesos=None,
+                 dim_embeddings=DIM_EMBEDDINGS, k_vecinos=None, compacto=False, tipo_vectores='float32', indices=(),
+                 modelos_lexicos=()):
+    """
+    Mide construcción, consultas y calidad de cada método y memoria sobre un corpus ya generado.
+    :param indices: Índices vectoriales a evaluar además (ver medir_indices)
+    :param modelos_lexicos: Configuraciones del modelo léxico a comparar (ver medir_modelos_lexicos)
+    """
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        motor, fases = construir_por_fases(ruta_corpus, n_procesos, dim_embeddings, k_vecinos,
+                                           compacto, tipo_vectores)
+        consultas = {}
+        for metodo in ('tfidf', 'embeddings', 'hibrido'):
+            _progreso(f"  consultas {metodo}...")
+            consultas[metodo] = medir_consultas(motor, metodo, n_consultas, top_n)
+        _progreso("  puntuación tfidf...")
+        puntuacion_tfidf = medir_puntuacion_tfidf(motor, n_consultas, top_n)
+        _progreso("  calidad...")
+        calidad = medir_calidad(motor, ('tfidf', 'embeddings', 'hibrido'), n_consultas, top_n)
+        if indices:
+            _progreso("  índices vectoriales...")
+            resultado_indices = medir_indices(motor, indices, n_consultas)
+        if modelos_lexicos:
+            _progreso("  modelos léxicos...")
+            resultado_lexicos = medir_modelos_lexicos(motor, modelos_lexicos, n_consultas, top_n)
+
+    actual, pico = memoria_mb()
+    resultado = {
+        "corpus": {
+            "n_documentos": len(motor.df),
+            "vocabulario_tfidf": motor.modelo_lexico.n_terminos(),
+            "nnz_tfidf": int(motor.matrix_tfidf.nnz),
+            "mb_tfidf": round((motor.matrix_tfidf.data.nbytes + motor.matrix_tfidf.indices.nbytes
+                               + motor.matrix_tfidf.indptr.nbytes) / 2 ** 20, 1),
+            "mb_embeddings": round(motor.matrix_embeddings.nbytes / 2 ** 20, 1),
+            "casi_duplicadas": motor.duplicados.n_repetidas(),
+        },
+        "fases": fases,
+        "segundos_construccion": round(sum(f["segundos"] for f in fases.values()), 3),
+        "consultas": consultas,
+        # Puntuación TF-IDF densa frente a listas por término (ver medir_puntuacion_tfidf)
+        "puntuacion_tfidf": puntuacion_tfidf,
+        # Precisión de categoría de las recomendaciones por noticia (ver medir_calidad)
+        "calidad": calidad,
+        "memoria": {"rss_final_mb": _redondear(actual), "rss_max_mb": _redondear(pico)},
+        # Bytes por parte del motor y por noticia (ver MotorRecomendacion.memoria)
+        "memoria_motor": motor.memoria(),
+        # Desglose de las consultas por etapa (preprocesado, vectorización, similitud, materialización)
+        "metricas": motor.metricas.a_dict(),
+    }
+    if indices:
+        resultado["indices"] = resultado_indices
+    if modelos_lexicos:
+        resultado["modelos_lexicos"] = resultado_lexicos
+    return resultado
+
+
+def preparar_corpus(directorio, n_documentos, formato, semilla):
+    """
+    Genera el corpus sintético en <directorio>/<formato>_<n> o reutiliza uno ya generado
+    (generar 1M de noticias lleva su tiempo).
+    :return: (ruta del corpus, segundos de generación o None si se reutilizó)
+    """
+    ruta = os.path.join(directorio, f"{formato}_{n_documentos}_s{semilla}")
+    marca = os.path.join(directorio, f"{formato}_{n_documentos}_s{semilla}.completo")
+    if os.path.exists(marca):
+        return ruta, None
+    shutil.rmtree(ruta, ignore_errors=True)
+    inicio = time.perf_counter()
+    generar_corpus(ruta, n_documentos, formato=formato, semilla=semilla)
+    segundos = time.perf_counter() - inicio
+    open(marca, "w").close()
+    return ruta, round(segundos, 3)
+
+
+def info_entorno():
+    """Commit, máquina y versiones, para saber qué se está comparando."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=RAIZ_REPO, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        sucio = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=RAIZ_REPO,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, sucio = None, None
+
+    import sklearn
+    import scipy
+    import pandas
+    return {
+        "commit": commit,
+        "cambios_sin_commit": sucio,
+        "fecha": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+        "versiones": {"numpy": np.__version__, "scipy": scipy.__version__,
+                      "sklearn": sklearn.__version__, "pandas": pandas.__version__},
+    }
+
+
+def _metricas(resultado):
+    """Aplana las métricas comparables de un tamaño: nombre -> valor (menor es mejor)."""
+    metricas = {f"fases.{fase}.segundos": m["segundos"] for fase, m in resultado["fases"].items()}
+    metricas["segundos_construccion"] = resultado["segundos_construccion"]
+    for metodo, tipos in resultado["consultas"].items():
+        for tipo, m in tipos.items():
+            for clave in ("p50_ms", "p95_ms", "ms_por_consulta"):
+                if clave in m:
+                    metricas[f"consultas.{metodo}.{tipo}.{clave}"] = m[clave]
+    for modo, tipos in resultado.get("puntuacion_tfidf", {}).items():
+        for tipo, m in tipos.items():
+            metricas[f"puntuacion_tfidf.{modo}.{tipo}.ms_por_consulta"] = m["ms_por_consulta"]
+    metricas["memoria.rss_max_mb"] = resultado["memoria"]["rss_max_mb"]
+    for nombre, m in resultado.get("indices", {}).items():
+        metricas[f"indices.{nombre}.ms_por_consulta"] = m["ms_por_consulta_indice"]
+    for nombre, m in resultado.get("modelos_lexicos", {}).items():
+        metricas[f"modelos_lexicos.{nombre}.texto_p50_ms"] = m["texto_p50_ms"]
+        metricas[f"modelos_lexicos.{nombre}.mb_matriz"] = m["mb_matriz"]
+    if "memoria_motor" in resultado:
+        metricas["memoria.bytes_por_noticia"] = resultado["memoria_motor"]["bytes_por_noticia"]
+    return metricas
+
+
+def comparar(actual, referencia, tolerancia=TOLERANCIA):
+    """
+    Compara dos resultados del benchmark (mismo tamaño de corpus) e imprime las
+    métricas que han empeorado más que la tolerancia.
+    :return: Número de regresiones
+    """
+    por_tamano = {r["n_documentos"]: r for r in referencia["resultados"]}
+    regresiones = 0
+    print(f"\nComparación con {referencia['entorno'].get('commit')} (tolerancia {tolerancia:.0%})")
+    for resultado in actual["resultados"]:
+        base = por_tamano.get(resultado["n_documentos"])
+        if base is None:
+            continue
+        print(f"\n{resultado['n_documentos']} noticias:")
+        metricas_base = _metricas(base)
+        for nombre, valor in _metricas(resultado).items():
+            anterior = metricas_base.get(nombre)
+            if valor is None or not anterior:
+                continue
+            ratio = valor / anterior
+            marca = ""
+            if ratio > 1 + tolerancia:
+                marca = "  <-- REGRESIÓN"
+                regresiones += 1
+            print(f"  {nombre:45s} {anterior:>12.3f} -> {valor:>12.3f}  x{ratio:.2f}{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del motor de recomendación sobre corpus sintéticos.")
+    parser.add_argument("--tamanos", type=int, nargs="+", default=TAMANOS[:2], help="Noticias por corpus")
+    parser.add_argument("--formato", choices=["arbol", "almacen"], default="arbol")
+    parser.add_argument("--consultas", type=int, default=N_CONSULTAS, help="Consultas por método y tipo")
+    parser.add_argument("--top-n", type=int, default=TOP_N)
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos para el preprocesado")
+    parser.add_argument("--dim-embeddings", type=int, default=DIM_EMBEDDINGS)
+    parser.add_argument("--k-vecinos", type=int, default=None,
+                        help="Mide también la tabla de vecinos (cuadrática: solo para corpus pequeños)")
+    parser.add_argument("--compacto", action="store_true",
+                        help="Mide el motor en modo de memoria reducida (textos en disco, TF-IDF float32)")
+    parser.add_argument("--tipo-vectores", choices=("float32", "float16", "int8"), default="float32",
+                        help="Tipo en que se guardan los embeddings")
+    parser.add_argument("--indices", nargs="+", default=[],
+                        help="Índices vectoriales a evaluar (recall@10, latencia, memoria): "
+                             "exacto, ivf, cuantizado:int8, cuantizado:pq")
+    parser.add_argument("--modelos-lexicos", nargs="+", default=[],
+                        help="Configuraciones del modelo léxico a comparar (tamaño, latencia, calidad), p. ej. "
+                             "tfidf bm25 tfidf:min_df=2,max_terminos=50000 tfidf:ngramas=1-2 bm25:hashing")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--directorio", default=None,
+                        help="Carpeta donde generar (y reutilizar) los corpus; por defecto una temporal")
+    parser.add_argument("--salida", default=None, help="JSON de resultados (por defecto, stdout)")
+    parser.add_argument("--comparar", default=None, help="JSON de una ejecución anterior con el que comparar")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA)
+    parser.add_argument("--medir", default=None, help=argparse.SUPPRESS)  # uso interno: un tamaño por proceso
+    args = parser.parse_args()
+
+    parametros = {"consultas": args.consultas, "top_n": args.top_n, "procesos": args.procesos,
+                  "dim_embeddings": args.dim_embeddings, "k_vecinos": args.k_vecinos,
+                  "compacto": args.compacto, "tipo_vectores": args.tipo_vectores, "indices": args.indices,
+                  "modelos_lexicos": args.modelos_lexicos}
+    if args.medir:
+        json.dump(medir_tamano(args.medir, n_consultas=args.consultas, top_n=args.top_n, n_procesos=args.procesos,
+                               dim_embeddings=args.dim_embeddings, k_vecinos=args.k_vecinos,
+                               compacto=args.compacto, tipo_vectores=args.tipo_vectores,
+                               indices=args.indices, modelos_lexicos=args.modelos_lexicos), sys.stdout)
+        return 0
+
+    directorio = args.directorio or tempfile.mkdtemp(prefix="benchmark_motor_")
+    os.makedirs(directorio, exist_ok=True)
+    informe = {"entorno": info_entorno(), "parametros": dict(parametros, formato=args.formato, semilla=args.semilla),
+               "resultados": []}
+    try:
+        for n in args.tamanos:
+            _progreso(f"Corpus de {n} noticias ({args.formato})...")
+            ruta, segundos_generacion = preparar_corpus(directorio, n, args.formato, args.semilla)
+            # Cada tamaño en un proceso nuevo: el pico de memoria no arrastra el de los tamaños anteriores
+            comando = [sys.executable, os.path.abspath(__file__), "--medir", ruta,
+                       "--consultas", str(args.consultas), "--top-n", str(args.top_n),
+                       "--dim-embeddings", str(args.dim_embeddings), "--tipo-vectores", args.tipo_vectores]
+            if args.procesos is not None:
+                comando += ["--procesos", str(args.procesos)]
+            if args.k_vecinos:
+                comando += ["--k-vecinos", str(args.k_vecinos)]
+            if args.compacto:
+                comando += ["--compacto"]
+            if args.indices:
+                comando += ["--indices"] + args.indices
+            if args.modelos_lexicos:
+                comando += ["--modelos-lexicos"] + args.modelos_lexicos
+            salida = subprocess.run(comando, capture_output=True, text=True)
+            sys.stderr.write(salida.stderr)
+            if salida.returncode != 0:
+                print(f"Error midiendo el corpus de {n} noticias", file=sys.stderr)
+                return salida.returncode
+            resultado = {"n_documentos": n, "segundos_generacion": segundos_generacion}
+            resultado.update(json.loads(salida.stdout))
+            informe["resultados"].append(resultado)
+    finally:
+        if args.directorio is None:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+        _progreso(f"Resultados guardados en {args.salida}")
+    else:
+        print(json.dumps(informe, ensure_ascii=False, indent=2))
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            referencia = json.load(f)
+        if comparar(informe, referencia, args.tolerancia):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    # Uso: python benchmarks/benchmark_motor.py --tamanos 1000 10000 --salida resultados.json [--comparar anterior.json]
+    sys.exit(main())
@@ -0,0 +1,202 @@
+import os
+import sys
+import datetime
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from almacen_corpus import AlmacenCorpus
+
+# Vocabulario temático por categoría (las mismas categorías que el scraper)
+TEMAS = {
+    "finanzas": (
+        "bitcoin ethereum criptomoneda mercado bolsa inversores precio dólar euro oro inflación tipos "
+        "interés banco central reserva federal acciones bonos deuda rentabilidad cartera fondos activos "
+        "volatilidad cotización subida caída récord máximo mínimo trading minería cadena bloques token "
+        "stablecoin exchange liquidez capitalización analistas previsión trimestre beneficios pérdidas "
+        "dividendos hipotecas crédito préstamos ahorro inversión especulación regulador comisión valores "
+        "etf futuros derivados apalancamiento ballenas halving wallet custodia emisión rescate recesión"
+    ).split(),
+    "gobiernos": (
+        "gobierno ministro presidente congreso senado elecciones partido oposición votación ley decreto "
+        "reforma presupuestos impuestos parlamento coalición alcalde ayuntamiento comunidad autonómica "
+        "tribunal supremo constitucional justicia fiscal juez sentencia investigación corrupción sanidad "
+        "educación vivienda pensiones empleo paro sindicatos huelga diplomacia embajador cumbre tratado "
+        "frontera migración refugiados sanciones aranceles guerra alto fuego negociación acuerdo europea "
+        "comisión bruselas otan defensa ejército seguridad policía protesta manifestación campaña encuesta"
+    ).split(),
+    "tecnologia": (
+        "inteligencia artificial algoritmo datos nube servidor software hardware chip procesador móvil "
+        "aplicación plataforma red social usuarios privacidad ciberseguridad hackers ataque vulnerabilidad "
+        "contraseña cifrado internet fibra conexión satélite robot automatización startup empresa "
+        "tecnológica innovación desarrollo programación código abierto modelo lenguaje entrenamiento "
+        "semiconductores fábrica baterías coche eléctrico autónomo sensores dispositivo pantalla realidad "
+        "virtual videojuegos consola streaming actualización sistema operativo navegador buscador patente"
+    ).split(),
+}
+
+# Palabras frecuentes comunes a todas las categorías (incluye stopwords, como en las noticias reales)
+COMUNES = (
+    "de la el en y que los las del por con para una un se su al es como más pero sus le ya o este sí "
+    "porque esta entre cuando muy sin sobre también me hasta hay donde quien desde todo nos durante "
+    "todos uno les ni contra otros ese eso ante ellos esto antes algunos unos otro otras otra tanto "
+    "año años día semana mes país mundo parte según millones personas tiempo forma caso grupo nuevo "
+    "nueva gran primer primera último última mayor menor pasado próximo general nacional internacional "
+    "datos informe fuentes declaraciones medios expertos situación cambio proceso sector crecimiento"
+).split()
+
+SILABAS = (
+    "ba be bi bo bu ca ce ci co cu da de di do du fa fe fi fo ga ge gi go la le li lo lu ma me mi mo mu "
+    "na ne ni no nu pa pe pi po pu ra re ri ro ru sa se si so su ta te ti to tu va ve vi vo za zo bra "
+    "cre dri flo gru pla tre cla pri cán mén tór zál rí"
+).split()
+
+MESES = ["ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEP", "OCT", "NOV", "DIC"]
+
+
+def _probabilidades_zipf(n, exponente=1.1):
+    """Probabilidades acumuladas de una ley de Zipf sobre n elementos (para muestrear con searchsorted)."""
+    pesos = 1.0 / np.arange(1, n + 1) ** exponente
+    return np.cumsum(pesos / pesos.sum())
+
+
+class GeneradorNoticias:
+    """
+    Genera noticias sintéticas en español, deterministas a partir de una semilla.
+    Cada noticia mezcla palabras del tema de su categoría, palabras comunes y una cola
+    larga de pseudopalabras (con frecuencias tipo Zipf), así que el vocabulario y la
+    dispersión del TF-IDF crecen con el corpus como en un corpus real. Una fracción
+    de las noticias son copias casi idénticas de otras anteriores (como las que
+    publican varios medios), para que también se mida el agrupado de duplicados.
+    """
+
+    def __init__(self, semilla=0, n_pseudopalabras=50000, fraccion_duplicados=0.01,
+                 palabras_titulo=(8, 14), palabras_cuerpo=(80, 250)):
+        """
+        :param n_pseudopalabras: Tamaño de la cola larga del vocabulario
+        :param fraccion_duplicados: Fracción de noticias que son casi copia de otra anterior
+        :param palabras_titulo: Rango (mínimo, máximo) de palabras del título
+        :param palabras_cuerpo: Rango (mínimo, máximo) de palabras del cuerpo
+        """
+        self.rng = np.random.default_rng(semilla)
+        self.fraccion_duplicados = fraccion_duplicados
+        self.palabras_titulo = palabras_titulo
+        self.palabras_cuerpo = palabras_cuerpo
+        self.categorias = sorted(TEMAS)
+
+        rng_vocabulario = np.random.default_rng(semilla + 1)
+        pseudopalabras = set()
+        while len(pseudopalabras) < n_pseudopalabras:
+            n_silabas = rng_vocabulario.integers(2, 5)
+            pseudopalabras.add("".join(rng_vocabulario.choice(SILABAS, n_silabas)))
+        self.pseudopalabras = np.array(sorted(pseudopalabras), dtype=object)
+        rng_vocabulario.shuffle(self.pseudopalabras)
+
+        self.temas = {cat: np.array(palabras, dtype=object) for cat, palabras in TEMAS.items()}
+        self.comunes = np.array(COMUNES, dtype=object)
+        self._acumuladas = {
+            "comunes": _probabilidades_zipf(len(self.comunes)),
+            "cola": _probabilidades_zipf(len(self.pseudopalabras)),
+        }
+        self._acumuladas.update({cat: _probabilidades_zipf(len(palabras)) for cat, palabras in self.temas.items()})
+        self._emitidas = []
+
+    def _palabras(self, categoria, n, peso_tema):
+        """n palabras: peso_tema del tema de la categoría, 30% comunes y el resto de la cola larga."""
+        fuente = self.rng.random(n)
+        palabras = np.empty(n, dtype=object)
+        for vocabulario, clave, mascara in (
+            (self.temas[categoria], categoria, fuente < peso_tema),
+            (self.comunes, "comunes", (fuente >= peso_tema) & (fuente < peso_tema + 0.3)),
+            (self.pseudopalabras, "cola", fuente >= peso_tema + 0.3),
+        ):
+            k = int(mascara.sum())
+            if k:
+                posiciones = np.searchsorted(self._acumuladas[clave], self.rng.random(k))
+                palabras[mascara] = vocabulario[np.minimum(posiciones, len(vocabulario) - 1)]
+        return palabras.tolist()
+
+    def _frases(self, palabras):
+        """Une palabras en frases de 10-25 palabras, con mayúscula inicial y punto final."""
+        frases = []
+        inicio = 0
+        while inicio < len(palabras):
+            fin = inicio + int(self.rng.integers(10, 26))
+            frase = " ".join(palabras[inicio:fin])
+            frases.append(frase[:1].upper() + frase[1:] + ".")
+            inicio = fin
+        return " ".join(frases)
+
+    def _fecha(self):
+        dia = datetime.date(2023, 1, 1) + datetime.timedelta(days=int(self.rng.integers(0, 3 * 365)))
+        return f"{dia.day:02d} {MESES[dia.month - 1]} {dia.year}"
+
+    def _casi_copia(self, original):
+        """Copia de una noticia con un par de palabras del cuerpo cambiadas."""
+        palabras = original["cuerpo"].split()
+        for _ in range(2):
+            palabras[int(self.rng.integers(0, len(palabras)))] = self._palabras(original["categoria"], 1, 0.5)[0]
+        return dict(original, cuerpo=" ".join(palabras))
+
+    def noticia(self, i):
+        """Noticia número i (dict con categoria, fecha, titulo, cuerpo, fecha_extraccion y enlace)."""
+        if self._emitidas and self.rng.random() < self.fraccion_duplicados:
+            original = self._emitidas[int(self.rng.integers(0, len(self._emitidas)))]
+            noticia = self._casi_copia(original)
+        else:
+            categoria = self.categorias[int(self.rng.integers(0, len(self.categorias)))]
+            titulo = " ".join(self._palabras(categoria, int(self.rng.integers(*self.palabras_titulo)), 0.6))
+            noticia = {
+                "categoria": categoria,
+                "fecha": self._fecha(),
+                "titulo": titulo[:1].upper() + titulo[1:],
+                "cuerpo": self._frases(self._palabras(categoria, int(self.rng.integers(*self.palabras_cuerpo)), 0.35)),
+            }
+            # Guardamos una muestra acotada de originales para sacar casi copias sin acumular todo el corpus
+            if len(self._emitidas) < 10000:
+                self._emitidas.append(noticia)
+            else:
+                self._emitidas[int(self.rng.integers(0, len(self._emitidas)))] = noticia
+        noticia = dict(noticia)
+        noticia["fecha_extraccion"] = "2025-12-24 01:00:00"
+        noticia["enlace"] = f"https://sintetico.local/{noticia['categoria']}/{i}"
+        noticia["origen"] = "sintetico"
+        return noticia
+
+    def noticias(self, n):
+        for i in range(n):
+            yield self.noticia(i)
+
+
+def generar_corpus(destino, n_documentos, formato='arbol', semilla=0, fraccion_duplicados=0.01):
+    """
+    Escribe un corpus sintético de n_documentos noticias.
+    :param destino: Carpeta de salida (se crea si no existe)
+    :param formato: 'arbol' = <categoria>/noticias/*.txt en el formato del scraper
+                    (fecha;titulo;cuerpo;fecha_extraccion); 'almacen' = almacén de corpus (ver almacen_corpus)
+    :return: Ruta que hay que pasar al MotorRecomendacion
+    """
+    generador = GeneradorNoticias(semilla=semilla, fraccion_duplicados=fraccion_duplicados)
+    if formato == 'almacen':
+        almacen = AlmacenCorpus(destino)
+        for noticia in generador.noticias(n_documentos):
+            almacen.agregar(noticia)
+        return destino
+    if formato != 'arbol':
+        raise ValueError(f"Formato de corpus desconocido: {formato}")
+
+    for categoria in generador.categorias:
+        os.makedirs(os.path.join(destino, categoria, "noticias"), exist_ok=True)
+    for i, noticia in enumerate(generador.noticias(n_documentos)):
+        path = os.path.join(destino, noticia["categoria"], "noticias", f"noticia_{i:07d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"{noticia['fecha']};{noticia['titulo']};{noticia['cuerpo']};{noticia['fecha_extraccion']}\n")
+    return destino
+
+
+if __name__ == "__main__":
+    # Uso: python benchmarks/corpus_sintetico.py <destino> <n_documentos> [arbol|almacen]
+    if len(sys.argv) < 3:
+        print("Uso: python benchmarks/corpus_sintetico.py <destino> <n_documentos> [arbol|almacen]")
+        sys.exit(1)
+    ruta = generar_corpus(sys.argv[1], int(sys.argv[2]), formato=sys.argv[3] if len(sys.argv) > 3 else 'arbol')
+    print(f"Corpus sintético de {sys.argv[2]} noticias en {ruta}")
@@ -1,25 +1,40 @@
 import os
+import sys
 import csv
 
 categorias = ['finanzas', 'gobiernos', 'tecnologia']
 base_dir = os.path.join(os.path.dirname(__file__), '..', 'noticias')
 output_csv = os.path.join(os.path.dirname(__file__), 'noticias_sample_10x3.csv')
 
+# Si se pasa la carpeta de un almacén de corpus (ver src/almacen_corpus.py), se lee de ahí
+origen = sys.argv[1] if len(sys.argv) > 1 else base_dir
+
 rows = []
-for cat in categorias:
-    folder = os.path.join(base_dir, cat, 'noticias')
-    if not os.path.exists(folder):
-        continue
-    archivos = [f for f in os.listdir(folder) if f.endswith('.txt')]
-    for archivo in archivos[:10]:
-        path = os.path.join(folder, archivo)
-        with open(path, encoding='utf-8') as f:
-            line = f.readline().strip()
-            campos = line.split(';')
-            if len(campos) >= 3:
-                fecha, titulo, *contenido = campos
-                contenido = ';'.join(contenido)
-                rows.append([cat, titulo, contenido, fecha])
+if os.path.isfile(os.path.join(origen, 'registros.jsonl')):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+    from almacen_corpus import AlmacenCorpus
+
+    por_categoria = {cat: 0 for cat in categorias}
+    for registro in AlmacenCorpus(origen):
+        cat = registro['categoria']
+        if cat in por_categoria and por_categoria[cat] < 10:
+            rows.append([cat, registro['titulo'], registro['cuerpo'], registro['fecha']])
+            por_categoria[cat] += 1
+else:
+    for cat in categorias:
+        folder = os.path.join(origen, cat, 'noticias')
+        if not os.path.exists(folder):
+            continue
+        archivos = [f for f in os.listdir(folder) if f.endswith('.txt')]
+        for archivo in archivos[:10]:
+            path = os.path.join(folder, archivo)
+            with open(path, encoding='utf-8') as f:
+                line = f.readline().strip()
+                campos = line.split(';')
+                if len(campos) >= 3:
+                    fecha, titulo, *contenido = campos
+                    contenido = ';'.join(contenido)
+                    rows.append([cat, titulo, contenido, fecha])
 
 with open(output_csv, 'w', encoding='utf-8', newline='') as f:
     writer = csv.writer(f)
@@ -0,0 +1,261 @@
+import os
+import json
+import struct
+import hashlib
+import numpy as np
+from carga_noticias import Manifiesto, CargadorNoticias, id_estable, clave_contenido, BITS_ID
+from estado_crawl import canonicalizar_url
+
+# Archivos del almacén dentro de su carpeta
+ARCHIVO_REGISTROS = "registros.jsonl"
+ARCHIVO_INDICE = "indice.bin"
+
+# Entrada del índice: id, offset y longitud del registro en registros.jsonl (int64 little-endian).
+# Longitud -1 = noticia eliminada.
+FORMATO_ENTRADA = "<qqq"
+TAM_ENTRADA = struct.calcsize(FORMATO_ENTRADA)
+
+# Campos que se guardan de cada noticia
+CAMPOS = ("categoria", "fecha", "titulo", "cuerpo", "fecha_extraccion", "enlace", "origen")
+
+
+def es_almacen(path):
+    """Indica si path es la carpeta de un almacén de corpus (y no el árbol de .txt)."""
+    return os.path.isfile(os.path.join(path, ARCHIVO_REGISTROS))
+
+
+def id_estable_registro(registro):
+    """Id estable de un registro: de su URL canónica si tiene enlace, si no de su contenido."""
+    if registro.get("enlace"):
+        return id_estable(canonicalizar_url(registro["enlace"]))
+    return id_estable(clave_contenido({campo: registro.get(campo) or "" for campo in ("fecha", "titulo", "cuerpo")}))
+
+
+class AlmacenCorpus:
+    """
+    Almacén compacto del corpus: un único log de registros JSON (solo se añade al
+    final) más un índice binario id -> (offset, longitud) para acceso aleatorio por id.
+    JSON escapa cualquier carácter, así que los ';' o saltos de línea del texto no rompen nada.
+    Actualizar una noticia añade una versión nueva con el mismo id; eliminarla añade
+    una marca en el índice. compactar() reescribe el log sin versiones viejas.
+    """
+
+    def __init__(self, path):
+        """:param path: Carpeta del almacén (se crea si no existe)"""
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._ruta_registros = os.path.join(path, ARCHIVO_REGISTROS)
+        self._ruta_indice = os.path.join(path, ARCHIVO_INDICE)
+        for ruta in (self._ruta_registros, self._ruta_indice):
+            if not os.path.exists(ruta):
+                open(ruta, "wb").close()
+        self._posiciones = self._leer_indice()
+        # Almacenes de antes de BITS_ID: sus ids eran los 63 bits altos del sha1
+        if any(id_ >> BITS_ID for id_ in self._posiciones):
+            self.compactar()
+
+    def _leer_indice(self):
+        """id -> (offset, longitud) de la última versión de cada noticia viva."""
+        with open(self._ruta_indice, "rb") as f:
+            datos = f.read()
+        # Si el último append quedó a medias, ignoramos la entrada incompleta
+        datos = datos[:len(datos) - len(datos) % TAM_ENTRADA]
+        entradas = np.frombuffer(datos, dtype=np.int64).reshape(-1, 3)
+        posiciones = {}
+        for id_, offset, longitud in entradas.tolist():
+            if longitud < 0:
+                posiciones.pop(id_, None)
+            else:
+                posiciones[id_] = (offset, longitud)
+        return posiciones
+
+    def agregar(self, registro, id_noticia=None):
+        """
+        Añade una noticia (o una versión nueva si el id ya existe).
+        :param registro: dict con los campos de CAMPOS (los que falten quedan vacíos)
+        :param id_noticia: Por defecto, un id estable derivado de la URL canónica del enlace
+                           (o del contenido si no hay enlace): volver a añadir la misma noticia
+                           crea una versión nueva en vez de un duplicado
+        :return: id de la noticia
+        """
+        if id_noticia is None:
+            id_noticia = id_estable_registro(registro)
+
+        datos = {"id": id_noticia}
+        datos.update({campo: registro.get(campo) or "" for campo in CAMPOS})
+        linea = (json.dumps(datos, ensure_ascii=False) + "\n").encode("utf-8")
+
+        with open(self._ruta_registros, "ab") as f:
+            offset = f.tell()
+            f.write(linea)
+        # El índice se escribe después del registro: nunca apunta a datos que no existen
+        self._escribir_entrada(id_noticia, offset, len(linea))
+        self._posiciones[id_noticia] = (offset, len(linea))
+        return id_noticia
+
+    def eliminar(self, id_noticia):
+        if id_noticia in self._posiciones:
+            self._escribir_entrada(id_noticia, 0, -1)
+            del self._posiciones[id_noticia]
+
+    def obtener(self, id_noticia):
+        """Registro de la noticia con ese id (KeyError si no existe)."""
+        offset, longitud = self._posiciones[id_noticia]
+        with open(self._ruta_registros, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(longitud).decode("utf-8"))
+
+    def ids(self):
+        return sorted(self._posiciones)
+
+    def version(self, id_noticia):
+        """(offset, longitud) de la versión actual: cambia cada vez que se actualiza la noticia."""
+        return self._posiciones[id_noticia]
+
+    def __iter__(self):
+        """Recorre las noticias vivas en orden de id (leyendo el log de forma secuencial)."""
+        with open(self._ruta_registros, "rb") as f:
+            for id_ in self.ids():
+                offset, longitud = self._posiciones[id_]
+                f.seek(offset)
+                yield json.loads(f.read(longitud).decode("utf-8"))
+
+    def __len__(self):
+        return len(self._posiciones)
+
+    def __contains__(self, id_noticia):
+        return id_noticia in self._posiciones
+
+    def huella(self):
+        """Huella del contenido actual (cambia con cualquier alta, baja o actualización)."""
+        h = hashlib.sha1()
+        for id_ in self.ids():
+            h.update(struct.pack(FORMATO_ENTRADA, id_, *self._posiciones[id_]))
+        return h.hexdigest()
+
+    def compactar(self):
+        """
+        Reescribe el log y el índice solo con la versión actual de cada noticia. Los ids
+        de 63 bits de almacenes antiguos pasan a sus BITS_ID bits altos (el mismo id que da
+        ahora id_estable para esa noticia).
+        """
+        registros = list(self)
+        for registro in registros:
+            if registro["id"] >> BITS_ID:
+                registro["id"] >>= 63 - BITS_ID
+        tmp_registros = self._ruta_registros + ".tmp"
+        tmp_indice = self._ruta_indice + ".tmp"
+        posiciones = {}
+        with open(tmp_registros, "wb") as f_reg, open(tmp_indice, "wb") as f_idx:
+            for registro in registros:
+                linea = (json.dumps(registro, ensure_ascii=False) + "\n").encode("utf-8")
+                offset = f_reg.tell()
+                f_reg.write(linea)
+                f_idx.write(struct.pack(FORMATO_ENTRADA, registro["id"], offset, len(linea)))
+                posiciones[registro["id"]] = (offset, len(linea))
+        os.replace(tmp_registros, self._ruta_registros)
+        os.replace(tmp_indice, self._ruta_indice)
+        self._posiciones = posiciones
+
+    def _escribir_entrada(self, id_noticia, offset, longitud):
+        with open(self._ruta_indice, "ab") as f:
+            f.write(struct.pack(FORMATO_ENTRADA, id_noticia, offset, longitud))
+
+
+def migrar_desde_arbol(base_path_noticias, path_almacen):
+    """
+    Migración única del árbol noticias/<cat>/noticias/*.txt a un almacén de corpus.
+    Los archivos ya migrados (mismo origen) no se duplican si se vuelve a ejecutar, y cada
+    noticia conserva el id que le daba el motor sobre el árbol (el de su ruta).
+    :return: El AlmacenCorpus resultante
+    """
+    almacen = AlmacenCorpus(path_almacen)
+    ya_migrados = {registro["origen"] for registro in almacen}
+
+    cargador = CargadorNoticias(base_path_noticias)
+    n = 0
+    for registro in cargador.registros():
+        if registro["ruta"] in ya_migrados:
+            continue
+        almacen.agregar({
+            "categoria": registro["categoria"],
+            "fecha": registro["fecha"],
+            "titulo": registro["titulo"],
+            "cuerpo": registro["cuerpo"],
+            "fecha_extraccion": registro["fecha_extraccion"],
+            "origen": registro["ruta"],
+        }, id_noticia=registro["id"])
+        n += 1
+    print(f"Migradas {n} noticias a {path_almacen} ({len(cargador.errores)} archivos con errores)")
+    return almacen
+
+
+class CargadorAlmacen:
+    """
+    Equivalente a CargadorNoticias cuando el corpus está en un AlmacenCorpus:
+    entrega registros con el formato del motor y detecta cambios con un manifiesto
+    cuyas claves son '#<id>'.
+    """
+
+    def __init__(self, path_almacen, manifiesto=None):
+        self.almacen = AlmacenCorpus(path_almacen)
+        self.manifiesto = manifiesto if manifiesto is not None else Manifiesto()
+        self.errores = []
+
+    @staticmethod
+    def _clave_id(id_noticia):
+        return f"#{id_noticia}"
+
+    def clave(self, clave):
+        """Clave de manifiesto de un elemento de detectar_cambios (aquí ya son claves)."""
+        return clave
+
+    def registros(self, claves=None):
+        """
+        Genera los registros del motor.
+        :param claves: Claves '#<id>' a leer (por defecto, todo el almacén)
+        """
+        if claves is None:
+            fuente = iter(self.almacen)
+        else:
+            fuente = (self.almacen.obtener(int(clave.lstrip("#"))) for clave in claves)
+        for datos in fuente:
+            clave = self._clave_id(datos["id"])
+            offset, longitud = self.almacen.version(datos["id"])
+            self.manifiesto.registrar(clave, longitud, offset, None)
+            yield {
+                "id": datos["id"],
+                "filename": os.path.basename(datos["origen"]) if datos["origen"] else clave,
+                "titulo": datos["titulo"],
+                "cuerpo": datos["cuerpo"],
+                "contenido_completo": f"{datos['titulo']}. {datos['cuerpo']}",
+                "categoria": datos["categoria"],
+                "fecha": datos["fecha"],
+                "fecha_extraccion": datos["fecha_extraccion"],
+                "ruta": clave,
+            }
+
+    def detectar_cambios(self):
+        """:return: (claves nuevas, claves actualizadas, claves eliminadas), comparando versiones."""
+        nuevas, modificadas, vivas = [], [], set()
+        for id_ in self.almacen.ids():
+            clave = self._clave_id(id_)
+            vivas.add(clave)
+            if clave not in self.manifiesto:
+                nuevas.append(clave)
+                continue
+            offset, longitud = self.almacen.version(id_)
+            entrada = self.manifiesto.entradas[clave]
+            if (entrada["mtime"], entrada["tamano"]) != (offset, longitud):
+                modificadas.append(clave)
+        eliminadas = [clave for clave in self.manifiesto.entradas if clave not in vivas]
+        return nuevas, modificadas, eliminadas
+
+
+# --- MIGRACIÓN (USO: python src/almacen_corpus.py [carpeta_noticias] [carpeta_almacen]) ---
+if __name__ == "__main__":
+    import sys
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    origen = sys.argv[1] if len(sys.argv) > 1 else os.path.join(base_dir, "noticias")
+    destino = sys.argv[2] if len(sys.argv) > 2 else os.path.join(base_dir, "corpus")
+    migrar_desde_arbol(origen, destino)
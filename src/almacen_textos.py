@@ -0,0 +1,122 @@
+import os
+import numpy as np
+
+# Textos largos de cada noticia que el motor compacto no guarda en memoria
+CAMPOS_TEXTO = ("cuerpo", "texto_procesado")
+
+
+class AlmacenTextos:
+    """
+    Textos de las noticias fuera de la RAM (ver MotorRecomendacion.compactar): un archivo
+    <path>.bin con los textos en UTF-8 uno detrás de otro y un índice <path>.npy con los
+    límites de cada campo por noticia. Se lee con os.pread bajo demanda (solo las noticias
+    que se piden), así que varios procesos que abran el mismo almacén comparten la caché
+    de páginas del sistema operativo y no una copia por proceso.
+    Las noticias añadidas después de abrirlo van al final del .bin y a un índice en memoria;
+    guardar() reescribe los dos archivos sin las versiones viejas ni las eliminadas.
+    """
+
+    def __init__(self, path, campos=CAMPOS_TEXTO):
+        """:param path: Ruta base de los archivos (sin extensión); se crean si no existen"""
+        self.path = path
+        self.campos = tuple(campos)
+        self._ruta_bin = path + ".bin"
+        self._ruta_indice = path + ".npy"
+        if not os.path.exists(self._ruta_bin):
+            open(self._ruta_bin, "wb").close()
+
+        # Índice guardado (compartido, mapeado en memoria): columnas id, inicio y fin de cada campo
+        self._base_ids = np.array([], dtype=np.int64)
+        self._base_limites = np.zeros((0, len(self.campos) + 1), dtype=np.int64)
+        if os.path.exists(self._ruta_indice):
+            indice = np.load(self._ruta_indice, mmap_mode='r' if os.path.getsize(self._ruta_indice) > 128 else None)
+            self._base_ids = indice[:, 0]
+            self._base_limites = indice[:, 1:]
+        self._nuevos = {}           # id -> límites de lo añadido desde que se abrió
+        self._eliminados = set()    # ids del índice guardado que ya no están
+        self._fd = os.open(self._ruta_bin, os.O_RDWR | getattr(os, "O_BINARY", 0))
+        self._tam = os.fstat(self._fd).st_size
+
+    def agregar(self, id_noticia, textos):
+        """Añade (o reemplaza) los textos de una noticia. :param textos: dict campo -> texto"""
+        datos = [(textos.get(campo) or "").encode("utf-8") for campo in self.campos]
+        limites = np.cumsum([self._tam] + [len(d) for d in datos])
+        os.pwrite(self._fd, b"".join(datos), self._tam)
+        self._tam = int(limites[-1])
+        self._nuevos[id_noticia] = limites
+        self._eliminados.discard(id_noticia)
+
+    def agregar_lote(self, ids, textos_por_campo):
+        """:param textos_por_campo: dict campo -> lista de textos (uno por id)"""
+        for i, id_noticia in enumerate(ids):
+            self.agregar(id_noticia, {campo: textos[i] for campo, textos in textos_por_campo.items()})
+
+    def eliminar(self, id_noticia):
+        self._nuevos.pop(id_noticia, None)
+        self._eliminados.add(id_noticia)
+
+    def _limites(self, id_noticia):
+        limites = self._nuevos.get(id_noticia)
+        if limites is not None:
+            return limites
+        if id_noticia not in self._eliminados:
+            i = int(np.searchsorted(self._base_ids, id_noticia))
+            if i < len(self._base_ids) and self._base_ids[i] == id_noticia:
+                return self._base_limites[i]
+        raise KeyError(id_noticia)
+
+    def obtener(self, id_noticia, campo, max_bytes=None):
+        """
+        Texto de un campo de la noticia (KeyError si no está).
+        :param max_bytes: Leer como mucho estos bytes (p. ej. para un resumen)
+        """
+        j = self.campos.index(campo)
+        limites = self._limites(id_noticia)
+        inicio, fin = int(limites[j]), int(limites[j + 1])
+        if max_bytes is not None:
+            fin = min(fin, inicio + max_bytes)
+        return os.pread(self._fd, fin - inicio, inicio).decode("utf-8", errors="ignore")
+
+    def obtener_lote(self, ids, campo):
+        return [self.obtener(id_noticia, campo) for id_noticia in ids]
+
+    def __contains__(self, id_noticia):
+        try:
+            self._limites(id_noticia)
+            return True
+        except KeyError:
+            return False
+
+    def bytes_en_disco(self):
+        return self._tam + (os.path.getsize(self._ruta_indice) if os.path.exists(self._ruta_indice) else 0)
+
+    def guardar(self, path, ids):
+        """
+        Escribe en path un almacén nuevo solo con los textos de 'ids' y lo devuelve abierto.
+        Se escribe en temporales y se renombra, así que path puede ser el del propio almacén
+        (quien lo tuviera abierto sigue leyendo la versión anterior).
+        """
+        ruta_bin, ruta_indice = path + ".bin", path + ".npy"
+        ids = sorted(int(i) for i in ids)
+        indice = np.zeros((len(ids), len(self.campos) + 2), dtype=np.int64)
+        with open(ruta_bin + ".tmp", "wb") as f:
+            for fila, id_noticia in enumerate(ids):
+                limites = self._limites(id_noticia)
+                f.write(os.pread(self._fd, int(limites[-1] - limites[0]), int(limites[0])))
+                indice[fila, 0] = id_noticia
+                indice[fila, 1:] = limites - limites[0] + (indice[fila - 1, -1] if fila else 0)
+        np.save(ruta_indice + ".tmp.npy", indice)
+        os.replace(ruta_bin + ".tmp", ruta_bin)
+        os.replace(ruta_indice + ".tmp.npy", ruta_indice)
+        return AlmacenTextos(path, self.campos)
+
+    def cerrar(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __del__(self):
+        try:
+            self.cerrar()
+        except Exception:
+            pass
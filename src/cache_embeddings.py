@@ -0,0 +1,115 @@
+import os
+import re
+import json
+import hashlib
+import numpy as np
+
+# Textos por llamada a model.encode cuando no se indica otra cosa
+TAM_LOTE_EMBEDDINGS = 32
+
+
+def hash_texto(texto):
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+class CacheEmbeddings:
+    """
+    Caché persistente de embeddings por (modelo, hash del texto).
+    Por cada modelo hay tres archivos en la carpeta de la caché:
+      <modelo>.f32     matriz float32 (n, dimension) que solo crece, leída con memmap
+      <modelo>.claves  hash del texto de cada fila, una por línea
+      <modelo>.json    nombre del modelo y dimensión
+    Solo los textos que no están en la caché llegan al modelo.
+    """
+
+    def __init__(self, path, nombre_modelo):
+        """
+        :param path: Carpeta de la caché (se crea si no existe)
+        :param nombre_modelo: Nombre del modelo; cada modelo tiene sus propios archivos
+        """
+        os.makedirs(path, exist_ok=True)
+        self.nombre_modelo = nombre_modelo
+        base = os.path.join(path, re.sub(r"[^\w.-]", "_", nombre_modelo))
+        self._ruta_vectores = base + ".f32"
+        self._ruta_claves = base + ".claves"
+        self._ruta_meta = base + ".json"
+
+        self.dimension = None
+        if os.path.exists(self._ruta_meta):
+            with open(self._ruta_meta, "r", encoding="utf-8") as f:
+                self.dimension = json.load(f)["dimension"]
+
+        claves = []
+        if os.path.exists(self._ruta_claves):
+            with open(self._ruta_claves, "r", encoding="utf-8") as f:
+                claves = [linea.strip() for linea in f if linea.strip()]
+        # Si una escritura anterior quedó a medias, solo valen las filas con clave y vector completos
+        n_vectores = 0
+        if self.dimension and os.path.exists(self._ruta_vectores):
+            n_vectores = os.path.getsize(self._ruta_vectores) // (4 * self.dimension)
+        self._n = min(len(claves), n_vectores)
+        self._filas = {clave: i for i, clave in enumerate(claves[:self._n])}
+        self._vectores = None
+        if len(claves) != self._n or n_vectores != self._n:
+            self._recortar(claves[:self._n])
+
+    def __len__(self):
+        return self._n
+
+    def __contains__(self, texto):
+        return hash_texto(texto) in self._filas
+
+    def codificar(self, textos, modelo, tam_lote=TAM_LOTE_EMBEDDINGS, mostrar_progreso=False):
+        """
+        Devuelve los embeddings (float32) de los textos, codificando solo los que faltan.
+        :param modelo: Modelo con .encode(), o función sin argumentos que lo devuelve
+                       (así el modelo solo se carga si hace falta codificar algo)
+        :param tam_lote: batch_size para model.encode
+        """
+        claves = [hash_texto(t) for t in textos]
+        pendientes = {}
+        for clave, texto in zip(claves, textos):
+            if clave not in self._filas:
+                pendientes[clave] = texto
+
+        if pendientes:
+            if callable(modelo) and not hasattr(modelo, "encode"):
+                modelo = modelo()
+            nuevos = modelo.encode(list(pendientes.values()), batch_size=tam_lote, show_progress_bar=mostrar_progreso)
+            self._agregar(list(pendientes.keys()), np.asarray(nuevos, dtype=np.float32))
+
+        if not claves:
+            return np.zeros((0, self.dimension or 0), dtype=np.float32)
+        vectores = self._mapa()
+        return np.array(vectores[[self._filas[clave] for clave in claves]])
+
+    def _agregar(self, claves, vectores):
+        if self.dimension is None:
+            self.dimension = int(vectores.shape[1])
+            with open(self._ruta_meta, "w", encoding="utf-8") as f:
+                json.dump({"modelo": self.nombre_modelo, "dimension": self.dimension}, f)
+
+        # Primero los vectores y después las claves: una clave nunca apunta a un vector sin escribir
+        with open(self._ruta_vectores, "ab") as f:
+            f.write(np.ascontiguousarray(vectores, dtype=np.float32).tobytes())
+        with open(self._ruta_claves, "a", encoding="utf-8") as f:
+            f.write("".join(clave + "\n" for clave in claves))
+
+        for clave in claves:
+            self._filas[clave] = self._n
+            self._n += 1
+        self._vectores = None  # el memmap hay que reabrirlo con el nuevo tamaño
+
+    def _recortar(self, claves):
+        """Deja ambos archivos con las mismas self._n filas para que los siguientes appends cuadren."""
+        if self.dimension and os.path.exists(self._ruta_vectores):
+            with open(self._ruta_vectores, "r+b") as f:
+                f.truncate(self._n * 4 * self.dimension)
+        with open(self._ruta_claves, "w", encoding="utf-8") as f:
+            f.write("".join(clave + "\n" for clave in claves))
+
+    def _mapa(self):
+        """Vista de solo lectura (memmap) de los vectores de la caché."""
+        if self._vectores is None:
+            self._vectores = np.memmap(self._ruta_vectores, dtype=np.float32, mode="r", shape=(self._n, self.dimension))
+        return self._vectores
@@ -0,0 +1,93 @@
+import time
+import threading
+from collections import OrderedDict
+
+# Entradas (consultas distintas) que se guardan como máximo; cada una es una lista de
+# top_n resultados pequeños, así que 4096 entradas ocupan unos pocos MB
+CAPACIDAD_CACHE_RESULTADOS = 4096
+# Segundos que vale una entrada (None = hasta que la expulse el LRU o cambie el índice)
+TTL_CACHE_RESULTADOS = 600
+
+
+def normalizar_query(query):
+    """
+    Forma canónica de una query para la caché del método tfidf: minúsculas y espacios
+    simples, que el preprocesado (ver Preprocesador.procesar) ya no distingue.
+    """
+    return " ".join(query.lower().split())
+
+
+class CacheResultados:
+    """
+    Caché de resultados de consultas con expulsión LRU (capacidad acotada) y TTL.
+    Las claves las construye el motor e incluyen la versión del índice, y el motor
+    la vacía cada vez que cambia (ver MotorRecomendacion._nueva_version), así que
+    nunca devuelve resultados calculados sobre otro corpus.
+    Se puede usar desde varios hilos a la vez.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_CACHE_RESULTADOS, ttl=TTL_CACHE_RESULTADOS, reloj=time.monotonic):
+        """
+        :param capacidad: Número máximo de entradas
+        :param ttl: Segundos de validez de cada entrada (None = sin caducidad)
+        :param reloj: Función que da el tiempo actual en segundos (para pruebas)
+        """
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self.reloj = reloj
+        self._entradas = OrderedDict()  # clave -> (instante de caducidad, valor); la más reciente al final
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.caducadas = 0
+        self.expulsadas = 0
+        self.invalidaciones = 0
+
+    def obtener(self, clave):
+        """Valor guardado para la clave, o None si no está o ha caducado."""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                caducidad, valor = entrada
+                if caducidad is None or self.reloj() < caducidad:
+                    self._entradas.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._entradas[clave]
+                self.caducadas += 1
+            self.fallos += 1
+            return None
+
+    def guardar(self, clave, valor):
+        caducidad = self.reloj() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entradas[clave] = (caducidad, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.expulsadas += 1
+
+    def invalidar(self):
+        """Vacía la caché (p. ej. porque ha cambiado el índice)."""
+        with self._lock:
+            self._entradas.clear()
+            self.invalidaciones += 1
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "capacidad": self.capacidad,
+                "ttl": self.ttl,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else None,
+                "caducadas": self.caducadas,
+                "expulsadas": self.expulsadas,
+                "invalidaciones": self.invalidaciones,
+            }
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entradas)
@@ -0,0 +1,310 @@
+import os
+import re
+import json
+import hashlib
+import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Hilos de lectura por defecto (la carga está limitada por E/S, no por CPU)
+N_HILOS_LECTURA = 8
+
+# Abreviaturas de mes que escriben los sitios scrapeados ('20 OCT 2025', '06 AGO 2025', '3 SEPT 2025')
+MESES = {
+    "ENE": 1, "JAN": 1, "FEB": 2, "MAR": 3, "ABR": 4, "APR": 4, "MAY": 5, "JUN": 6, "JUL": 7,
+    "AGO": 8, "AUG": 8, "SEP": 9, "SEPT": 9, "OCT": 10, "NOV": 11, "DIC": 12, "DEC": 12,
+}
+# Fechas relativas a la descarga ('2 DAYS AGO', '5 HOURS AGO')
+UNIDADES_RELATIVAS = {"MINUTE": "minutes", "HOUR": "hours", "DAY": "days", "WEEK": "weeks"}
+FORMATO_FECHA_EXTRACCION = "%Y-%m-%d %H:%M:%S"
+# Bits de los ids de noticia: los enteros de más de 53 bits no se representan exactos como
+# double, así que los clientes JSON (JavaScript) los redondearían
+BITS_ID = 53
+
+
+def es_archivo_noticia(nombre):
+    """Indica si un archivo es una noticia (y no un archivo de control de enlaces)."""
+    return nombre.endswith(".txt") and "enlaceen" not in nombre
+
+
+def listar_archivos_noticias(base_path_noticias):
+    """Rutas de todas las noticias bajo base_path_noticias, en el orden de os.walk."""
+    rutas = []
+    for root, dirs, files in os.walk(base_path_noticias):
+        for file in files:
+            # <categoria>/<categoria>.txt guarda los enlaces de la categoría, no es una noticia
+            if es_archivo_noticia(file) and file != os.path.basename(root) + ".txt":
+                rutas.append(os.path.join(root, file))
+    return rutas
+
+
+def id_estable(clave):
+    """
+    Id numérico de una noticia derivado de una clave estable (ruta del archivo, URL
+    canónica o hash del contenido): no depende del orden de carga ni de qué otros archivos haya.
+    Son los BITS_ID bits altos del sha1: caben en un int64 y sobreviven a un JSON.
+    """
+    return int.from_bytes(hashlib.sha1(clave.encode("utf-8")).digest()[:8], "big") >> (64 - BITS_ID)
+
+
+def clave_contenido(campos):
+    """Clave de contenido de una noticia: fecha, título y cuerpo (sin la fecha de extracción)."""
+    return "\n".join((campos["fecha"], campos["titulo"], campos["cuerpo"]))
+
+
+def ruta_relativa(path, base_path_noticias):
+    """Ruta de un archivo relativa a la carpeta de noticias (con '/' como separador)."""
+    return os.path.relpath(path, base_path_noticias).replace(os.sep, "/")
+
+
+def parsear_fecha_extraccion(texto):
+    """Fecha de extracción del scraper ('2025-12-24 01:00:27') como datetime, o None."""
+    try:
+        return datetime.datetime.strptime(texto.strip(), FORMATO_FECHA_EXTRACCION)
+    except (AttributeError, ValueError):
+        return None
+
+
+def parsear_fecha(texto, referencia=None):
+    """
+    Fecha de publicación de una noticia tal como la escribe el scraper: '20 OCT 2025',
+    '2025-10-20', '20/10/2025' o relativa a la descarga ('2 DAYS AGO').
+    :param referencia: datetime de la extracción, para las fechas relativas
+    :return: datetime (a las 00:00 del día) o None si no se reconoce ('Fecha no encontrada', '')
+    """
+    if not isinstance(texto, str):
+        return None
+    texto = texto.strip().upper()
+    partes = texto.split()
+    try:
+        if len(partes) == 3 and partes[1] in MESES:
+            return datetime.datetime(int(partes[2]), MESES[partes[1]], int(partes[0]))
+        relativa = re.fullmatch(r"(\d+) (MINUTE|HOUR|DAY|WEEK)S? AGO", texto)
+        if relativa:
+            if referencia is None:
+                return None
+            fecha = referencia - datetime.timedelta(**{UNIDADES_RELATIVAS[relativa.group(2)]: int(relativa.group(1))})
+            return datetime.datetime(fecha.year, fecha.month, fecha.day)
+        for formato in ("%Y-%m-%d", "%d/%m/%Y"):
+            try:
+                return datetime.datetime.strptime(texto, formato)
+            except ValueError:
+                pass
+    except ValueError:  # día o mes fuera de rango
+        return None
+    return None
+
+
+def parsear_noticia(linea):
+    """
+    Separa una línea del scraper (fecha;titulo;cuerpo;fecha_extraccion).
+    El formato no escapa los ';', así que todo lo que hay entre el título y la fecha
+    de extracción (último campo) se considera cuerpo.
+    :return: dict con fecha, titulo, cuerpo y fecha_extraccion, o None si no tiene el formato esperado
+    """
+    parts = linea.strip().split(";")
+    if len(parts) < 3:
+        return None
+    if len(parts) == 3:
+        return {"fecha": parts[0], "titulo": parts[1], "cuerpo": parts[2], "fecha_extraccion": ""}
+    return {
+        "fecha": parts[0],
+        "titulo": parts[1],
+        "cuerpo": ";".join(parts[2:-1]),
+        "fecha_extraccion": parts[-1],
+    }
+
+
+class ErrorCarga(Exception):
+    """Error al leer una noticia concreta (se registra y la carga continúa)."""
+
+    def __init__(self, tipo, mensaje, stat=None, hash_contenido=None):
+        """:param stat, hash_contenido: Lo que se pudo saber del archivo, para el manifiesto"""
+        super().__init__(mensaje)
+        self.tipo = tipo
+        self.stat = stat
+        self.hash_contenido = hash_contenido
+
+
+class Manifiesto:
+    """
+    Estado de los archivos de noticias ya cargados: ruta relativa -> tamaño, mtime y hash.
+    Permite saber qué archivos han cambiado sin volver a leerlos todos. Los archivos que no
+    se pudieron cargar también se registran, con el tipo de error, para no releerlos (ni
+    volver a avisar) mientras no cambien.
+    """
+
+    def __init__(self, entradas=None):
+        self.entradas = dict(entradas or {})
+
+    @classmethod
+    def cargar(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def guardar(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.entradas, f, ensure_ascii=False)
+
+    def registrar(self, ruta, tamano, mtime, hash_contenido, error=None):
+        self.entradas[ruta] = {"tamano": tamano, "mtime": mtime, "hash": hash_contenido}
+        if error is not None:
+            self.entradas[ruta]["error"] = error
+
+    def eliminar(self, ruta):
+        self.entradas.pop(ruta, None)
+
+    def sin_cambios(self, ruta, stat):
+        """True si el archivo coincide en tamaño y mtime con lo registrado (no hace falta leerlo)."""
+        entrada = self.entradas.get(ruta)
+        return entrada is not None and entrada["tamano"] == stat.st_size and entrada["mtime"] == stat.st_mtime
+
+    def __contains__(self, ruta):
+        return ruta in self.entradas
+
+    def __len__(self):
+        return len(self.entradas)
+
+
+class CargadorNoticias:
+    """
+    Lee las noticias de la carpeta del scraper con un pool de hilos y las entrega
+    como un flujo de registros (en el orden de os.walk, para que los ids sean estables).
+    Los errores de cada archivo quedan en self.errores y el estado de los archivos
+    leídos en self.manifiesto.
+    """
+
+    def __init__(self, base_path_noticias, n_hilos=N_HILOS_LECTURA, manifiesto=None):
+        """
+        :param manifiesto: Manifiesto de una carga anterior. Se actualiza con lo que se lee y
+                           detectar_cambios() lo usa para no releer los archivos sin cambios
+        """
+        self.base_path = base_path_noticias
+        self.n_hilos = n_hilos
+        self.manifiesto = manifiesto if manifiesto is not None else Manifiesto()
+        self.errores = []
+
+    def registros(self, rutas=None):
+        """
+        Genera los registros de las noticias a medida que se leen.
+        :param rutas: Archivos a leer (por defecto, toda la carpeta)
+        """
+        if rutas is None:
+            rutas = listar_archivos_noticias(self.base_path)
+
+        # Ventana acotada de lecturas en vuelo: no se encola todo el árbol de golpe
+        en_vuelo = deque()
+        with ThreadPoolExecutor(max_workers=self.n_hilos) as pool:
+            for path in rutas:
+                en_vuelo.append((path, pool.submit(self._leer, path)))
+                if len(en_vuelo) >= 4 * self.n_hilos:
+                    registro = self._resultado(*en_vuelo.popleft())
+                    if registro is not None:
+                        yield registro
+            while en_vuelo:
+                registro = self._resultado(*en_vuelo.popleft())
+                if registro is not None:
+                    yield registro
+
+    def detectar_cambios(self):
+        """
+        Compara la carpeta con el manifiesto sin leer los archivos que no han cambiado
+        de tamaño ni de mtime (tampoco los que ya fallaron y siguen igual). Los que sí
+        cambiaron se comparan por hash; si ya no se pueden leer, cuentan como modificados
+        (al releerlos fallan y el motor los quita, ver MotorRecomendacion.refresh).
+        :return: (rutas nuevas, rutas modificadas, rutas relativas eliminadas)
+        """
+        nuevas, modificadas, en_disco = [], [], set()
+        for path in listar_archivos_noticias(self.base_path):
+            ruta = ruta_relativa(path, self.base_path)
+            en_disco.add(ruta)
+            if ruta not in self.manifiesto:
+                nuevas.append(path)
+                continue
+            stat = os.stat(path)
+            if self.manifiesto.sin_cambios(ruta, stat):
+                continue
+            try:
+                with open(path, "rb") as f:
+                    hash_actual = hashlib.sha1(f.read()).hexdigest()
+            except OSError:
+                modificadas.append(path)
+                continue
+            entrada = self.manifiesto.entradas[ruta]
+            if hash_actual != entrada["hash"]:
+                modificadas.append(path)
+            else:
+                # Solo se ha tocado el archivo: actualizamos el manifiesto para no volver a leerlo
+                self.manifiesto.registrar(ruta, stat.st_size, stat.st_mtime, hash_actual, entrada.get("error"))
+
+        eliminadas = [ruta for ruta in self.manifiesto.entradas if ruta not in en_disco]
+        return nuevas, modificadas, eliminadas
+
+    def clave(self, path):
+        """Clave de manifiesto de un archivo (su ruta relativa)."""
+        return ruta_relativa(path, self.base_path)
+
+    def _leer(self, path):
+        """
+        Lee un archivo: devuelve (registro, stat, hash) o lanza ErrorCarga si no se puede leer.
+        Si se lee pero no tiene el formato del scraper, el registro es None.
+        """
+        try:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                contenido = f.read()
+        except OSError as e:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None  # Ya no existe: detectar_cambios lo dará por eliminado
+            raise ErrorCarga("lectura", str(e), stat)
+        hash_contenido = hashlib.sha1(contenido).hexdigest()
+        try:
+            linea = contenido.decode("utf-8")
+        except UnicodeDecodeError as e:
+            raise ErrorCarga("codificacion", str(e), stat, hash_contenido)
+
+        # Asumimos el formato de tu scraper: fecha;titulo;cuerpo;fecha_extraccion
+        campos = parsear_noticia(linea)
+        if campos is None:
+            return None, stat, hash_contenido
+
+        ruta = ruta_relativa(path, self.base_path)
+        registro = {
+            # Los .txt del scraper no guardan la URL, pero su nombre lleva el hash de la URL
+            # canónica: el id sale de la ruta, así que editar el texto no lo cambia
+            "id": id_estable(ruta),
+            "filename": os.path.basename(path),
+            "titulo": campos["titulo"],
+            "cuerpo": campos["cuerpo"],
+            # Unimos título y cuerpo para una mejor recomendación
+            "contenido_completo": f"{campos['titulo']}. {campos['cuerpo']}",
+            "categoria": os.path.basename(os.path.dirname(os.path.dirname(path))), # Intentar sacar categoria del path
+            "fecha": campos["fecha"],
+            "fecha_extraccion": campos["fecha_extraccion"],
+            "ruta": ruta,
+        }
+        return registro, stat, hash_contenido
+
+    def _resultado(self, path, futuro):
+        """Recoge una lectura: registra manifiesto o error y devuelve el registro (o None)."""
+        try:
+            registro, stat, hash_contenido = futuro.result()
+        except ErrorCarga as e:
+            ruta = ruta_relativa(path, self.base_path)
+            self.errores.append({"ruta": ruta, "tipo": e.tipo, "mensaje": str(e)})
+            if e.stat is not None:
+                self.manifiesto.registrar(ruta, e.stat.st_size, e.stat.st_mtime, e.hash_contenido, e.tipo)
+            return None
+        ruta = ruta_relativa(path, self.base_path)
+        # También se registran los archivos con formato inválido, para no releerlos si no cambian
+        self.manifiesto.registrar(ruta, stat.st_size, stat.st_mtime, hash_contenido,
+                                  "formato" if registro is None else None)
+        if registro is None:
+            self.errores.append({
+                "ruta": ruta,
+                "tipo": "formato",
+                "mensaje": "la línea no tiene el formato fecha;titulo;cuerpo;fecha_extraccion",
+            })
+        return registro
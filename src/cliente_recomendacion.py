@@ -0,0 +1,118 @@
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+import pandas as pd
+
+TIMEOUT_CLIENTE = 10
+TAM_PAGINA_CLIENTE = 1000
+
+
+class ErrorServicio(Exception):
+    """El servicio respondió con un error (estado HTTP y mensaje)."""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(f"{estado}: {mensaje}")
+        self.estado = estado
+
+
+class ClienteRecomendacion:
+    """
+    Cliente del servicio de recomendación (ver servicio_recomendacion) con la misma
+    interfaz de consulta que MotorRecomendacion, para que la app pueda usar
+    indistintamente el motor en proceso o el servicio remoto.
+    """
+
+    def __init__(self, url_base, timeout=TIMEOUT_CLIENTE):
+        """:param url_base: p. ej. 'http://127.0.0.1:8000'"""
+        self.url_base = url_base.rstrip("/")
+        self.timeout = timeout
+        self._df = None
+
+    def _pedir(self, ruta, parametros=None, cuerpo=None):
+        url = self.url_base + ruta
+        if parametros:
+            url += "?" + urllib.parse.urlencode({k: v for k, v in parametros.items() if v is not None})
+        datos = json.dumps(cuerpo).encode("utf-8") if cuerpo is not None else None
+        peticion = urllib.request.Request(url, data=datos, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(peticion, timeout=self.timeout) as respuesta:
+                return json.loads(respuesta.read())
+        except urllib.error.HTTPError as e:
+            try:
+                mensaje = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                mensaje = e.reason
+            raise ErrorServicio(e.code, mensaje)
+
+    def salud(self):
+        return self._pedir("/health")
+
+    @staticmethod
+    def _filtros(categorias=None, desde=None, hasta=None):
+        """Filtros de recomendación como parámetros del servicio (fechas en ISO)."""
+        if isinstance(categorias, str):
+            categorias = [categorias]
+        return {
+            "categorias": ",".join(categorias) if categorias else None,
+            "desde": desde.isoformat()[:10] if hasattr(desde, "isoformat") else desde,
+            "hasta": hasta.isoformat()[:10] if hasattr(hasta, "isoformat") else hasta,
+        }
+
+    def recomendar_por_texto(self, query, metodo='tfidf', top_n=5, *, categorias=None, desde=None, hasta=None):
+        parametros = dict({"q": query, "metodo": metodo, "top_n": top_n}, **self._filtros(categorias, desde, hasta))
+        return self._pedir("/recommend/text", parametros)["resultados"]
+
+    def recomendar_por_noticia(self, id_noticia, metodo='tfidf', top_n=5, *, categorias=None, desde=None, hasta=None):
+        """Como en el motor, un id que no existe devuelve []."""
+        parametros = dict({"metodo": metodo, "top_n": top_n}, **self._filtros(categorias, desde, hasta))
+        try:
+            return self._pedir(f"/recommend/item/{int(id_noticia)}", parametros)["resultados"]
+        except ErrorServicio as e:
+            if e.estado == 404:
+                return []
+            raise
+
+    def recomendar_lote(self, queries=(), ids=(), metodo='tfidf', top_n=5, *, categorias=None, desde=None, hasta=None):
+        """:return: dict con 'queries' y/o 'ids': una lista de resultados por entrada"""
+        cuerpo = {"queries": list(queries), "ids": [int(i) for i in ids], "metodo": metodo, "top_n": top_n}
+        cuerpo.update({k: v for k, v in self._filtros(categorias, desde, hasta).items() if v is not None})
+        return self._pedir("/recommend/batch", cuerpo=cuerpo)
+
+    def facetas(self):
+        """Como MotorRecomendacion.facetas, con las fechas en ISO."""
+        return self._pedir("/facets")
+
+    def listar_noticias(self, desde=0, limite=50, categoria=None, con_cuerpo=False):
+        respuesta = self._pedir("/articles", {"desde": desde, "limite": limite, "categoria": categoria,
+                                              "cuerpo": int(con_cuerpo)})
+        return respuesta["total"], respuesta["noticias"]
+
+    def buscar_noticias(self, texto, desde=0, limite=50, con_cuerpo=False):
+        respuesta = self._pedir("/articles", {"q": texto, "desde": desde, "limite": limite, "cuerpo": int(con_cuerpo)})
+        return respuesta["total"], respuesta["noticias"]
+
+    def obtener_noticia(self, id_noticia):
+        try:
+            return self._pedir(f"/articles/{int(id_noticia)}")
+        except ErrorServicio as e:
+            if e.estado == 404:
+                return None
+            raise
+
+    @property
+    def df(self):
+        """Todas las noticias del servicio (con cuerpo) en un DataFrame, descargadas la primera vez."""
+        if self._df is None:
+            filas = []
+            total = None
+            while total is None or len(filas) < total:
+                total, pagina = self.listar_noticias(len(filas), TAM_PAGINA_CLIENTE, con_cuerpo=True)
+                if not pagina:
+                    break
+                filas.extend(pagina)
+            df = pd.DataFrame(filas)
+            if not df.empty:
+                df['contenido_completo'] = df['titulo'] + ". " + df['cuerpo']
+            self._df = df
+        return self._df
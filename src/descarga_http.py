@@ -0,0 +1,371 @@
+import os
+import sys
+import time
+import asyncio
+import datetime
+import urllib.error
+import urllib.request
+from html.parser import HTMLParser
+from motor_scraping import (
+    SITIOS, SELENIUM_AVAILABLE, PETICIONES_POR_HOST, TIMEOUT_PAGINA,
+    LimitadorHost, MotorScraping, ServidorFixtures, guardar_noticia,
+)
+from estado_crawl import canonicalizar_url
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Descargas simultáneas por defecto (conexiones abiertas a la vez)
+CONCURRENCIA_HTTP = 16
+# Cabeceras de las peticiones (algunas webs rechazan el User-Agent por defecto de las librerías)
+CABECERAS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/120.0 Safari/537.36 Edg/120.0",
+    "Accept-Language": "es-ES,es;q=0.9",
+}
+
+# Etiquetas HTML sin cierre y etiquetas cuyo texto no se muestra
+ETIQUETAS_VACIAS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source", "track", "wbr"}
+ETIQUETAS_SIN_TEXTO = {"script", "style", "noscript", "template"}
+
+
+class NodoHTML:
+    """Elemento de un árbol HTML mínimo: etiqueta, clases y contenido (texto y nodos hijos)."""
+
+    def __init__(self, etiqueta, clases=(), padre=None):
+        self.etiqueta = etiqueta
+        self.clases = set(clases)
+        self.padre = padre
+        self.contenido = []
+
+    def hijos(self):
+        return [parte for parte in self.contenido if isinstance(parte, NodoHTML)]
+
+    def descendientes(self):
+        for hijo in self.hijos():
+            yield hijo
+            yield from hijo.descendientes()
+
+    def buscar(self, selector):
+        """Descendientes que cumplen un selector CSS simple 'etiqueta.clase1.clase2', en orden del documento."""
+        etiqueta, *clases = selector.split(".")
+        return [
+            nodo for nodo in self.descendientes()
+            if (not etiqueta or nodo.etiqueta == etiqueta) and set(clases) <= nodo.clases
+        ]
+
+    def parrafos_simples(self):
+        """Hijos <p> directos sin elementos dentro (el XPath './p[not(*)]' de scraping.py)."""
+        return [hijo for hijo in self.hijos() if hijo.etiqueta == "p" and not hijo.hijos()]
+
+    def texto(self):
+        """Texto visible del elemento, con los espacios normalizados (como .text de Selenium)."""
+        partes = []
+        pila = [self]
+        while pila:
+            parte = pila.pop()
+            if isinstance(parte, str):
+                partes.append(parte)
+            elif parte.etiqueta not in ETIQUETAS_SIN_TEXTO:
+                pila.extend(reversed(parte.contenido))
+        return " ".join("".join(partes).split())
+
+
+class ParserHTML(HTMLParser):
+    """
+    Construye el árbol de NodoHTML de una página (tolerante con etiquetas sin cerrar).
+    También guarda la URL de <link rel="canonical"> si la hay.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.raiz = NodoHTML("documento")
+        self.canonica = None
+        self._actual = self.raiz
+
+    def handle_starttag(self, tag, attrs):
+        atributos = dict(attrs)
+        if tag == "link" and (atributos.get("rel") or "").lower() == "canonical" and atributos.get("href"):
+            self.canonica = atributos["href"]
+        clases = (atributos.get("class") or "").split()
+        nodo = NodoHTML(tag, clases, self._actual)
+        self._actual.contenido.append(nodo)
+        if tag not in ETIQUETAS_VACIAS:
+            self._actual = nodo
+
+    def handle_startendtag(self, tag, attrs):
+        # <x/>: se trata como apertura de una etiqueta vacía
+        self.handle_starttag(tag, attrs)
+        if tag not in ETIQUETAS_VACIAS:
+            self._actual = self._actual.padre
+
+    def handle_endtag(self, tag):
+        # Cerramos hasta el antecesor con esa etiqueta; un cierre sin apertura se ignora
+        nodo = self._actual
+        while nodo is not self.raiz and nodo.etiqueta != tag:
+            nodo = nodo.padre
+        if nodo is not self.raiz:
+            self._actual = nodo.padre
+
+    def handle_data(self, data):
+        self._actual.contenido.append(data)
+
+
+def parsear_html(html):
+    """:return: (raíz del árbol, URL canónica declarada en la página o None)"""
+    parser = ParserHTML()
+    parser.feed(html)
+    parser.close()
+    return parser.raiz, parser.canonica
+
+
+def extraer_html(html):
+    """
+    Extrae una noticia del HTML con los mismos selectores que el scraping con Selenium.
+    :return: dict con sitio, fecha, titulo, cuerpo, fecha_extraccion y canonica (URL de
+             <link rel="canonical"> o None), o None si la página no trae título o cuerpo
+             en el HTML (p. ej. se renderiza con JavaScript)
+    """
+    raiz, canonica = parsear_html(html)
+    for nombre_sitio, sitio in SITIOS.items():
+        titulos = raiz.buscar(sitio["titulo"])
+        if titulos and titulos[0].texto():
+            break
+    else:
+        return None
+
+    cuerpos = raiz.buscar(sitio["cuerpo"])
+    if not cuerpos:
+        return None
+    if sitio["parrafos"]:
+        cuerpo = " | ".join(t for t in (p.texto() for p in cuerpos[0].parrafos_simples()) if t)
+    else:
+        cuerpo = cuerpos[0].texto()
+    if not cuerpo:
+        return None
+
+    fechas = raiz.buscar(sitio["fecha"])
+    return {
+        "sitio": nombre_sitio,
+        "fecha": fechas[0].texto() if fechas else sitio["sin_fecha"],
+        "titulo": titulos[0].texto(),
+        "cuerpo": cuerpo,
+        "fecha_extraccion": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "canonica": canonica,
+    }
+
+
+class DescargadorHTTP:
+    """
+    Descarga noticias con peticiones HTTP asíncronas (sin navegador) y las extrae del
+    HTML con los selectores de SITIOS. Solo las páginas de las que no se saca nada
+    (contenido generado con JavaScript, respuestas raras...) pasan al MotorScraping de Selenium.
+    Con aiohttp las conexiones se reutilizan (pool por host); sin él se usa urllib en hilos.
+    Con un EstadoCrawl las URLs ya descargadas se piden de forma condicional (ETag /
+    Last-Modified), las URLs duplicadas (misma URL canónica) se saltan y solo se escriben
+    las noticias nuevas o que han cambiado.
+    """
+
+    def __init__(self, concurrencia=CONCURRENCIA_HTTP, peticiones_por_host=PETICIONES_POR_HOST,
+                 timeout=TIMEOUT_PAGINA, motor_selenium=None, usar_selenium=True, estado_crawl=None):
+        """
+        :param concurrencia: Descargas simultáneas
+        :param peticiones_por_host: Máximo de peticiones por segundo a cada host (None = sin límite)
+        :param motor_selenium: MotorScraping para las páginas que no se pueden extraer del HTML
+                               (por defecto uno nuevo, si Selenium está instalado)
+        :param usar_selenium: False para no recurrir nunca al navegador
+        :param estado_crawl: EstadoCrawl con las descargas anteriores (opcional)
+        """
+        self.concurrencia = concurrencia
+        self.limitador = LimitadorHost(peticiones_por_host)
+        self.peticiones_por_host = peticiones_por_host
+        self.timeout = timeout
+        self.motor_selenium = motor_selenium
+        self.usar_selenium = usar_selenium
+        self.estado_crawl = estado_crawl
+        self.errores = []
+        self.documentos = []
+
+    def ejecutar(self, trabajos):
+        """
+        Descarga y guarda todas las noticias.
+        :param trabajos: Iterable de (url, carpeta de destino), como en MotorScraping
+        :return: dict con paginas, guardadas, sin_cambios, duplicadas, con_selenium, errores,
+                 segundos, paginas_por_segundo y documentos (archivos escritos: las noticias
+                 nuevas o modificadas, que son las que hay que pasar a la ingesta del motor)
+        """
+        self.errores = []
+        self.documentos = []
+        self._sin_cambios = 0
+        self._duplicadas = 0
+        self._pendientes = []
+        trabajos, duplicadas = self._quitar_duplicadas(trabajos)
+        inicio = time.perf_counter()
+        if trabajos:
+            asyncio.run(self._ejecutar(trabajos))
+
+        con_selenium = len(self._pendientes)
+        if self._pendientes:
+            motor = self._motor_selenium()
+            if motor is None:
+                for url, _ in self._pendientes:
+                    self.errores.append({"url": url, "mensaje": "no se pudo extraer del HTML y Selenium no está disponible"})
+            else:
+                print(f"{con_selenium} páginas sin contenido en el HTML: se procesan con Selenium")
+                estadisticas = motor.ejecutar(self._pendientes)
+                self.documentos.extend(estadisticas["documentos"])
+                self.errores.extend(motor.errores)
+        segundos = time.perf_counter() - inicio
+
+        estadisticas = {
+            "paginas": len(trabajos),
+            "guardadas": len(self.documentos),
+            "sin_cambios": self._sin_cambios,
+            "duplicadas": duplicadas + self._duplicadas,
+            "con_selenium": con_selenium,
+            "errores": len(self.errores),
+            "segundos": segundos,
+            "paginas_por_segundo": len(trabajos) / segundos if segundos > 0 else 0.0,
+            "documentos": list(self.documentos),
+        }
+        print(f"Descarga terminada: {len(trabajos)} páginas en {segundos:.1f}s "
+              f"({estadisticas['paginas_por_segundo']:.2f} páginas/s, {len(self.documentos)} nuevas o modificadas, "
+              f"{self._sin_cambios} sin cambios, {con_selenium} con Selenium, {len(self.errores)} errores)")
+        return estadisticas
+
+    def _quitar_duplicadas(self, trabajos):
+        """
+        Quita los trabajos cuya URL canónica ya está en la lista o pertenece a otra URL del
+        estado, y vacía las canónicas declaradas por las páginas (<link rel=canonical>) en
+        esta ejecución: dos URLs de la lista pueden declarar la misma y el estado no lo sabe
+        hasta que una se registra.
+        """
+        self._canonicas_pagina = set()
+        unicos, vistas, duplicadas = [], set(), 0
+        for url, carpeta in trabajos:
+            canonica = canonicalizar_url(url)
+            if canonica in vistas or (self.estado_crawl is not None and self.estado_crawl.es_duplicada(url, canonica)):
+                duplicadas += 1
+                continue
+            vistas.add(canonica)
+            unicos.append((url, carpeta))
+        return unicos, duplicadas
+
+    def _motor_selenium(self):
+        if not self.usar_selenium:
+            return None
+        if self.motor_selenium is None and SELENIUM_AVAILABLE:
+            self.motor_selenium = MotorScraping(
+                peticiones_por_host=self.peticiones_por_host, timeout=self.timeout, estado_crawl=self.estado_crawl
+            )
+        return self.motor_selenium
+
+    async def _ejecutar(self, trabajos):
+        cola = asyncio.Queue()
+        for trabajo in trabajos:
+            cola.put_nowait(trabajo)
+        n_workers = min(self.concurrencia, len(trabajos))
+        if AIOHTTP_AVAILABLE:
+            conector = aiohttp.TCPConnector(limit=self.concurrencia)
+            tiempo = aiohttp.ClientTimeout(total=self.timeout)
+            async with aiohttp.ClientSession(connector=conector, timeout=tiempo, headers=CABECERAS) as sesion:
+                await asyncio.gather(*[self._worker(cola, sesion) for _ in range(n_workers)])
+        else:
+            await asyncio.gather(*[self._worker(cola, None) for _ in range(n_workers)])
+
+    async def _worker(self, cola, sesion):
+        while not cola.empty():
+            url, carpeta = cola.get_nowait()
+            cabeceras = self.estado_crawl.cabeceras_condicionales(url) if self.estado_crawl is not None else {}
+            try:
+                espera = self.limitador.reservar(url)
+                if espera > 0:
+                    await asyncio.sleep(espera)
+                estado_http, html, etag, last_modified = await self._descargar(sesion, url, cabeceras)
+            except Exception as e:
+                mensaje = str(e) or type(e).__name__
+                self.errores.append({"url": url, "mensaje": mensaje})
+                if self.estado_crawl is not None:
+                    self.estado_crawl.registrar(url, estado_http=getattr(e, "status", getattr(e, "code", None)), error=mensaje)
+                print(f"Error descargando noticia {url}: {e}")
+                continue
+
+            if estado_http == 304:
+                # No ha cambiado desde la última descarga: ni se extrae ni se escribe
+                self.estado_crawl.registrar(url, estado_http=304)
+                self._sin_cambios += 1
+                continue
+
+            noticia = extraer_html(html)
+            if noticia is None:
+                self._pendientes.append((url, carpeta))
+                continue
+            canonica = canonicalizar_url(noticia["canonica"]) if noticia["canonica"] else None
+            if canonica is not None and (
+                canonica in self._canonicas_pagina
+                or (self.estado_crawl is not None and self.estado_crawl.es_duplicada(url, canonica))
+            ):
+                self._duplicadas += 1
+                continue
+            if canonica is not None:
+                self._canonicas_pagina.add(canonica)
+            noticia_path = guardar_noticia(
+                noticia, carpeta, url, self.estado_crawl,
+                estado_http=estado_http, url_canonica=canonica, etag=etag, last_modified=last_modified,
+            )
+            if noticia_path is None:
+                self._sin_cambios += 1
+                continue
+            self.documentos.append(noticia_path)
+            print(f"Guardada noticia: {noticia_path}")
+
+    async def _descargar(self, sesion, url, cabeceras):
+        """:return: (estado HTTP, html, ETag, Last-Modified); con 304 el html es None"""
+        if sesion is not None:
+            async with sesion.get(url, headers=cabeceras) as respuesta:
+                if respuesta.status == 304:
+                    return 304, None, None, None
+                respuesta.raise_for_status()
+                html = await respuesta.text()
+                return respuesta.status, html, respuesta.headers.get("ETag"), respuesta.headers.get("Last-Modified")
+        return await asyncio.to_thread(self._descargar_urllib, url, cabeceras)
+
+    def _descargar_urllib(self, url, cabeceras):
+        peticion = urllib.request.Request(url, headers={**CABECERAS, **cabeceras})
+        try:
+            with urllib.request.urlopen(peticion, timeout=self.timeout) as respuesta:
+                charset = respuesta.headers.get_content_charset() or "utf-8"
+                html = respuesta.read().decode(charset, errors="replace")
+                return respuesta.status, html, respuesta.headers.get("ETag"), respuesta.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, None, None, None
+            raise
+
+
+# --- PRUEBA CON FIXTURES (USO: python src/descarga_http.py [n_paginas | carpeta_con_html]) ---
+if __name__ == "__main__":
+    import tempfile
+    from estado_crawl import EstadoCrawl
+    argumento = sys.argv[1] if len(sys.argv) > 1 else "50"
+    if os.path.isdir(argumento):
+        servidor = ServidorFixtures(directorio=argumento)
+    else:
+        servidor = ServidorFixtures(int(argumento))
+    with servidor, tempfile.TemporaryDirectory() as destino:
+        estado = EstadoCrawl(os.path.join(destino, "estado_crawl.sqlite"))
+        trabajos = [(url, destino) for url in servidor.urls()]
+        descargador = DescargadorHTTP(peticiones_por_host=None, estado_crawl=estado)
+        primera = descargador.ejecutar(trabajos)
+        # Segunda pasada: todo sin cambios (304), salvo la noticia cuyo archivo se ha borrado
+        borrada = primera["documentos"][0] if primera["documentos"] else None
+        if borrada is not None:
+            os.remove(borrada)
+        segunda = descargador.ejecutar(trabajos)
+        if borrada is not None:
+            print(f"Archivo borrado reescrito: {os.path.exists(borrada)} "
+                  f"({segunda['guardadas']} guardadas, {segunda['sin_cambios']} sin cambios)")
+        estado.cerrar()
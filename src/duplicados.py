@@ -0,0 +1,198 @@
+import zlib
+import numpy as np
+
+# Parámetros por defecto del detector: 64 permutaciones en 16 bandas de 4 filas.
+# Con ellos, dos textos con Jaccard 0.8 caen en la misma cubeta en alguna banda con
+# probabilidad ~1 - (1 - 0.8^4)^16 > 0.999, y con Jaccard 0.3 solo ~12%.
+N_PERMUTACIONES = 64
+N_BANDAS = 16
+UMBRAL_DUPLICADO = 0.8
+TAM_SHINGLE = 3
+
+
+def shingles(texto, tam=TAM_SHINGLE):
+    """Conjunto de n-gramas de palabras del texto, como enteros de 32 bits (crc32, estables entre ejecuciones)."""
+    palabras = texto.split()
+    if len(palabras) < tam:
+        gramas = {" ".join(palabras)} if palabras else set()
+    else:
+        gramas = {" ".join(palabras[i:i + tam]) for i in range(len(palabras) - tam + 1)}
+    return np.array(sorted(zlib.crc32(g.encode("utf-8")) for g in gramas), dtype=np.uint64)
+
+
+class DetectorDuplicados:
+    """
+    Detector incremental de noticias casi duplicadas con MinHash + LSH.
+    Cada texto se resume en una firma MinHash (estimador de Jaccard entre sus n-gramas)
+    y se reparte en cubetas por bandas de la firma: solo se comparan las noticias que
+    comparten alguna cubeta, así que añadir una noticia no recorre el corpus entero.
+    Las noticias con Jaccard estimado >= umbral quedan en el mismo grupo; el grupo se
+    identifica por el id de su noticia más antigua.
+    """
+
+    def __init__(self, n_permutaciones=N_PERMUTACIONES, n_bandas=N_BANDAS, umbral=UMBRAL_DUPLICADO,
+                 tam_shingle=TAM_SHINGLE, semilla=0):
+        """
+        :param n_permutaciones: Longitud de la firma MinHash
+        :param n_bandas: Bandas del LSH (tiene que dividir a n_permutaciones)
+        :param umbral: Jaccard estimado mínimo para considerar dos noticias duplicadas
+        :param tam_shingle: Palabras por n-grama
+        """
+        if n_permutaciones % n_bandas:
+            raise ValueError("n_bandas tiene que dividir a n_permutaciones")
+        self.n_permutaciones = n_permutaciones
+        self.n_bandas = n_bandas
+        self.umbral = umbral
+        self.tam_shingle = tam_shingle
+        self.semilla = semilla
+        # Familia de hashes h(x) = (a*x + b) >> 32 en aritmética de 64 bits (a impar)
+        rng = np.random.default_rng(semilla)
+        self._a = rng.integers(1, 2 ** 63, size=n_permutaciones, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=n_permutaciones, dtype=np.uint64)
+
+        self.firmas = {}        # id -> firma (uint32); sin entrada si el texto está vacío
+        self._orden = {}        # id -> orden de llegada
+        self._grupo = {}        # id -> id representante de su grupo
+        self._miembros = {}     # representante -> set de ids
+        self._cubetas = [{} for _ in range(n_bandas)]
+        self._contador = 0
+
+    def parametros(self):
+        return {
+            "n_permutaciones": self.n_permutaciones,
+            "n_bandas": self.n_bandas,
+            "umbral": self.umbral,
+            "tam_shingle": self.tam_shingle,
+            "semilla": self.semilla,
+        }
+
+    def firma(self, texto):
+        """Firma MinHash del texto (None si no tiene palabras)."""
+        valores = shingles(texto, self.tam_shingle)
+        if len(valores) == 0:
+            return None
+        with np.errstate(over="ignore"):
+            hashes = (self._a[:, None] * valores[None, :] + self._b[:, None]) >> np.uint64(32)
+        return hashes.min(axis=1).astype(np.uint32)
+
+    def agregar(self, id_noticia, texto):
+        """
+        Añade una noticia (si el id ya estaba, se reemplaza).
+        :return: Id del grupo en el que queda la noticia
+        """
+        if id_noticia in self._grupo:
+            self.eliminar(id_noticia)
+        self._orden[id_noticia] = self._contador
+        self._contador += 1
+        self._grupo[id_noticia] = id_noticia
+        self._miembros[id_noticia] = {id_noticia}
+
+        firma = self.firma(texto)
+        if firma is None:
+            return id_noticia
+        self.firmas[id_noticia] = firma
+        candidatas = set()
+        for banda, clave in enumerate(self._claves_bandas(firma)):
+            cubeta = self._cubetas[banda].setdefault(clave, set())
+            candidatas.update(cubeta)
+            cubeta.add(id_noticia)
+        for otra in candidatas:
+            if self.similitud(firma, self.firmas[otra]) >= self.umbral:
+                self._unir(id_noticia, otra)
+        return self._grupo[id_noticia]
+
+    def agregar_lote(self, ids, textos):
+        """Añade varias noticias en orden. :return: Lista con el grupo de cada una al terminar"""
+        for id_noticia, texto in zip(ids, textos):
+            self.agregar(id_noticia, texto)
+        return [self._grupo[id_noticia] for id_noticia in ids]
+
+    def eliminar(self, id_noticia):
+        """Quita una noticia. Su grupo se vuelve a partir si ella era el nexo entre otras."""
+        if id_noticia not in self._grupo:
+            return
+        firma = self.firmas.pop(id_noticia, None)
+        if firma is not None:
+            for banda, clave in enumerate(self._claves_bandas(firma)):
+                cubeta = self._cubetas[banda][clave]
+                cubeta.discard(id_noticia)
+                if not cubeta:
+                    del self._cubetas[banda][clave]
+
+        representante = self._grupo.pop(id_noticia)
+        del self._orden[id_noticia]
+        restantes = self._miembros.pop(representante) - {id_noticia}
+        if restantes:
+            self._reagrupar(restantes)
+
+    def grupo(self, id_noticia):
+        """Id del grupo de la noticia (una noticia que el detector no conoce es su propio grupo)."""
+        return self._grupo.get(id_noticia, id_noticia)
+
+    def grupos(self):
+        """Grupos con más de una noticia: {representante: [ids]}."""
+        return {rep: sorted(miembros, key=self._orden.get) for rep, miembros in self._miembros.items() if len(miembros) > 1}
+
+    def n_repetidas(self):
+        """Noticias que sobran si se deja una por grupo."""
+        return len(self._grupo) - len(self._miembros)
+
+    def similitud(self, firma_a, firma_b):
+        """Jaccard estimado: fracción de posiciones iguales en las firmas."""
+        return float(np.mean(firma_a == firma_b))
+
+    def guardar(self, path):
+        ids = np.array(sorted(self._orden, key=self._orden.get), dtype=np.int64)
+        firmas = np.zeros((len(ids), self.n_permutaciones), dtype=np.uint32)
+        con_firma = np.zeros(len(ids), dtype=bool)
+        for i, id_noticia in enumerate(ids.tolist()):
+            if id_noticia in self.firmas:
+                firmas[i] = self.firmas[id_noticia]
+                con_firma[i] = True
+        np.save(path + "_ids.npy", ids)
+        np.save(path + "_firmas.npy", firmas)
+        np.save(path + "_con_firma.npy", con_firma)
+        np.save(path + "_grupos.npy", np.array([self._grupo[i] for i in ids.tolist()], dtype=np.int64))
+
+    def cargar(self, path):
+        """Restaura firmas, cubetas y grupos guardados con guardar() (sin recalcular firmas)."""
+        ids = np.load(path + "_ids.npy").tolist()
+        firmas = np.load(path + "_firmas.npy")
+        con_firma = np.load(path + "_con_firma.npy")
+        grupos = np.load(path + "_grupos.npy").tolist()
+        for i, (id_noticia, representante) in enumerate(zip(ids, grupos)):
+            self._orden[id_noticia] = i
+            self._grupo[id_noticia] = representante
+            self._miembros.setdefault(representante, set()).add(id_noticia)
+            if con_firma[i]:
+                self.firmas[id_noticia] = firmas[i]
+                for banda, clave in enumerate(self._claves_bandas(firmas[i])):
+                    self._cubetas[banda].setdefault(clave, set()).add(id_noticia)
+        self._contador = len(ids)
+
+    def _claves_bandas(self, firma):
+        filas = self.n_permutaciones // self.n_bandas
+        return [firma[b * filas:(b + 1) * filas].tobytes() for b in range(self.n_bandas)]
+
+    def _unir(self, id_a, id_b):
+        grupo_a, grupo_b = self._grupo[id_a], self._grupo[id_b]
+        if grupo_a == grupo_b:
+            return
+        # El grupo conserva como representante la noticia más antigua
+        if self._orden[grupo_b] < self._orden[grupo_a]:
+            grupo_a, grupo_b = grupo_b, grupo_a
+        for miembro in self._miembros.pop(grupo_b):
+            self._grupo[miembro] = grupo_a
+            self._miembros[grupo_a].add(miembro)
+
+    def _reagrupar(self, ids):
+        """Recalcula los grupos de un conjunto de noticias comparándolas entre sí (grupos pequeños)."""
+        for id_noticia in ids:
+            self._grupo[id_noticia] = id_noticia
+            self._miembros[id_noticia] = {id_noticia}
+        ordenados = sorted(ids, key=self._orden.get)
+        for i, id_a in enumerate(ordenados):
+            for id_b in ordenados[i + 1:]:
+                if id_a in self.firmas and id_b in self.firmas \
+                        and self.similitud(self.firmas[id_a], self.firmas[id_b]) >= self.umbral:
+                    self._unir(id_a, id_b)
@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import hashlib
+import datetime
+import threading
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Parámetros de seguimiento que no cambian la página (se quitan al canonicalizar, junto con los utm_*)
+PARAMETROS_SEGUIMIENTO = {"fbclid", "gclid", "mc_cid", "mc_eid", "ref"}
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    url_canonica TEXT NOT NULL,
+    hash TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fecha_descarga TEXT,
+    estado INTEGER,
+    error TEXT,
+    ruta TEXT
+);
+CREATE INDEX IF NOT EXISTS urls_canonica ON urls (url_canonica);
+"""
+
+
+def canonicalizar_url(url):
+    """
+    Forma canónica de una URL para detectar duplicados: esquema y host en minúsculas,
+    sin puerto por defecto, sin fragmento, sin parámetros de seguimiento y con la query ordenada.
+    """
+    partes = urlsplit(url.strip())
+    esquema = partes.scheme.lower()
+    host = (partes.hostname or "").lower()
+    if partes.port and (esquema, partes.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{partes.port}"
+    query = sorted(
+        (clave, valor) for clave, valor in parse_qsl(partes.query, keep_blank_values=True)
+        if not clave.startswith("utm_") and clave not in PARAMETROS_SEGUIMIENTO
+    )
+    return urlunsplit((esquema, host, partes.path or "/", urlencode(query), ""))
+
+
+def hash_noticia(noticia):
+    """Hash de los campos de una noticia (sin la fecha de extracción, que cambia en cada descarga)."""
+    contenido = "\n".join((noticia["fecha"], noticia["titulo"], noticia["cuerpo"]))
+    return hashlib.sha1(contenido.encode("utf-8")).hexdigest()
+
+
+class EstadoCrawl:
+    """
+    Estado persistente del crawl (SQLite): por cada URL, su URL canónica, el hash del
+    contenido extraído, ETag/Last-Modified, cuándo se descargó, el estado HTTP y el
+    archivo donde se guardó. Con él los scrapers hacen peticiones condicionales, no
+    descargan dos veces la misma noticia con URLs distintas y solo escriben (y pasan
+    a la ingesta) las noticias nuevas o que han cambiado.
+    Se puede usar desde varios hilos a la vez.
+    """
+
+    def __init__(self, path):
+        """:param path: Archivo SQLite (se crea si no existe)"""
+        self.path = path
+        self._conexion = sqlite3.connect(path, check_same_thread=False)
+        self._conexion.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conexion.executescript(ESQUEMA)
+            self._conexion.commit()
+
+    def obtener(self, url):
+        """Estado guardado de una URL (dict) o None si nunca se ha descargado."""
+        with self._lock:
+            fila = self._conexion.execute("SELECT * FROM urls WHERE url = ?", (url,)).fetchone()
+        return dict(fila) if fila is not None else None
+
+    def url_de_canonica(self, url_canonica):
+        """URL ya registrada con esa URL canónica (o None)."""
+        with self._lock:
+            fila = self._conexion.execute(
+                "SELECT url FROM urls WHERE url_canonica = ? ORDER BY rowid LIMIT 1", (url_canonica,)
+            ).fetchone()
+        return fila["url"] if fila is not None else None
+
+    def es_duplicada(self, url, url_canonica=None):
+        """True si otra URL distinta ya ocupa la misma URL canónica."""
+        otra = self.url_de_canonica(url_canonica or canonicalizar_url(url))
+        return otra is not None and otra != url
+
+    def cabeceras_condicionales(self, url):
+        """
+        Cabeceras If-None-Match / If-Modified-Since para volver a pedir una URL ya descargada.
+        Si se ha borrado el archivo donde se guardó, no hay cabeceras: un 304 haría que no
+        se volviera a escribir nunca.
+        """
+        estado = self.obtener(url)
+        cabeceras = {}
+        if estado is not None and estado["ruta"] is not None and not os.path.exists(estado["ruta"]):
+            return cabeceras
+        if estado is not None and estado["hash"] is not None:
+            if estado["etag"]:
+                cabeceras["If-None-Match"] = estado["etag"]
+            if estado["last_modified"]:
+                cabeceras["If-Modified-Since"] = estado["last_modified"]
+        return cabeceras
+
+    def ha_cambiado(self, url, hash_contenido):
+        """
+        True si la noticia es nueva, su contenido es distinto del de la última descarga
+        o ya no está el archivo donde se guardó.
+        """
+        estado = self.obtener(url)
+        if estado is None or estado["hash"] != hash_contenido:
+            return True
+        return estado["ruta"] is not None and not os.path.exists(estado["ruta"])
+
+    def registrar(self, url, estado_http=None, url_canonica=None, hash_contenido=None,
+                  etag=None, last_modified=None, ruta=None, error=None):
+        """
+        Guarda el resultado de una descarga. Los campos que lleguen como None conservan
+        su valor anterior (p. ej. una respuesta 304 no trae contenido ni hash).
+        """
+        ahora = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self._lock:
+            self._conexion.execute(
+                """
+                INSERT INTO urls (url, url_canonica, hash, etag, last_modified, fecha_descarga, estado, error, ruta)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    url_canonica = COALESCE(?, url_canonica),
+                    hash = COALESCE(excluded.hash, hash),
+                    etag = COALESCE(excluded.etag, etag),
+                    last_modified = COALESCE(excluded.last_modified, last_modified),
+                    fecha_descarga = excluded.fecha_descarga,
+                    estado = excluded.estado,
+                    error = excluded.error,
+                    ruta = COALESCE(excluded.ruta, ruta)
+                """,
+                (url, url_canonica or canonicalizar_url(url), hash_contenido, etag, last_modified,
+                 ahora, estado_http, error, ruta, url_canonica),
+            )
+            self._conexion.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def __contains__(self, url):
+        return self.obtener(url) is not None
+
+    def cerrar(self):
+        with self._lock:
+            self._conexion.close()
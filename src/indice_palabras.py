@@ -0,0 +1,113 @@
+import heapq
+import bisect
+import unicodedata
+from collections import Counter
+import numpy as np
+
+# Términos del vocabulario en los que se expande como mucho el prefijo de una búsqueda
+# (los de más documentos); acota el coste de prefijos muy cortos como "a"
+MAX_EXPANSIONES_PREFIJO = 64
+
+
+def plegar_acentos(texto):
+    """Minúsculas y sin diacríticos: 'Economía' -> 'economia', 'España' -> 'espana'."""
+    descompuesto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+class IndicePalabras:
+    """
+    Índice invertido de palabras para buscar noticias por texto. Para cada término
+    (sin acentos) guarda las posiciones de las noticias que lo contienen y su peso
+    (1 + log tf) * idf. Una búsqueda solo recorre las listas de sus términos, así que
+    su coste crece con las coincidencias y no con el tamaño del corpus.
+    """
+
+    def __init__(self, max_expansiones=MAX_EXPANSIONES_PREFIJO):
+        self.max_expansiones = max_expansiones
+        self.n_documentos = 0
+        self._postings = {}       # término -> (posiciones int32 crecientes, pesos float32)
+        self._vocabulario = []    # términos ordenados, para buscar prefijos con bisect
+
+    def construir(self, textos_procesados):
+        """
+        :param textos_procesados: Un texto ya preprocesado (tokens separados por espacios)
+                                  por noticia, en el orden de las posiciones del motor
+        """
+        posiciones = {}
+        frecuencias = {}
+        n = 0
+        for pos, texto in enumerate(textos_procesados):
+            n += 1
+            for termino, tf in Counter(plegar_acentos(texto).split()).items():
+                posiciones.setdefault(termino, []).append(pos)
+                frecuencias.setdefault(termino, []).append(tf)
+
+        self.n_documentos = n
+        self._postings = {}
+        for termino, lista in posiciones.items():
+            idf = np.log(1 + n / len(lista))
+            pesos = (1 + np.log(np.asarray(frecuencias[termino], dtype=np.float32))) * idf
+            self._postings[termino] = (np.asarray(lista, dtype=np.int32), pesos.astype(np.float32))
+        self._vocabulario = sorted(self._postings)
+        return self
+
+    def expandir_prefijo(self, prefijo):
+        """Términos del vocabulario que empiezan por prefijo (los max_expansiones más frecuentes)."""
+        inicio = bisect.bisect_left(self._vocabulario, prefijo)
+        fin = bisect.bisect_left(self._vocabulario, prefijo + "\U0010ffff", lo=inicio)
+        terminos = self._vocabulario[inicio:fin]
+        if len(terminos) > self.max_expansiones:
+            terminos = heapq.nlargest(self.max_expansiones, terminos, key=lambda t: len(self._postings[t][0]))
+        return terminos
+
+    def _coincidencias_prefijo(self, prefijo):
+        """Posiciones con algún término que empieza por prefijo, y el mayor peso de esos términos."""
+        listas = [self._postings[t] for t in self.expandir_prefijo(prefijo)]
+        if not listas:
+            return np.array([], dtype=np.int32), np.array([], dtype=np.float32)
+        if len(listas) == 1:
+            return listas[0]
+        posiciones = np.concatenate([p for p, _ in listas])
+        pesos = np.concatenate([w for _, w in listas])
+        orden = np.lexsort((-pesos, posiciones))
+        posiciones, pesos = posiciones[orden], pesos[orden]
+        primeras = np.flatnonzero(np.r_[True, posiciones[1:] != posiciones[:-1]])
+        return posiciones[primeras], pesos[primeras]
+
+    def buscar(self, terminos, prefijo=None):
+        """
+        Noticias que contienen todos los términos (y, si se indica, alguna palabra que
+        empiece por prefijo), ordenadas por puntuación descendente (empates por posición).
+        Términos y prefijo se comparan sin acentos.
+        :return: (posiciones, puntuaciones) como arrays de numpy
+        """
+        vacio = np.array([], dtype=np.int32), np.array([], dtype=np.float32)
+        listas = []
+        for termino in dict.fromkeys(plegar_acentos(t) for t in terminos):
+            if termino not in self._postings:
+                return vacio
+            listas.append(self._postings[termino])
+        if prefijo:
+            listas.append(self._coincidencias_prefijo(plegar_acentos(prefijo)))
+        if not listas:
+            return vacio
+
+        # Intersección empezando por la lista más corta
+        listas.sort(key=lambda lista: len(lista[0]))
+        posiciones, puntuaciones = listas[0][0], listas[0][1].astype(np.float32)
+        for otras_posiciones, otros_pesos in listas[1:]:
+            if len(posiciones) == 0:
+                break
+            posiciones, i, j = np.intersect1d(posiciones, otras_posiciones, assume_unique=True, return_indices=True)
+            puntuaciones = puntuaciones[i] + otros_pesos[j]
+
+        orden = np.lexsort((posiciones, -puntuaciones))
+        return posiciones[orden], puntuaciones[orden]
+
+    def memoria(self):
+        """Bytes de las listas de posiciones y pesos (sin contar el vocabulario)."""
+        return sum(posiciones.nbytes + pesos.nbytes for posiciones, pesos in self._postings.values())
+
+    def __len__(self):
+        return len(self._postings)
@@ -0,0 +1,566 @@
+import time
+import numpy as np
+
+# Máximo de similitudes (consultas x vectores) que se calculan a la vez
+MAX_ELEMENTOS_BLOQUE = 2 ** 24
+# Tipos en los que se pueden guardar los vectores (ya normalizados) de un índice
+TIPOS_VECTORES = ('float32', 'float16', 'int8')
+# En int8 cada componente (en [-1, 1] por estar normalizado) se guarda como round(x * ESCALA_INT8)
+ESCALA_INT8 = 127
+# Filas de vectores float16/int8 que se pasan a float32 de una vez para compararlas: un
+# bloque pequeño (1024 x 384 float32 = 1.5 MB) se queda en caché y el recorrido de la
+# matriz int8 cuesta lo mismo que el de la float32, leyendo la cuarta parte de memoria
+FILAS_BLOQUE_CONVERSION = 1024
+# Centroides por subespacio de la cuantización por producto (un código uint8 por subespacio)
+CENTROIDES_PQ = 256
+# Candidatos por resultado que el índice cuantizado reordena con los vectores exactos: con
+# 32, recall@10 ~0.98 en PQ y 1.0 en int8 (reordenar 320 filas cuesta muy poco frente al recorrido)
+FACTOR_REORDENACION = 32
+
+
+def top_k(similitudes, k, excluir=None):
+    """
+    Devuelve las posiciones de las k mayores similitudes, de mayor a menor, sin
+    ordenar el array completo (argpartition + orden de los candidatos).
+    Los empates salen siempre con la posición mayor primero (PuntuadorDisperso.buscar
+    cuenta con ello). No es necesariamente el orden de argsort()[::-1], que no es estable.
+    :param excluir: Posición a dejar fuera del resultado (p. ej. la propia noticia)
+    """
+    n = len(similitudes)
+    # Pedimos uno más si hay que excluir una posición, así no hace falta recorrer nada
+    k_busqueda = min(k + (excluir is not None), n)
+    if k_busqueda <= 0:
+        return np.array([], dtype=np.int64)
+
+    if k_busqueda < n:
+        corte = n - k_busqueda
+        umbral = similitudes[np.argpartition(similitudes, corte)[corte]]
+        # Los empates con el umbral entran todos como candidatos, para desempatar por posición
+        candidatos = np.flatnonzero(similitudes >= umbral)
+    else:
+        candidatos = np.arange(n)
+
+    orden = np.lexsort((-candidatos, -similitudes[candidatos]))
+    indices = candidatos[orden]
+    if excluir is not None:
+        indices = indices[indices != excluir]
+    return indices[:k]
+
+
+def posicion_local(posiciones, posicion):
+    """
+    Índice de 'posicion' dentro del array ordenado 'posiciones' (p. ej. las filas que deja
+    pasar un filtro), o None si no está o posicion es None.
+    """
+    if posicion is None:
+        return None
+    i = int(np.searchsorted(posiciones, posicion))
+    return i if i < len(posiciones) and posiciones[i] == posicion else None
+
+
+def normalizar(vectores):
+    """Copia float32 de los vectores con norma 1 por fila (las filas nulas se dejan a 0)."""
+    vectores = np.asarray(vectores, dtype=np.float32)
+    if vectores.ndim == 1:
+        vectores = vectores.reshape(1, -1)
+    normas = np.linalg.norm(vectores, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return vectores / normas
+
+
+def comprimir(vectores, tipo='float32'):
+    """
+    Vectores normalizados guardados como 'float32', 'float16' (la mitad de memoria) o
+    'int8' (la cuarta parte, escalados por ESCALA_INT8). Ver a_float32 para recuperarlos.
+    """
+    if tipo not in TIPOS_VECTORES:
+        raise ValueError(f"Tipo de vectores desconocido: {tipo} (disponibles: {', '.join(TIPOS_VECTORES)})")
+    normalizados = normalizar(vectores)
+    if tipo == 'int8':
+        return np.round(normalizados * ESCALA_INT8).astype(np.int8)
+    return normalizados.astype(tipo, copy=False)
+
+
+def a_float32(vectores):
+    """Vectores (guardados con comprimir) en float32 para operar con ellos."""
+    if vectores.dtype == np.int8:
+        return vectores.astype(np.float32) / ESCALA_INT8
+    return np.asarray(vectores, dtype=np.float32)
+
+
+def productos(consultas, vectores):
+    """
+    consultas @ vectores.T en float32, también para vectores guardados con comprimir
+    en float16/int8 (que se convierten por bloques de filas, sin una copia float32 completa).
+    """
+    if vectores.dtype == np.float32:
+        return consultas @ vectores.T
+    if vectores.dtype == np.int8:
+        consultas = consultas / np.float32(ESCALA_INT8)
+    return _productos_por_bloques(consultas, vectores)
+
+
+def _productos_por_bloques(consultas, matriz):
+    """consultas @ matriz.T pasando cada bloque de FILAS_BLOQUE_CONVERSION filas a float32 en el mismo búfer."""
+    salida = np.empty((len(consultas), len(matriz)), dtype=np.float32)
+    bufer = np.empty((min(FILAS_BLOQUE_CONVERSION, len(matriz)), matriz.shape[1]), dtype=np.float32)
+    for inicio in range(0, len(matriz), FILAS_BLOQUE_CONVERSION):
+        bloque = matriz[inicio:inicio + FILAS_BLOQUE_CONVERSION]
+        destino = bufer[:len(bloque)]
+        destino[...] = bloque
+        salida[:, inicio:inicio + len(bloque)] = consultas @ destino.T
+    return salida
+
+
+def _kmeans(muestra, n_centroides, iteraciones, rng, esferico=False):
+    """
+    k-means de las filas de muestra. Con esferico=True (vectores normalizados) asigna por
+    producto escalar y deja los centroides con norma 1; si no, usa la distancia euclídea.
+    :return: centroides float32 (n_centroides, dim)
+    """
+    centroides = muestra[rng.choice(len(muestra), n_centroides, replace=False)].copy()
+    for _ in range(iteraciones):
+        similitudes = muestra @ centroides.T
+        if not esferico:
+            # argmin |x - c|^2 = argmax (x·c - |c|^2 / 2)
+            similitudes -= 0.5 * (centroides ** 2).sum(axis=1)
+        asignacion = np.argmax(similitudes, axis=1)
+        sumas = np.zeros_like(centroides)
+        np.add.at(sumas, asignacion, muestra)
+        cuentas = np.bincount(asignacion, minlength=n_centroides)
+        vacios = cuentas == 0
+        centroides[~vacios] = sumas[~vacios] / cuentas[~vacios, None]
+        # Centroides vacíos: los recolocamos en puntos al azar
+        centroides[vacios] = muestra[rng.integers(len(muestra), size=int(vacios.sum()))]
+        if esferico:
+            centroides = normalizar(centroides)
+    return centroides
+
+
+class IndiceExacto:
+    """
+    Búsqueda exacta por fuerza bruta: producto escalar float32 contra los vectores
+    normalizados (equivale al coseno, pero sin recalcular normas en cada consulta).
+    """
+
+    tipo = 'exacto'
+
+    def __init__(self):
+        self.vectores = np.zeros((0, 0), dtype=np.float32)
+
+    def parametros(self):
+        return {}
+
+    def estructuras(self):
+        """Arrays propios del índice, además de los vectores (para medir su memoria)."""
+        return []
+
+    def construir(self, vectores, normalizados=False):
+        """:param normalizados: Los vectores ya vienen de comprimir() y se usan sin copiarlos"""
+        self.vectores = vectores if normalizados else normalizar(vectores)
+
+    def agregar(self, vectores, normalizados=False):
+        nuevos = vectores if normalizados else comprimir(vectores, self.vectores.dtype.name)
+        self.vectores = nuevos if len(self.vectores) == 0 else np.vstack([self.vectores, nuevos])
+
+    def conservar(self, posiciones):
+        """Se queda solo con las filas 'posiciones' (renumeradas 0..len-1)."""
+        self.vectores = self.vectores[posiciones]
+
+    def usar_vectores(self, vectores):
+        """Cambia la matriz por otra con las mismas filas (p. ej. guardada en otro tipo)."""
+        self.vectores = vectores
+
+    def buscar(self, consultas, k, excluir=None, permitidas=None):
+        """
+        :param consultas: Matriz (n_consultas, dim)
+        :param excluir: Lista (una posición o None por consulta) de posiciones a excluir
+        :param permitidas: Máscara booleana de las posiciones que pueden salir (None = todas);
+                           solo se comparan las consultas con esas filas
+        :return: Lista de (posiciones, similitudes) por consulta, de mayor a menor
+        """
+        consultas = normalizar(consultas)
+        vectores = self.vectores
+        posiciones = None
+        if permitidas is not None:
+            posiciones = np.flatnonzero(permitidas)
+            vectores = vectores[posiciones]
+        tam_bloque = max(1, MAX_ELEMENTOS_BLOQUE // max(len(vectores), 1))
+        resultados = []
+        for inicio in range(0, len(consultas), tam_bloque):
+            for j, fila in enumerate(productos(consultas[inicio:inicio + tam_bloque], vectores), start=inicio):
+                excluida = excluir[j] if excluir is not None else None
+                if posiciones is None:
+                    indices = top_k(fila, k, excluir=excluida)
+                    resultados.append((indices, fila[indices]))
+                else:
+                    indices = top_k(fila, k, excluir=posicion_local(posiciones, excluida))
+                    resultados.append((posiciones[indices], fila[indices]))
+        return resultados
+
+    def guardar(self, path):
+        """El índice exacto no tiene estado propio más allá de los vectores."""
+        pass
+
+    def cargar(self, path, vectores, normalizados=False):
+        """:param normalizados: Los vectores ya tienen norma 1 y se usan sin copiarlos (p. ej. mapeados en memoria)"""
+        self.vectores = vectores if normalizados else normalizar(vectores)
+
+
+class IndiceIVF:
+    """
+    Índice aproximado IVF (inverted file): los vectores se agrupan con k-means
+    esférico y cada consulta solo se compara con los vectores de las n_sondas
+    listas cuyos centroides son más parecidos a ella.
+    Más sondas = más recall y más tiempo por consulta.
+    """
+
+    tipo = 'ivf'
+
+    def __init__(self, n_listas=None, n_sondas=8, iteraciones=10, semilla=0):
+        """
+        :param n_listas: Número de grupos (por defecto ~sqrt(n) al construir)
+        :param n_sondas: Grupos que se revisan por consulta
+        :param iteraciones: Iteraciones de k-means
+        """
+        self.n_listas = n_listas
+        self.n_sondas = n_sondas
+        self.iteraciones = iteraciones
+        self.semilla = semilla
+        self.vectores = np.zeros((0, 0), dtype=np.float32)
+        self.centroides = np.zeros((0, 0), dtype=np.float32)
+        self.asignacion = np.array([], dtype=np.int64)
+        self.listas = []
+
+    def parametros(self):
+        return {
+            "n_listas": self.n_listas,
+            "n_sondas": self.n_sondas,
+            "iteraciones": self.iteraciones,
+            "semilla": self.semilla,
+        }
+
+    def estructuras(self):
+        return [self.centroides, self.asignacion]
+
+    def construir(self, vectores, normalizados=False):
+        """:param normalizados: Los vectores ya vienen de comprimir() y se usan sin copiarlos"""
+        self.vectores = vectores if normalizados else normalizar(vectores)
+        n = len(self.vectores)
+        n_listas = min(self.n_listas or max(1, int(np.sqrt(n))), max(n, 1))
+        self.centroides = self._entrenar_centroides(n_listas)
+        self.asignacion = self._asignar(self.vectores)
+        self._reconstruir_listas()
+
+    def agregar(self, vectores, normalizados=False):
+        """Los nuevos vectores van a la lista de su centroide más cercano (sin reentrenar)."""
+        nuevos = vectores if normalizados else comprimir(vectores, self.vectores.dtype.name)
+        if len(self.centroides) == 0:
+            self.construir(nuevos, normalizados=True)
+            return
+        self.vectores = np.vstack([self.vectores, nuevos])
+        self.asignacion = np.concatenate([self.asignacion, self._asignar(nuevos)])
+        self._reconstruir_listas()
+
+    def conservar(self, posiciones):
+        self.vectores = self.vectores[posiciones]
+        self.asignacion = self.asignacion[posiciones]
+        self._reconstruir_listas()
+
+    def usar_vectores(self, vectores):
+        """Cambia la matriz por otra con las mismas filas (p. ej. guardada en otro tipo); las listas no cambian."""
+        self.vectores = vectores
+
+    def buscar(self, consultas, k, excluir=None, permitidas=None):
+        """
+        :param permitidas: Máscara booleana de las posiciones que pueden salir (None = todas).
+                           Si en las sondas no quedan bastantes, se revisan todas las permitidas
+        """
+        consultas = normalizar(consultas)
+        n_sondas = min(self.n_sondas, len(self.listas))
+        resultados = []
+        for j, (consulta, sim_centroides) in enumerate(zip(consultas, consultas @ self.centroides.T)):
+            sondas = top_k(sim_centroides, n_sondas)
+            excluida = excluir[j] if excluir is not None else None
+            # Ordenamos los candidatos para que los empates se resuelvan por posición, como en el exacto
+            candidatos = np.sort(np.concatenate([self.listas[s] for s in sondas])) if len(sondas) else np.array([], dtype=np.int64)
+            if permitidas is not None:
+                candidatos = candidatos[permitidas[candidatos]]
+                if len(candidatos) < k + (excluida is not None):
+                    candidatos = np.flatnonzero(permitidas)
+            similitudes = a_float32(self.vectores[candidatos]) @ consulta
+            orden = top_k(similitudes, k + (excluida is not None))
+            indices = candidatos[orden]
+            similitudes = similitudes[orden]
+            if excluida is not None:
+                validos = indices != excluida
+                indices, similitudes = indices[validos], similitudes[validos]
+            resultados.append((indices[:k], similitudes[:k]))
+        return resultados
+
+    def guardar(self, path):
+        np.save(path + "_centroides.npy", self.centroides)
+        np.save(path + "_asignacion.npy", self.asignacion)
+
+    def cargar(self, path, vectores, normalizados=False):
+        self.vectores = vectores if normalizados else normalizar(vectores)
+        self.centroides = np.load(path + "_centroides.npy")
+        self.asignacion = np.load(path + "_asignacion.npy")
+        self._reconstruir_listas()
+
+    def _entrenar_centroides(self, n_listas):
+        """k-means esférico (centroides de norma 1) sobre una muestra de los vectores."""
+        rng = np.random.default_rng(self.semilla)
+        n = len(self.vectores)
+        if n == 0:
+            return np.zeros((0, self.vectores.shape[1]), dtype=np.float32)
+        # Con ~256 puntos por lista hay de sobra para situar los centroides
+        muestra = self.vectores
+        if n > 256 * n_listas:
+            muestra = self.vectores[rng.choice(n, 256 * n_listas, replace=False)]
+        muestra = a_float32(muestra)
+
+        return _kmeans(muestra, n_listas, self.iteraciones, rng, esferico=True)
+
+    def _asignar(self, vectores, tam_bloque=4096):
+        """Lista (centroide más parecido) de cada vector, por bloques para acotar memoria."""
+        if len(vectores) == 0:
+            return np.array([], dtype=np.int64)
+        return np.concatenate([
+            np.argmax(a_float32(vectores[i:i + tam_bloque]) @ self.centroides.T, axis=1)
+            for i in range(0, len(vectores), tam_bloque)
+        ])
+
+    def _reconstruir_listas(self):
+        orden = np.argsort(self.asignacion, kind='stable')
+        cortes = np.cumsum(np.bincount(self.asignacion, minlength=len(self.centroides)))[:-1]
+        self.listas = np.split(orden, cortes)
+
+
+class IndiceCuantizado:
+    """
+    Búsqueda en dos fases: un primer recorrido de todos los vectores cuantizados elige los
+    k * factor_reordenacion mejores candidatos, que se reordenan con el producto exacto
+    de los vectores originales (solo se leen esas filas).
+    - 'int8': cuantización escalar por dimensión (escala = máximo absoluto / 127); 1 byte
+      por componente, la cuarta parte que float32
+    - 'pq': cuantización por producto; cada vector se parte en n_subespacios trozos y cada
+      trozo se guarda como el código (uint8) de su centroide más cercano entre CENTROIDES_PQ.
+      Se puntúa con tablas consulta-centroide (ADC): n_subespacios bytes por vector
+    """
+
+    tipo = 'cuantizado'
+
+    def __init__(self, cuantizacion='int8', factor_reordenacion=FACTOR_REORDENACION, n_subespacios=None, iteraciones=10,
+                 semilla=0):
+        """
+        :param cuantizacion: 'int8' o 'pq'
+        :param factor_reordenacion: Candidatos por resultado que se reordenan con los vectores exactos
+        :param n_subespacios: Trozos por vector en 'pq' (tiene que dividir a dim; por defecto ~dim / 8)
+        :param iteraciones: Iteraciones de k-means al entrenar los centroides de 'pq'
+        """
+        if cuantizacion not in ('int8', 'pq'):
+            raise ValueError(f"Cuantización desconocida: {cuantizacion} (disponibles: int8, pq)")
+        self.cuantizacion = cuantizacion
+        self.factor_reordenacion = factor_reordenacion
+        self.n_subespacios = n_subespacios
+        self.iteraciones = iteraciones
+        self.semilla = semilla
+        self.vectores = np.zeros((0, 0), dtype=np.float32)
+        # int8: códigos (n, dim) y escala por dimensión. pq: códigos (n_subespacios, n), por
+        # subespacio para recorrerlos seguidos, y centroides (n_subespacios, CENTROIDES_PQ, dim_sub)
+        self.codigos = np.zeros((0, 0), dtype=np.int8)
+        self.escalas = np.zeros(0, dtype=np.float32)
+        self.centroides = np.zeros((0, 0, 0), dtype=np.float32)
+
+    def parametros(self):
+        return {
+            "cuantizacion": self.cuantizacion,
+            "factor_reordenacion": self.factor_reordenacion,
+            "n_subespacios": self.n_subespacios,
+            "iteraciones": self.iteraciones,
+            "semilla": self.semilla,
+        }
+
+    def estructuras(self):
+        return [self.codigos, self.escalas, self.centroides]
+
+    def construir(self, vectores, normalizados=False):
+        """:param normalizados: Los vectores ya vienen de comprimir() y se usan sin copiarlos"""
+        self.vectores = vectores if normalizados else normalizar(vectores)
+        dim = self.vectores.shape[1] if self.vectores.ndim == 2 else 0
+        if self.cuantizacion == 'int8':
+            maximos = np.zeros(dim, dtype=np.float32)
+            for inicio in range(0, len(self.vectores), FILAS_BLOQUE_CONVERSION):
+                bloque = a_float32(self.vectores[inicio:inicio + FILAS_BLOQUE_CONVERSION])
+                maximos = np.maximum(maximos, np.abs(bloque).max(axis=0))
+            maximos[maximos == 0] = 1.0
+            self.escalas = maximos / 127
+        else:
+            self.centroides = self._entrenar_pq(dim)
+        self.codigos = self._codificar(self.vectores)
+
+    def _entrenar_pq(self, dim):
+        """Centroides de cada subespacio, con k-means sobre una muestra de los vectores."""
+        # Por defecto, el mayor divisor de dim que deja trozos de al menos 8 componentes
+        n_subespacios = self.n_subespacios or max([m for m in range(1, dim // 8 + 1) if dim % m == 0] or [1])
+        if dim % n_subespacios:
+            raise ValueError(f"n_subespacios ({n_subespacios}) tiene que dividir a la dimensión ({dim})")
+        self.n_subespacios = n_subespacios
+        rng = np.random.default_rng(self.semilla)
+        n = len(self.vectores)
+        if n == 0:
+            return np.zeros((n_subespacios, 0, dim // n_subespacios), dtype=np.float32)
+        # Con ~64 puntos por centroide hay de sobra para situarlos
+        muestra = self.vectores
+        if n > 64 * CENTROIDES_PQ:
+            muestra = self.vectores[np.sort(rng.choice(n, 64 * CENTROIDES_PQ, replace=False))]
+        muestra = a_float32(muestra).reshape(len(muestra), n_subespacios, -1)
+        n_centroides = min(CENTROIDES_PQ, len(muestra))
+        return np.stack([
+            _kmeans(np.ascontiguousarray(muestra[:, j]), n_centroides, self.iteraciones, rng)
+            for j in range(n_subespacios)
+        ])
+
+    def _codificar(self, vectores, tam_bloque=4096):
+        """Códigos de los vectores con las escalas/centroides ya entrenados."""
+        if self.cuantizacion == 'int8':
+            codigos = np.empty(vectores.shape, dtype=np.int8)
+            for inicio in range(0, len(vectores), tam_bloque):
+                bloque = a_float32(vectores[inicio:inicio + tam_bloque]) / self.escalas
+                codigos[inicio:inicio + tam_bloque] = np.clip(np.round(bloque), -127, 127)
+            return codigos
+
+        n_subespacios = len(self.centroides)
+        codigos = np.empty((n_subespacios, len(vectores)), dtype=np.uint8)
+        normas = (self.centroides ** 2).sum(axis=2)
+        for inicio in range(0, len(vectores), tam_bloque):
+            bloque = a_float32(vectores[inicio:inicio + tam_bloque]).reshape(-1, n_subespacios, self.centroides.shape[2])
+            for j in range(n_subespacios):
+                codigos[j, inicio:inicio + len(bloque)] = np.argmax(
+                    bloque[:, j] @ self.centroides[j].T - 0.5 * normas[j], axis=1
+                )
+        return codigos
+
+    def agregar(self, vectores, normalizados=False):
+        """Los nuevos vectores se codifican con las escalas/centroides actuales (sin reentrenar)."""
+        nuevos = vectores if normalizados else comprimir(vectores, self.vectores.dtype.name)
+        if len(self.vectores) == 0:
+            self.construir(nuevos, normalizados=True)
+            return
+        self.vectores = np.vstack([self.vectores, nuevos])
+        eje = 0 if self.cuantizacion == 'int8' else 1
+        self.codigos = np.concatenate([self.codigos, self._codificar(nuevos)], axis=eje)
+
+    def conservar(self, posiciones):
+        self.vectores = self.vectores[posiciones]
+        self.codigos = self.codigos[posiciones] if self.cuantizacion == 'int8' else self.codigos[:, posiciones]
+
+    def usar_vectores(self, vectores):
+        """Cambia la matriz de reordenación por otra con las mismas filas; los códigos no cambian."""
+        self.vectores = vectores
+
+    def _puntuar(self, consultas, posiciones=None):
+        """Similitudes aproximadas (n_consultas, n) de la primera fase, solo con los códigos."""
+        if self.cuantizacion == 'int8':
+            codigos = self.codigos if posiciones is None else self.codigos[posiciones]
+            return _productos_por_bloques(consultas * self.escalas, codigos)
+
+        codigos = self.codigos if posiciones is None else self.codigos[:, posiciones]
+        n_subespacios = len(self.centroides)
+        # Tabla (n_consultas, n_subespacios, centroides): producto de cada trozo de la consulta con cada centroide
+        tablas = np.einsum('qjd,jcd->qjc', consultas.reshape(len(consultas), n_subespacios, -1), self.centroides)
+        similitudes = np.zeros((len(consultas), codigos.shape[1]), dtype=np.float32)
+        for j in range(n_subespacios):
+            similitudes += tablas[:, j][:, codigos[j]]
+        return similitudes
+
+    def buscar(self, consultas, k, excluir=None, permitidas=None):
+        """
+        :param excluir: Lista (una posición o None por consulta) de posiciones a excluir
+        :param permitidas: Máscara booleana de las posiciones que pueden salir (None = todas)
+        :return: Lista de (posiciones, similitudes exactas) por consulta, de mayor a menor
+        """
+        consultas = normalizar(consultas)
+        posiciones = np.flatnonzero(permitidas) if permitidas is not None else None
+        n = len(self.vectores) if posiciones is None else len(posiciones)
+        tam_bloque = max(1, MAX_ELEMENTOS_BLOQUE // max(n, 1))
+        resultados = []
+        for inicio in range(0, len(consultas), tam_bloque):
+            bloque = consultas[inicio:inicio + tam_bloque]
+            for j, (consulta, aproximadas) in enumerate(zip(bloque, self._puntuar(bloque, posiciones)), start=inicio):
+                excluida = excluir[j] if excluir is not None else None
+                extra = excluida is not None
+                candidatos = top_k(aproximadas, k * self.factor_reordenacion + extra)
+                if posiciones is not None:
+                    candidatos = posiciones[candidatos]
+                # Ordenados para que los empates se resuelvan por posición, como en el exacto
+                candidatos = np.sort(candidatos)
+                similitudes = a_float32(self.vectores[candidatos]) @ consulta
+                orden = top_k(similitudes, k + extra)
+                indices, similitudes = candidatos[orden], similitudes[orden]
+                if extra:
+                    validos = indices != excluida
+                    indices, similitudes = indices[validos], similitudes[validos]
+                resultados.append((indices[:k], similitudes[:k]))
+        return resultados
+
+    def guardar(self, path):
+        np.save(path + "_codigos.npy", self.codigos)
+        np.save(path + "_escalas.npy", self.escalas)
+        np.save(path + "_centroides.npy", self.centroides)
+
+    def cargar(self, path, vectores, normalizados=False):
+        self.vectores = vectores if normalizados else normalizar(vectores)
+        self.codigos = np.load(path + "_codigos.npy")
+        self.escalas = np.load(path + "_escalas.npy")
+        self.centroides = np.load(path + "_centroides.npy")
+        if self.cuantizacion == 'pq':
+            self.n_subespacios = len(self.centroides)
+
+
+# Tipos de índice disponibles, seleccionables por nombre en el motor
+TIPOS_INDICE = {
+    IndiceExacto.tipo: IndiceExacto,
+    IndiceIVF.tipo: IndiceIVF,
+    IndiceCuantizado.tipo: IndiceCuantizado,
+}
+
+
+def crear_indice(tipo='exacto', **parametros):
+    """Crea un índice vectorial vacío del tipo indicado ('exacto', 'ivf' o 'cuantizado')."""
+    if tipo not in TIPOS_INDICE:
+        raise ValueError(f"Tipo de índice desconocido: {tipo} (disponibles: {', '.join(TIPOS_INDICE)})")
+    return TIPOS_INDICE[tipo](**parametros)
+
+
+def evaluar_recall(indice, consultas, k=10, excluir=None):
+    """
+    Compara un índice con la búsqueda exacta sobre los mismos vectores.
+    :return: dict con recall@k medio y milisegundos por consulta de cada uno
+    """
+    exacto = IndiceExacto()
+    exacto.vectores = indice.vectores  # ya normalizados
+
+    inicio = time.perf_counter()
+    res_exacto = exacto.buscar(consultas, k, excluir=excluir)
+    t_exacto = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    res_indice = indice.buscar(consultas, k, excluir=excluir)
+    t_indice = time.perf_counter() - inicio
+
+    aciertos = [
+        len(set(aprox.tolist()) & set(real.tolist())) / max(len(real), 1)
+        for (aprox, _), (real, _) in zip(res_indice, res_exacto)
+    ]
+    n = max(len(consultas), 1)
+    return {
+        "tipo": indice.tipo,
+        "parametros": indice.parametros(),
+        "k": k,
+        "n_consultas": len(consultas),
+        "recall": float(np.mean(aciertos)) if aciertos else 0.0,
+        "ms_por_consulta_exacto": 1000 * t_exacto / n,
+        "ms_por_consulta_indice": 1000 * t_indice / n,
+    }
@@ -0,0 +1,336 @@
+import os
+import sys
+import json
+import time
+import bisect
+import threading
+from collections import Counter
+
+# Límites (en segundos) de las cubetas de los histogramas de tiempos
+CUBETAS_SEGUNDOS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Intervalo entre muestras del perfilador (segundos)
+INTERVALO_PERFILADOR = 0.005
+
+
+def _clave(nombre, etiquetas):
+    return nombre, tuple(sorted(etiquetas.items()))
+
+
+def _etiquetas_prometheus(etiquetas, extra=()):
+    pares = list(etiquetas) + list(extra)
+    if not pares:
+        return ""
+    escapar = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{escapar(v)}"' for k, v in pares) + "}"
+
+
+class Histograma:
+    """Distribución de tiempos: número, suma, mínimo, máximo y cuentas por cubeta."""
+
+    __slots__ = ("limites", "cuentas", "n", "suma", "minimo", "maximo")
+
+    def __init__(self, limites=CUBETAS_SEGUNDOS):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)  # la última cubeta es +Inf
+        self.n = 0
+        self.suma = 0.0
+        self.minimo = float("inf")
+        self.maximo = 0.0
+
+    def observar(self, valor):
+        self.cuentas[bisect.bisect_left(self.limites, valor)] += 1
+        self.n += 1
+        self.suma += valor
+        if valor < self.minimo:
+            self.minimo = valor
+        if valor > self.maximo:
+            self.maximo = valor
+
+    def percentil(self, p):
+        """Percentil aproximado: límite superior de la cubeta donde cae (acotado por el máximo)."""
+        if self.n == 0:
+            return None
+        objetivo = p / 100 * self.n
+        acumulado = 0
+        for limite, cuenta in zip(self.limites, self.cuentas):
+            acumulado += cuenta
+            if acumulado >= objetivo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+    def resumen(self):
+        if self.n == 0:
+            return {"n": 0}
+        return {
+            "n": self.n,
+            "total_s": round(self.suma, 6),
+            "media_ms": round(self.suma / self.n * 1000, 4),
+            "min_ms": round(self.minimo * 1000, 4),
+            "max_ms": round(self.maximo * 1000, 4),
+            "p50_ms": round(self.percentil(50) * 1000, 4),
+            "p95_ms": round(self.percentil(95) * 1000, 4),
+            "p99_ms": round(self.percentil(99) * 1000, 4),
+        }
+
+
+class _Cronometro:
+    """Context manager que añade al registro el tiempo transcurrido dentro del bloque."""
+
+    __slots__ = ("registro", "clave", "inicio")
+
+    def __init__(self, registro, clave):
+        self.registro = registro
+        self.clave = clave
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registro._observar(self.clave, time.perf_counter() - self.inicio)
+        return False
+
+
+class _SinMedida:
+    """Context manager vacío para cuando el registro está desactivado."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_SIN_MEDIDA = _SinMedida()
+
+
+class RegistroMetricas:
+    """
+    Registro en memoria de contadores y tiempos (histogramas), con etiquetas.
+    Se puede usar desde varios hilos y volcar en JSON o en el formato de texto de
+    Prometheus. Desactivado (activo=False) no mide nada y su coste es casi nulo.
+    """
+
+    def __init__(self, activo=True, cubetas=CUBETAS_SEGUNDOS):
+        self.activo = activo
+        self.cubetas = cubetas
+        self._contadores = {}
+        self._histogramas = {}
+        self._perfiles = {}
+        self._lock = threading.Lock()
+
+    def contar(self, nombre, n=1, **etiquetas):
+        """Suma n al contador nombre{etiquetas}."""
+        if not self.activo:
+            return
+        clave = _clave(nombre, etiquetas)
+        with self._lock:
+            self._contadores[clave] = self._contadores.get(clave, 0) + n
+
+    def observar(self, nombre, segundos, **etiquetas):
+        """Añade una duración al histograma nombre{etiquetas}."""
+        if self.activo:
+            self._observar(_clave(nombre, etiquetas), segundos)
+
+    def medir(self, nombre, **etiquetas):
+        """
+        Cronometra un bloque: with registro.medir("motor_similitud_segundos", metodo="tfidf"): ...
+        """
+        if not self.activo:
+            return _SIN_MEDIDA
+        return _Cronometro(self, _clave(nombre, etiquetas))
+
+    def _observar(self, clave, segundos):
+        with self._lock:
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = Histograma(self.cubetas)
+            histograma.observar(segundos)
+
+    def valor(self, nombre, **etiquetas):
+        """Valor actual de un contador (0 si no existe)."""
+        with self._lock:
+            return self._contadores.get(_clave(nombre, etiquetas), 0)
+
+    def histograma(self, nombre, **etiquetas):
+        """Histograma de un tiempo (None si no se ha medido nunca)."""
+        with self._lock:
+            return self._histogramas.get(_clave(nombre, etiquetas))
+
+    def reiniciar(self):
+        with self._lock:
+            self._contadores.clear()
+            self._histogramas.clear()
+            self._perfiles.clear()
+
+    # --- PERFILADO ---
+
+    def perfilar(self, nombre="perfil", intervalo=INTERVALO_PERFILADOR, todos_los_hilos=False):
+        """
+        Perfilador de muestreo que, al terminar el bloque, deja en el registro las
+        funciones con más muestras (aparecen en a_dict() bajo 'perfiles'):
+        with registro.perfilar("consultas") as perfilador: ...
+        """
+        return _PerfilRegistrado(self, nombre, PerfiladorMuestreo(intervalo, todos_los_hilos))
+
+    # --- VOLCADO ---
+
+    def a_dict(self):
+        """Contadores y resúmenes de tiempos como dict serializable en JSON."""
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            histogramas = sorted((clave, h.resumen()) for clave, h in self._histogramas.items())
+            perfiles = dict(self._perfiles)
+        resultado = {
+            "contadores": [{"nombre": n, "etiquetas": dict(e), "valor": v} for (n, e), v in contadores],
+            "tiempos": [dict({"nombre": n, "etiquetas": dict(e)}, **resumen) for (n, e), resumen in histogramas],
+        }
+        if perfiles:
+            resultado["perfiles"] = perfiles
+        return resultado
+
+    def a_json(self, **kwargs):
+        return json.dumps(self.a_dict(), ensure_ascii=False, **kwargs)
+
+    def a_prometheus(self):
+        """Volcado en el formato de texto de Prometheus (contadores e histogramas)."""
+        with self._lock:
+            contadores = sorted(self._contadores.items())
+            histogramas = sorted((clave, list(h.cuentas), h.n, h.suma) for clave, h in self._histogramas.items())
+
+        lineas = []
+        tipo_declarado = set()
+        for (nombre, etiquetas), valor in contadores:
+            if nombre not in tipo_declarado:
+                lineas.append(f"# TYPE {nombre} counter")
+                tipo_declarado.add(nombre)
+            lineas.append(f"{nombre}{_etiquetas_prometheus(etiquetas)} {valor}")
+        for (nombre, etiquetas), cuentas, n, suma in histogramas:
+            if nombre not in tipo_declarado:
+                lineas.append(f"# TYPE {nombre} histogram")
+                tipo_declarado.add(nombre)
+            acumulado = 0
+            for limite, cuenta in zip(list(self.cubetas) + ["+Inf"], cuentas):
+                acumulado += cuenta
+                lineas.append(f"{nombre}_bucket{_etiquetas_prometheus(etiquetas, [('le', limite)])} {acumulado}")
+            lineas.append(f"{nombre}_sum{_etiquetas_prometheus(etiquetas)} {suma}")
+            lineas.append(f"{nombre}_count{_etiquetas_prometheus(etiquetas)} {n}")
+        return "\n".join(lineas) + "\n"
+
+    def volcar(self, path):
+        """Escribe las métricas en path: JSON si termina en .json, texto de Prometheus si no."""
+        contenido = self.a_json(indent=2) if path.endswith(".json") else self.a_prometheus()
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(contenido)
+
+
+class PerfiladorMuestreo:
+    """
+    Perfilador de muestreo sin dependencias: un hilo aparte mira cada 'intervalo'
+    segundos la pila de llamadas del hilo perfilado (o de todos) y cuenta cuántas
+    veces aparece cada pila. Su coste no depende de cuántas funciones se llamen,
+    así que se puede activar en producción durante un rato.
+    """
+
+    def __init__(self, intervalo=INTERVALO_PERFILADOR, todos_los_hilos=False, profundidad=64):
+        """
+        :param todos_los_hilos: Si es False, solo se muestrea el hilo que llama a iniciar()
+        :param profundidad: Máximo de marcos por pila
+        """
+        self.intervalo = intervalo
+        self.todos_los_hilos = todos_los_hilos
+        self.profundidad = profundidad
+        self.pilas = Counter()
+        self.n_muestras = 0
+        self._hilo = None
+        self._parar = threading.Event()
+        self._objetivo = None
+
+    def iniciar(self):
+        self._objetivo = threading.get_ident()
+        self._parar.clear()
+        self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        if self._hilo is not None:
+            self._parar.set()
+            self._hilo.join()
+            self._hilo = None
+        return self
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
+        return False
+
+    def _muestrear(self):
+        propio = threading.get_ident()
+        while not self._parar.wait(self.intervalo):
+            for ident, marco in sys._current_frames().items():
+                if ident == propio or (not self.todos_los_hilos and ident != self._objetivo):
+                    continue
+                pila = []
+                while marco is not None and len(pila) < self.profundidad:
+                    codigo = marco.f_code
+                    pila.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{codigo.co_firstlineno})")
+                    marco = marco.f_back
+                self.pilas[tuple(reversed(pila))] += 1
+            self.n_muestras += 1
+
+    def funciones_mas_costosas(self, n=20):
+        """
+        Funciones con más muestras: [{funcion, propias, acumuladas}], donde 'propias' son
+        las muestras en las que estaba ejecutándose ella y 'acumuladas' las que estaba en la pila.
+        """
+        propias = Counter()
+        acumuladas = Counter()
+        for pila, cuenta in self.pilas.items():
+            if not pila:
+                continue
+            propias[pila[-1]] += cuenta
+            for funcion in set(pila):
+                acumuladas[funcion] += cuenta
+        return [
+            {"funcion": funcion, "propias": propias[funcion], "acumuladas": cuenta}
+            for funcion, cuenta in acumuladas.most_common(n)
+        ]
+
+    def pilas_colapsadas(self):
+        """Pilas en formato 'a;b;c cuenta' (entrada de flamegraph.pl o speedscope)."""
+        return "\n".join(f"{';'.join(pila)} {cuenta}" for pila, cuenta in self.pilas.most_common()) + "\n"
+
+    def guardar(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.pilas_colapsadas())
+
+
+class _PerfilRegistrado:
+    """Bloque perfilado cuyo resumen se guarda en el registro al salir (ver RegistroMetricas.perfilar)."""
+
+    def __init__(self, registro, nombre, perfilador):
+        self.registro = registro
+        self.nombre = nombre
+        self.perfilador = perfilador
+
+    def __enter__(self):
+        return self.perfilador.iniciar()
+
+    def __exit__(self, *exc):
+        self.perfilador.detener()
+        with self.registro._lock:
+            self.registro._perfiles[self.nombre] = {
+                "muestras": self.perfilador.n_muestras,
+                "intervalo_s": self.perfilador.intervalo,
+                "funciones": self.perfilador.funciones_mas_costosas(),
+            }
+        return False
+
+
+# Registro compartido por defecto (el que usan los motores si no se les pasa otro)
+METRICAS = RegistroMetricas()
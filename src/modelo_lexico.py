@@ -0,0 +1,171 @@
+import sys
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer, TfidfTransformer
+from sklearn.preprocessing import normalize
+
+# Ponderaciones de los términos disponibles
+PONDERACIONES = ('tfidf', 'bm25')
+# Parámetros de BM25: saturación de la frecuencia (k1) y peso de la longitud del documento (b)
+K1_BM25 = 1.2
+B_BM25 = 0.75
+# Columnas del espacio de hashing (sin vocabulario): acota el tamaño del modelo y de la
+# matriz sea cual sea el corpus, a cambio de alguna colisión entre términos
+N_CARACTERISTICAS_HASHING = 2 ** 18
+
+
+class ModeloLexico:
+    """
+    Representación léxica de las noticias para el método 'tfidf' del motor: cuenta
+    términos (palabras o n-gramas) con un vocabulario ajustado o con hashing, y los pondera
+    con TF-IDF (como TfidfVectorizer) o con BM25. Las filas salen normalizadas (L2), así
+    que el motor las compara por coseno igual con las dos ponderaciones.
+    Con la configuración por defecto es exactamente TfidfVectorizer().
+    """
+
+    def __init__(self, ponderacion='tfidf', ngramas=(1, 1), min_df=1, max_df=1.0, max_terminos=None,
+                 tf_sublineal=False, hashing=False, n_caracteristicas=N_CARACTERISTICAS_HASHING,
+                 k1=K1_BM25, b=B_BM25):
+        """
+        :param ponderacion: 'tfidf' o 'bm25'. Con 'bm25' el peso de cada término es
+                            idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * longitud / longitud_media)):
+                            la frecuencia se satura y los documentos largos pesan menos
+        :param ngramas: (n mínimo, n máximo) de los n-gramas de palabras
+        :param min_df: Descartar términos en menos documentos que esto (int: número de
+                       documentos; float: fracción del corpus)
+        :param max_df: Descartar términos en más documentos que esto (int: número de
+                       documentos; float: fracción del corpus, 1.0 = sin límite)
+        :param max_terminos: Quedarse solo con los max_terminos más frecuentes
+        :param tf_sublineal: Usar 1 + log(tf) en vez de tf (solo con 'tfidf')
+        :param hashing: Sin vocabulario: cada término va a una de n_caracteristicas columnas
+                        por hashing (el modelo no crece con el corpus; no admite poda)
+        """
+        if ponderacion not in PONDERACIONES:
+            raise ValueError(f"Ponderación desconocida: {ponderacion} (disponibles: {', '.join(PONDERACIONES)})")
+        if tf_sublineal and ponderacion != 'tfidf':
+            raise ValueError("tf_sublineal solo se aplica a la ponderación tfidf (BM25 ya satura la frecuencia)")
+        if hashing and (min_df != 1 or max_df != 1.0 or max_terminos is not None):
+            raise ValueError("Con hashing no hay vocabulario que podar: el tamaño lo fija n_caracteristicas")
+        self.ponderacion = ponderacion
+        self.ngramas = tuple(ngramas)
+        self.min_df = min_df
+        self.max_df = max_df
+        self.max_terminos = max_terminos
+        self.tf_sublineal = tf_sublineal
+        self.hashing = hashing
+        self.n_caracteristicas = n_caracteristicas
+        self.k1 = k1
+        self.b = b
+
+        # Estado ajustado (ver ajustar_transformar / restaurar)
+        self.idf = None
+        self.longitud_media = None
+        self._contador = None
+        self._tfidf = None
+
+    def parametros(self):
+        """Parámetros del constructor (para guardarlos con el índice)."""
+        return {
+            "ponderacion": self.ponderacion, "ngramas": list(self.ngramas), "min_df": self.min_df,
+            "max_df": self.max_df, "max_terminos": self.max_terminos, "tf_sublineal": self.tf_sublineal,
+            "hashing": self.hashing, "n_caracteristicas": self.n_caracteristicas, "k1": self.k1, "b": self.b,
+        }
+
+    @property
+    def ajustado(self):
+        return self.idf is not None
+
+    @property
+    def vocabulario(self):
+        """dict término -> columna (None con hashing)."""
+        if self.hashing or self._contador is None:
+            return None
+        # Restaurado con un vocabulario fijo, CountVectorizer no tiene vocabulary_ hasta el primer transform
+        return getattr(self._contador, "vocabulary_", self._contador.vocabulary)
+
+    def n_terminos(self):
+        """Columnas de la representación (términos del vocabulario o tamaño del hashing)."""
+        return self.n_caracteristicas if self.hashing else len(self.vocabulario or {})
+
+    def _nuevo_contador(self, vocabulario=None):
+        if self.hashing:
+            return HashingVectorizer(n_features=self.n_caracteristicas, ngram_range=self.ngramas,
+                                     alternate_sign=False, norm=None, dtype=np.float64)
+        return CountVectorizer(ngram_range=self.ngramas, min_df=self.min_df, max_df=self.max_df,
+                               max_features=self.max_terminos, vocabulary=vocabulario, dtype=np.float64)
+
+    def ajustar_transformar(self, textos):
+        """Ajusta vocabulario, IDF (y longitud media con BM25) y devuelve la matriz del corpus."""
+        self._contador = self._nuevo_contador()
+        conteos = sp.csr_matrix(self._contador.fit_transform(textos))
+        if self.ponderacion == 'tfidf':
+            self._tfidf = TfidfTransformer(sublinear_tf=self.tf_sublineal).fit(conteos)
+            self.idf = self._tfidf.idf_
+        else:
+            n = conteos.shape[0]
+            df = np.bincount(conteos.indices, minlength=conteos.shape[1])
+            self.idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+            self.longitud_media = float(conteos.sum() / n) if n else 0.0
+        return self._ponderar(conteos)
+
+    def transformar(self, textos):
+        """Vectores de textos nuevos (queries o noticias añadidas) con el vocabulario e IDF ajustados."""
+        return self._ponderar(sp.csr_matrix(self._contador.transform(textos)))
+
+    def _ponderar(self, conteos):
+        if self.ponderacion == 'tfidf':
+            return self._tfidf.transform(conteos, copy=False)
+        longitudes = np.asarray(conteos.sum(axis=1)).ravel()
+        longitud_relativa = longitudes / self.longitud_media if self.longitud_media else np.ones(len(longitudes))
+        por_elemento = np.repeat(longitud_relativa, np.diff(conteos.indptr))
+        tf = conteos.data
+        conteos.data = self.idf[conteos.indices] * tf * (self.k1 + 1) / (
+            tf + self.k1 * (1 - self.b + self.b * por_elemento)
+        )
+        return normalize(conteos, copy=False)
+
+    def restaurar(self, vocabulario, idf, longitud_media=None):
+        """Deja el modelo ajustado a partir de lo guardado (ver MotorRecomendacion.save)."""
+        self._contador = self._nuevo_contador(None if self.hashing else vocabulario)
+        self.idf = idf
+        self.longitud_media = longitud_media
+        if self.ponderacion == 'tfidf':
+            self._tfidf = TfidfTransformer(sublinear_tf=self.tf_sublineal)
+            self._tfidf.idf_ = idf
+        return self
+
+    def memoria(self):
+        """Bytes aproximados del modelo (vocabulario e IDF)."""
+        total = self.idf.nbytes if self.idf is not None else 0
+        vocabulario = self.vocabulario
+        if vocabulario:
+            total += sys.getsizeof(vocabulario) + sum(sys.getsizeof(t) + 32 for t in vocabulario)
+        return total
+
+
+def parametros_desde_texto(texto):
+    """
+    Parámetros de ModeloLexico a partir de una descripción corta, para la línea de comandos:
+    'bm25', 'tfidf:min_df=2,max_terminos=50000', 'tfidf:ngramas=1-2,tf_sublineal', 'bm25:hashing'.
+    min_df y max_df siguen la regla de ModeloLexico (la de sklearn): un entero es un número
+    de documentos y un valor con punto, una fracción del corpus ('max_df=0.5', 'min_df=0.01').
+    La excepción es max_df=1, que se lee como 1.0 (sin límite) y no como "en 1 documento
+    como mucho", que vaciaría el vocabulario de casi cualquier corpus.
+    """
+    ponderacion, _, opciones = texto.partition(":")
+    parametros = {"ponderacion": ponderacion}
+    validos = ModeloLexico().parametros()
+    for opcion in filter(None, opciones.split(",")):
+        clave, igual, valor = opcion.partition("=")
+        if clave not in validos:
+            raise ValueError(f"Parámetro desconocido del modelo léxico: {clave}")
+        if not igual:
+            parametros[clave] = True
+        elif clave == "ngramas":
+            minimo, _, maximo = valor.partition("-")
+            parametros[clave] = (int(minimo), int(maximo or minimo))
+        elif clave == "max_df" and valor == "1":
+            parametros[clave] = 1.0
+        else:
+            parametros[clave] = float(valor) if "." in valor else int(valor)
+    return parametros
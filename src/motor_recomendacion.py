@@ -1,11 +1,32 @@
 import os
+import json
+import functools
+import inspect
+import hashlib
+import datetime
+import shutil
+import tempfile
 import pandas as pd
 import numpy as np
+import scipy.sparse as sp
 import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
+from sklearn.preprocessing import normalize
+from sklearn.utils.extmath import safe_sparse_dot
+from indice_vectorial import (top_k, crear_indice, evaluar_recall, posicion_local, normalizar, comprimir, a_float32,
+                              TIPOS_VECTORES)
+from preprocesamiento import Preprocesador
+from carga_noticias import (CargadorNoticias, Manifiesto, listar_archivos_noticias, ruta_relativa, id_estable,
+                            parsear_fecha, parsear_fecha_extraccion)
+from almacen_corpus import AlmacenCorpus, CargadorAlmacen, es_almacen
+from cache_embeddings import CacheEmbeddings, TAM_LOTE_EMBEDDINGS
+from duplicados import DetectorDuplicados
+from metricas import METRICAS
+from cache_resultados import CacheResultados, normalizar_query
+from puntuador_disperso import PuntuadorDisperso
+from modelo_lexico import ModeloLexico
+from indice_palabras import IndicePalabras
+from almacen_textos import AlmacenTextos, CAMPOS_TEXTO
 # Importación condicional para la parte opcional
 try:
     from sentence_transformers import SentenceTransformer
@@ -19,182 +40,1713 @@ nltk.download('punkt', quiet=True)
 nltk.download('stopwords', quiet=True)
 nltk.download('punkt_tab', quiet=True)
 
+# Modelo de embeddings usado para codificar noticias y queries
+MODELO_EMBEDDINGS = 'paraphrase-multilingual-MiniLM-L12-v2'
+
+# Versión del formato del índice en disco. Si cambia la estructura de lo que
+# se guarda en save(), hay que subirla para que load() rechace índices viejos.
+FORMATO_INDICE = 14
+
+# Fracción del corpus que puede añadirse con el vocabulario/IDF fijos antes
+# de reajustar el TF-IDF completo (ver add_documents)
+UMBRAL_REFRESCO_IDF = 0.2
+
+# Máximo de similitudes (queries x noticias) que se calculan a la vez en las
+# consultas por lotes; acota la memoria (2**24 float64 ~ 128 MB)
+MAX_ELEMENTOS_BLOQUE = 2 ** 24
+
+# Vecinas por noticia que se guardan en la tabla de vecinos precalculada
+K_VECINOS = 20
+
+# Campos de una noticia que se devuelven al listarla (sin el texto, ver listar_noticias)
+CAMPOS_LISTADO = ('id', 'titulo', 'categoria', 'fecha', 'fecha_publicacion', 'enlace')
+
+# Columnas que conserva en memoria el motor compacto (ver compactar); el resto del texto
+# de cada noticia se lee de disco cuando hace falta
+COLUMNAS_COMPACTAS = ('id', 'titulo', 'categoria', 'fecha', 'fecha_publicacion', 'fecha_extraccion', 'enlace', 'origen',
+                      'ruta')
+
+# Caracteres del cuerpo que se devuelven como resumen en cada resultado
+LONGITUD_PREVIEW = 150
+
+# Cómo se puntúan las consultas TF-IDF de una en una (ver configurar_puntuacion_tfidf):
+# 'densa' multiplica por la matriz entera; 'postings' recorre solo las listas de los
+# términos de la query (PuntuadorDisperso); 'maxscore' añade la poda MaxScore
+PUNTUACIONES_TFIDF = ('densa', 'postings', 'maxscore')
+
+# Método híbrido (metodo='hibrido', ver configurar_hibrido): candidatos de la primera fase
+# que se puntúan también con la otra representación, peso del TF-IDF en la fusión ponderada
+# y constante k de la fusión por rangos (RRF)
+CANDIDATOS_HIBRIDO = 100
+PESO_TFIDF_HIBRIDO = 0.5
+K_RRF = 60
+FUSIONES_HIBRIDO = ('rrf', 'ponderada')
+
+# Combinaciones de filtros (categorías y fechas) cuya máscara se guarda entre consultas
+MAX_MASCARAS_FILTRO = 64
+
+
+def nombre_modelo_embeddings(modelo=None):
+    """
+    Identidad de un modelo de embeddings, con la que se nombran su caché y los embeddings
+    guardados en el índice: MODELO_EMBEDDINGS si no se inyecta ninguno; si no, su atributo
+    nombre (o name) o, en su defecto, el nombre de su clase.
+    """
+    if modelo is None:
+        return MODELO_EMBEDDINGS
+    return getattr(modelo, "nombre", None) or getattr(modelo, "name", None) or type(modelo).__name__
+
+
+def huella_noticias(base_path_noticias, manifiesto=None):
+    """
+    Calcula una huella (sha1) del contenido de la carpeta de noticias.
+    Cambia si se añade, borra, renombra o modifica cualquier noticia.
+    :param base_path_noticias: Ruta a la carpeta raiz de noticias (o a un almacén de corpus)
+    :param manifiesto: Manifiesto de la última carga. Los archivos con el mismo tamaño y mtime
+                       que en él usan el hash registrado y no se leen: un arranque en caliente
+                       solo hace un stat por archivo. La huella es la misma con o sin manifiesto.
+    """
+    if es_almacen(base_path_noticias):
+        return AlmacenCorpus(base_path_noticias).huella()
+
+    h = hashlib.sha1()
+    # Ordenamos para que la huella no dependa del orden de os.walk
+    for path in sorted(listar_archivos_noticias(base_path_noticias)):
+        ruta = ruta_relativa(path, base_path_noticias)
+        h.update(ruta.encode("utf-8"))
+        h.update(b"\0")
+        entrada = manifiesto.entradas.get(ruta) if manifiesto is not None else None
+        if entrada is not None and entrada["hash"] is not None and manifiesto.sin_cambios(ruta, os.stat(path)):
+            h.update(bytes.fromhex(entrada["hash"]))
+        else:
+            try:
+                with open(path, "rb") as f:
+                    h.update(hashlib.sha1(f.read()).digest())
+            except OSError:
+                pass  # Ilegible (ver Manifiesto): solo cuenta su ruta
+    return h.hexdigest()
+
+
+def tipar_fechas(df):
+    """
+    Convierte las fechas de texto del scraper en columnas datetime64 (NaT si no se
+    reconocen): 'fecha_extraccion' se reescribe y 'fecha_publicacion' se calcula a partir
+    de 'fecha', que se conserva tal cual para mostrarla.
+    """
+    if df.empty:
+        return df
+    extraccion = [parsear_fecha_extraccion(f) for f in df['fecha_extraccion']]
+    df['fecha_publicacion'] = pd.to_datetime([parsear_fecha(f, ref) for f, ref in zip(df['fecha'], extraccion)])
+    df['fecha_extraccion'] = pd.to_datetime(extraccion)
+    return df
+
+
+def _valor_nativo(valor):
+    """Valor de una celda del DataFrame como tipo nativo de Python (fechas como datetime, NaT como None)."""
+    if valor is pd.NaT:
+        return None
+    if isinstance(valor, pd.Timestamp):
+        return valor.to_pydatetime()
+    return valor.item() if hasattr(valor, "item") else valor
+
+
+def _mapeado(array):
+    """True si el array (o aquel del que es vista) está mapeado desde un archivo (np.load con mmap)."""
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return True
+        array = getattr(array, "base", None)
+    return False
+
+
+def _guardar_npy(path, array):
+    """
+    np.save atómico (archivo temporal + rename): los procesos que tengan el archivo
+    anterior mapeado en memoria (load con mmap) siguen viendo la versión vieja intacta.
+    """
+    temporal = path + ".tmp.npy"
+    np.save(temporal, array)
+    os.replace(temporal, path)
+
+
+def _bloques_similitud(vectores_query, matriz_documentos, tam_bloque=None):
+    """
+    Genera (inicio, similitudes) recorriendo las queries por bloques, donde
+    similitudes es la matriz densa de cosenos del bloque contra todos los documentos.
+    :param tam_bloque: Queries por bloque; por defecto se ajusta a MAX_ELEMENTOS_BLOQUE
+    """
+    n_queries = vectores_query.shape[0]
+    if tam_bloque is None:
+        tam_bloque = max(1, MAX_ELEMENTOS_BLOQUE // max(matriz_documentos.shape[0], 1))
+
+    # Embeddings guardados en float16/int8 (ver compactar): se opera en float32
+    if not sp.issparse(matriz_documentos) and matriz_documentos.dtype not in (np.float32, np.float64):
+        matriz_documentos = a_float32(matriz_documentos)
+    if not sp.issparse(vectores_query) and vectores_query.dtype not in (np.float32, np.float64):
+        vectores_query = a_float32(vectores_query)
+
+    # Normalizamos una sola vez: coseno = producto escalar de vectores unitarios
+    docs_norm = normalize(matriz_documentos)
+    for inicio in range(0, n_queries, tam_bloque):
+        bloque = normalize(vectores_query[inicio:inicio + tam_bloque])
+        yield inicio, np.asarray(safe_sparse_dot(bloque, docs_norm.T, dense_output=True))
+
+
+def _argumentos(firma, args, kwargs):
+    """
+    Argumentos de una llamada enlazados con la firma de la función decorada (con los
+    valores por defecto): los decoradores leen metodo, top_n... igual se pasen por
+    posición o por nombre, y la función conserva sus nombres de parámetro.
+    """
+    llamada = firma.bind(*args, **kwargs)
+    llamada.apply_defaults()
+    return llamada
+
+
+def _consulta(tipo):
+    """
+    Decorador de las funciones públicas de recomendación: cuenta las consultas y mide
+    su duración en el registro de métricas del motor, por tipo de consulta y método.
+    """
+    def decorador(funcion):
+        firma = inspect.signature(funcion)
+
+        @functools.wraps(funcion)
+        def envoltura(self, *args, **kwargs):
+            metodo = _argumentos(firma, (self,) + args, kwargs).arguments['metodo']
+            with self.metricas.medir("motor_consulta_segundos", tipo=tipo, metodo=metodo):
+                resultado = funcion(self, *args, **kwargs)
+            self.metricas.contar("motor_consultas_total", tipo=tipo, metodo=metodo)
+            return resultado
+        return envoltura
+    return decorador
+
+
+def _cacheada(tipo, lote=False):
+    """
+    Decorador que sirve las consultas desde self.cache_resultados cuando ya se han
+    hecho con la misma entrada, método, top_n y filtros sobre la misma versión del índice.
+    La entrada es el primer parámetro de la función (tras self); con lote=True es una
+    lista y solo se calculan las que faltan en la caché. Se devuelven copias, para que quien llama pueda modificar los resultados.
+    """
+    def clave(self, entrada, metodo, top_n, filtro):
+        if tipo == "texto" and metodo == 'tfidf':
+            entrada = normalizar_query(entrada)
+        return (tipo, entrada, metodo, top_n, filtro, self.colapsar_duplicados, self.version_indice)
+
+    def consultar_cache(self, entradas, metodo, top_n, filtro):
+        claves = [clave(self, entrada, metodo, top_n, filtro) for entrada in entradas]
+        resultados = [self.cache_resultados.obtener(c) for c in claves]
+        aciertos = sum(r is not None for r in resultados)
+        self.metricas.contar("motor_cache_resultados_total", aciertos, tipo=tipo, resultado="acierto")
+        self.metricas.contar("motor_cache_resultados_total", len(claves) - aciertos, tipo=tipo, resultado="fallo")
+        return claves, resultados
+
+    def decorador(funcion):
+        firma = inspect.signature(funcion)
+        nombre_entrada = list(firma.parameters)[1]
+
+        @functools.wraps(funcion)
+        def envoltura(self, *args, **kwargs):
+            if self.cache_resultados is None:
+                return funcion(self, *args, **kwargs)
+            llamada = _argumentos(firma, (self,) + args, kwargs)
+            argumentos = llamada.arguments
+            entradas = list(argumentos[nombre_entrada]) if lote else [argumentos[nombre_entrada]]
+            metodo, top_n = argumentos['metodo'], argumentos['top_n']
+            filtro = self._clave_filtro(argumentos['categorias'], argumentos['desde'], argumentos['hasta'])
+            claves, resultados = consultar_cache(self, entradas, metodo, top_n, filtro)
+            faltan = [i for i, r in enumerate(resultados) if r is None]
+            if faltan:
+                pendientes = [entradas[i] for i in faltan]
+                argumentos[nombre_entrada] = pendientes if lote else pendientes[0]
+                calculados = funcion(*llamada.args, **llamada.kwargs)
+                for i, resultado in zip(faltan, calculados if lote else [calculados]):
+                    self.cache_resultados.guardar(claves[i], resultado)
+                    resultados[i] = resultado
+            copias = [[dict(r) for r in resultado] for resultado in resultados]
+            return copias if lote else copias[0]
+        return envoltura
+    return decorador
+
+
 class MotorRecomendacion:
-    def __init__(self, base_path_noticias):
+    def __init__(self, base_path_noticias, indice_embeddings='exacto', parametros_indice=None,
+                 ruta_cache_textos=None, n_procesos=None, ruta_cache_embeddings=None,
+                 tam_lote_embeddings=TAM_LOTE_EMBEDDINGS, modelo_embeddings=None, silencioso=False,
+                 metricas=None, compacto=False, tipo_vectores='float32', parametros_lexicos=None):
         """
         Inicializa el motor, carga las noticias y entrena los modelos.
         :param base_path_noticias: Ruta a la carpeta raiz de noticias (ej: 'SSII/noticias')
+                                   o a un almacén de corpus (ver almacen_corpus)
+        :param indice_embeddings: Índice vectorial para el método embeddings ('exacto', 'ivf' o 'cuantizado')
+        :param parametros_indice: dict con los parámetros del índice (ver indice_vectorial)
+        :param ruta_cache_textos: JSON con la caché de textos preprocesados (ver Preprocesador)
+        :param n_procesos: Procesos para el preprocesado (None = automático)
+        :param ruta_cache_embeddings: Carpeta de la caché de embeddings (ver CacheEmbeddings)
+        :param tam_lote_embeddings: Textos por lote al codificar con el modelo
+        :param modelo_embeddings: Modelo ya cargado (cualquier objeto con encode como el de
+                                  sentence-transformers) en lugar de MODELO_EMBEDDINGS,
+                                  p. ej. un modelo de prueba para medir sin red
+        :param silencioso: No imprimir nada en cada consulta (ver self.silencioso)
+        :param metricas: RegistroMetricas donde se miden carga y consultas (por defecto, el compartido)
+        :param compacto: Al terminar, pasar al modo de memoria reducida (ver compactar)
+        :param tipo_vectores: Tipo en que se guardan los embeddings: 'float32', 'float16' o 'int8'
+        :param parametros_lexicos: dict con los parámetros del modelo léxico del método 'tfidf'
+                                   (ver ModeloLexico: TF-IDF o BM25, n-gramas, poda, hashing)
         """
-        self.base_path = base_path_noticias
-        self.df = pd.DataFrame()
-        
-        # Modelos
-        self.vectorizer_tfidf = None
-        self.matrix_tfidf = None
-        self.model_embeddings = None
-        self.matrix_embeddings = None
+        self._inicializar_estado(base_path_noticias)
+        self.modelo_lexico = ModeloLexico(**(parametros_lexicos or {}))
+        self.usar_modelo_embeddings(modelo_embeddings)
+        self.silencioso = silencioso
+        if metricas is not None:
+            self.metricas = metricas
+        self.tipo_indice = indice_embeddings
+        self.parametros_indice = dict(parametros_indice or {})
+        self.tipo_vectores = tipo_vectores
+        self.preprocesador = Preprocesador(ruta_cache=ruta_cache_textos)
+        self.tam_lote_embeddings = tam_lote_embeddings
+        if ruta_cache_embeddings is not None:
+            self.cache_embeddings = CacheEmbeddings(ruta_cache_embeddings, self.nombre_modelo_embeddings)
         
         # 1. Cargar datos
         self._cargar_noticias()
         
         # 2. Preprocesar
         print("Preprocesando textos...")
-        self.df['texto_procesado'] = self.df['contenido_completo'].apply(self._preprocesar_texto)
+        with self.metricas.medir("motor_preprocesado_segundos", origen="corpus"):
+            self.df['texto_procesado'] = self.preprocesador.procesar_lote(self.df['contenido_completo'].tolist(), n_procesos=n_procesos)
+        self.preprocesador.guardar_cache()
+        self._agrupar_duplicados(self.df['id'].tolist(), self.df['texto_procesado'].tolist())
+        self._actualizar_columnas()
         
         # 3. Entrenar BoW + TF-IDF (Obligatorio)
         print("Generando vectores TF-IDF...")
         self._entrenar_tfidf()
         
         # 4. Entrenar Embeddings (Opcional)
-        if EMBEDDINGS_AVAILABLE:
+        if self._embeddings_disponibles():
             print("Generando Embeddings (esto puede tardar un poco)...")
             self._generar_embeddings()
 
-    def _cargar_noticias(self):
-        """Recorre las carpetas y carga los .txt generados por el scraper."""
-        data = []
-        # Recorremos recursivamente
-        for root, dirs, files in os.walk(self.base_path):
-            for file in files:
-                if file.endswith(".txt") and "enlaceen" not in file: # Ignoramos los archivos de control
-                    path = os.path.join(root, file)
-                    try:
-                        # Asumimos el formato de tu scraper: fecha;titulo;cuerpo;fecha_extraccion
-                        with open(path, "r", encoding="utf-8") as f:
-                            line = f.read().strip()
-                            parts = line.split(";")
-                            if len(parts) >= 3:
-                                # Unimos título y cuerpo para una mejor recomendación
-                                titulo = parts[1]
-                                cuerpo = parts[2]
-                                contenido_completo = f"{titulo}. {cuerpo}"
-                                
-                                data.append({
-                                    "filename": file,
-                                    "titulo": titulo,
-                                    "cuerpo": cuerpo,
-                                    "contenido_completo": contenido_completo,
-                                    "categoria": os.path.basename(os.path.dirname(os.path.dirname(path))) # Intentar sacar categoria del path
-                                })
-                    except Exception as e:
-                        print(f"Error leyendo {file}: {e}")
+        if compacto:
+            self.compactar()
+
+    def _inicializar_estado(self, base_path_noticias):
+        """Deja el motor vacío (sin datos ni modelos) apuntando a base_path_noticias."""
+        self.base_path = base_path_noticias
+        self.df = pd.DataFrame()
         
-        self.df = pd.DataFrame(data)
-        # Creamos un ID numérico para facilitar referencias
-        self.df['id'] = range(len(self.df))
+        # Modelos (el léxico del método 'tfidf' puede ponderar con TF-IDF o BM25, ver ModeloLexico)
+        self.modelo_lexico = ModeloLexico()
+        self.matrix_tfidf = None
+        self.model_embeddings = None
+        self.nombre_modelo_embeddings = MODELO_EMBEDDINGS
+        self.matrix_embeddings = None
+        # Tipos de las matrices: los embeddings se guardan normalizados (ver indice_vectorial.comprimir)
+        self.tipo_tfidf = 'float64'
+        self.tipo_vectores = 'float32'
+        # Textos largos fuera de la RAM (solo en modo compacto, ver compactar) y carpeta
+        # temporal donde están hasta que se guarda el índice
+        self.textos = None
+        self._carpeta_textos_temporal = None
+        self.preprocesador = Preprocesador()
+        # Caché persistente de embeddings (opcional) y tamaño de lote para el modelo
+        self.cache_embeddings = None
+        self.tam_lote_embeddings = TAM_LOTE_EMBEDDINGS
+
+        # Índice vectorial sobre matrix_embeddings (ver configurar_indice_embeddings)
+        self.tipo_indice = 'exacto'
+        self.parametros_indice = {}
+        self.indice_embeddings = None
+
+        # Estado de la ingesta incremental
+        self._docs_desde_idf = 0
+        self.manifiesto = Manifiesto()
+        self.errores_carga = []
+
+        # Observabilidad: registro de métricas (tiempos y contadores) y modo silencioso,
+        # que quita los print de cada consulta (en producción cuestan tiempo y ensucian stdout)
+        self.metricas = METRICAS
+        self.silencioso = False
+
+        # Caché de resultados de consultas (None = desactivada). Sus claves llevan la
+        # versión del índice, que sube cada vez que cambian las noticias o los modelos
+        self.cache_resultados = CacheResultados()
+        self.version_indice = 0
+
+        # Grupos de noticias casi duplicadas (MinHash + LSH). Con colapsar_duplicados,
+        # cada grupo aparece una sola vez en los resultados
+        self.duplicados = DetectorDuplicados()
+        self.colapsar_duplicados = True
+        self._actualizar_columnas()
+
+        # Puntuación de las consultas TF-IDF; el índice por términos se crea con la primera
+        # consulta después de cada cambio de la matriz (ver _top_tfidf)
+        self.puntuacion_tfidf = 'postings'
+        self._puntuador_tfidf = None
+
+        # Método híbrido: primera fase, fusión y sus parámetros (ver configurar_hibrido)
+        self.config_hibrido = {"primera_fase": 'tfidf', "fusion": 'rrf', "n_candidatos": CANDIDATOS_HIBRIDO,
+                               "peso_tfidf": PESO_TFIDF_HIBRIDO, "k_rrf": K_RRF}
+
+        # Tabla de vecinos precalculada (opcional), por método:
+        # {"posiciones": (n, k) int64 con -1 de relleno, "similitudes": (n, k)}
+        self.tabla_vecinos = {}
+
+    # --- PERSISTENCIA DEL ÍNDICE ---
+
+    def save(self, path):
+        """
+        Guarda en disco todo lo necesario para arrancar sin reentrenar:
+        tabla de noticias, vocabulario/IDF del modelo léxico, matriz TF-IDF y embeddings.
+        :param path: Carpeta destino del índice (se crea si no existe)
+        """
+        os.makedirs(path, exist_ok=True)
+
+        self.df.to_pickle(os.path.join(path, "documentos.pkl"))
+        if self.textos is not None:
+            # A partir de aquí se lee del almacén guardado (el temporal deja de hacer falta)
+            self.textos = self.textos.guardar(os.path.join(path, "textos"), self._col_ids.tolist())
+            if self._carpeta_textos_temporal is not None:
+                shutil.rmtree(self._carpeta_textos_temporal, ignore_errors=True)
+                self._carpeta_textos_temporal = None
+        np.save(os.path.join(path, "idf.npy"), self.modelo_lexico.idf)
+        # Matrices en .npy sin comprimir para poder abrirlas mapeadas en memoria (load con mmap)
+        matriz_tfidf = sp.csr_matrix(self.matrix_tfidf)
+        for parte in ("data", "indices", "indptr"):
+            _guardar_npy(os.path.join(path, f"tfidf_{parte}.npy"), getattr(matriz_tfidf, parte))
+        if self.matrix_embeddings is not None:
+            # Ya normalizados (y en su tipo): el índice vectorial los usa tal cual, sin copiarlos al cargar
+            _guardar_npy(os.path.join(path, "embeddings.npy"), self.matrix_embeddings)
+        if self.indice_embeddings is not None:
+            self.indice_embeddings.guardar(os.path.join(path, "indice_embeddings"))
+        self.duplicados.guardar(os.path.join(path, "duplicados"))
+        self.manifiesto.guardar(os.path.join(path, "manifiesto.json"))
+        # Caché de textos preprocesados: acelera un futuro reentrenamiento desde cero
+        self.preprocesador.guardar_cache(os.path.join(path, "cache_textos.json"))
+
+        for metodo, tabla in self.tabla_vecinos.items():
+            _guardar_npy(os.path.join(path, f"vecinos_{metodo}_posiciones.npy"), tabla["posiciones"])
+            _guardar_npy(os.path.join(path, f"vecinos_{metodo}_similitudes.npy"), tabla["similitudes"])
+
+        meta = {
+            "formato": FORMATO_INDICE,
+            "huella": huella_noticias(self.base_path, self.manifiesto) if os.path.isdir(self.base_path) else None,
+            "creado": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "n_documentos": len(self.df),
+            "forma_tfidf": list(self.matrix_tfidf.shape),
+            "modelo_embeddings": self.nombre_modelo_embeddings if self.matrix_embeddings is not None else None,
+            "compacto": self.textos is not None,
+            "tipo_tfidf": self.tipo_tfidf,
+            "tipo_vectores": self.tipo_vectores,
+            "docs_desde_idf": int(self._docs_desde_idf),
+            "tablas_vecinos": sorted(self.tabla_vecinos),
+            "indice_embeddings": {"tipo": self.tipo_indice, "parametros": self.parametros_indice},
+            "duplicados": self.duplicados.parametros(),
+            "hibrido": self.config_hibrido,
+            "puntuacion_tfidf": self.puntuacion_tfidf,
+            "modelo_lexico": self.modelo_lexico.parametros(),
+            "longitud_media": self.modelo_lexico.longitud_media,
+            "vocabulario": (
+                {termino: int(col) for termino, col in self.modelo_lexico.vocabulario.items()}
+                if self.modelo_lexico.vocabulario is not None else None
+            ),
+        }
+        # meta.json se escribe al final: si falta, el índice está incompleto
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        print(f"Índice guardado en {path} ({len(self.df)} noticias)")
+
+    @classmethod
+    def load(cls, path, base_path_noticias=None, mmap=False, modelo_embeddings=None):
+        """
+        Carga un índice guardado con save() sin volver a entrenar nada.
+        :param path: Carpeta del índice
+        :param base_path_noticias: Si se indica, se comprueba que la huella de esa carpeta
+                                   coincide con la del índice (si no, ValueError)
+        :param mmap: Abre las matrices TF-IDF y de embeddings y las tablas de vecinos mapeadas
+                     en memoria (solo lectura) en vez de leerlas: arranca sin copiar nada y
+                     varios procesos que carguen el mismo índice comparten esas páginas
+        :param modelo_embeddings: Modelo de embeddings inyectado (None = MODELO_EMBEDDINGS). Los
+                                  embeddings guardados solo se cargan si son de ese modelo
+        """
+        meta_path = os.path.join(path, "meta.json")
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"No hay un índice válido en {path}")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get("formato") != FORMATO_INDICE:
+            raise ValueError(f"Formato de índice {meta.get('formato')} no soportado (se esperaba {FORMATO_INDICE})")
+        manifiesto = Manifiesto.cargar(os.path.join(path, "manifiesto.json"))
+        if base_path_noticias is not None and meta.get("huella") != huella_noticias(base_path_noticias, manifiesto):
+            raise ValueError("El índice está desactualizado respecto a la carpeta de noticias")
+
+        motor = cls.__new__(cls)
+        motor._inicializar_estado(base_path_noticias if base_path_noticias is not None else path)
+        motor.df = pd.read_pickle(os.path.join(path, "documentos.pkl"))
+        motor.tipo_tfidf = meta["tipo_tfidf"]
+        motor.tipo_vectores = meta["tipo_vectores"]
+        if meta["compacto"]:
+            motor.textos = AlmacenTextos(os.path.join(path, "textos"))
+        motor.manifiesto = manifiesto
+        motor._docs_desde_idf = meta["docs_desde_idf"]
+        motor.huella_indice = meta.get("huella")
+        motor.config_hibrido = meta["hibrido"]
+        motor.puntuacion_tfidf = meta["puntuacion_tfidf"]
+        motor.duplicados = DetectorDuplicados(**meta["duplicados"])
+        motor.duplicados.cargar(os.path.join(path, "duplicados"))
+        motor._actualizar_columnas()
+
+        # Reconstruimos el modelo léxico a partir del vocabulario y el IDF guardados
+        motor.modelo_lexico = ModeloLexico(**meta["modelo_lexico"]).restaurar(
+            meta["vocabulario"], np.load(os.path.join(path, "idf.npy")), meta["longitud_media"]
+        )
+        modo = 'r' if mmap else None
+        partes = [np.load(os.path.join(path, f"tfidf_{parte}.npy"), mmap_mode=modo) for parte in ("data", "indices", "indptr")]
+        motor.matrix_tfidf = sp.csr_matrix(tuple(partes), shape=tuple(meta["forma_tfidf"]), copy=False)
+
+        emb_path = os.path.join(path, "embeddings.npy")
+        motor.usar_modelo_embeddings(modelo_embeddings)
+        # Solo se reutilizan los embeddings generados con este mismo modelo
+        if (motor._embeddings_disponibles() and meta.get("modelo_embeddings") == motor.nombre_modelo_embeddings
+                and os.path.exists(emb_path)):
+            motor.matrix_embeddings = np.load(emb_path, mmap_mode=modo)
+            motor.tipo_indice = meta["indice_embeddings"]["tipo"]
+            motor.parametros_indice = meta["indice_embeddings"]["parametros"]
+            motor.indice_embeddings = crear_indice(motor.tipo_indice, **motor.parametros_indice)
+            motor.indice_embeddings.cargar(os.path.join(path, "indice_embeddings"), motor.matrix_embeddings,
+                                           normalizados=True)
+
+        for metodo in meta["tablas_vecinos"]:
+            if motor._matriz_metodo(metodo) is not None:
+                motor.tabla_vecinos[metodo] = {
+                    "posiciones": np.load(os.path.join(path, f"vecinos_{metodo}_posiciones.npy"), mmap_mode=modo),
+                    "similitudes": np.load(os.path.join(path, f"vecinos_{metodo}_similitudes.npy"), mmap_mode=modo),
+                }
+
+        print(f"Índice cargado desde {path} ({len(motor.df)} noticias)")
+        return motor
+
+    @classmethod
+    def cargar_o_construir(cls, base_path_noticias, path, k_vecinos=None, indice_embeddings=None, parametros_indice=None,
+                           compacto=False, tipo_vectores=None, mmap=False, puntuacion_tfidf=None,
+                           parametros_lexicos=None, modelo_embeddings=None):
+        """
+        Arranque en caliente: usa el índice de 'path' si existe. Si las noticias han
+        cambiado desde que se guardó, se actualiza de forma incremental (refresh) y se
+        vuelve a guardar. Si no hay índice utilizable, entrena desde cero y lo guarda.
+        :param k_vecinos: Si se indica, asegura que el índice tenga tabla de vecinos con ese k
+        :param indice_embeddings: Si se indica, asegura ese tipo de índice vectorial (y parámetros)
+        :param compacto: Asegura que el motor esté en modo compacto (ver compactar)
+        :param tipo_vectores: Si se indica, asegura ese tipo para los embeddings ('float32', 'float16' o 'int8')
+        :param mmap: Cargar el índice mapeado en memoria (ver load)
+        :param puntuacion_tfidf: Si se indica, la puntuación TF-IDF (ver configurar_puntuacion_tfidf)
+        :param parametros_lexicos: Si se indica, asegura ese modelo léxico (ver configurar_modelo_lexico)
+        :param modelo_embeddings: Modelo de embeddings a usar en vez de MODELO_EMBEDDINGS; los
+                                  embeddings guardados con otro modelo se regeneran
+        """
+        try:
+            motor = cls.load(path, mmap=mmap, modelo_embeddings=modelo_embeddings)
+            guardar = False
+        except (FileNotFoundError, ValueError) as e:
+            print(f"No se usa el índice guardado: {e}")
+            motor = cls(
+                base_path_noticias,
+                indice_embeddings=indice_embeddings or 'exacto',
+                parametros_indice=parametros_indice,
+                ruta_cache_textos=os.path.join(path, "cache_textos.json"),
+                ruta_cache_embeddings=os.path.join(path, "cache_embeddings")
+                if EMBEDDINGS_AVAILABLE or modelo_embeddings is not None else None,
+                modelo_embeddings=modelo_embeddings,
+                compacto=compacto,
+                tipo_vectores=tipo_vectores or 'float32',
+                parametros_lexicos=parametros_lexicos,
+            )
+            guardar = not motor.df.empty
+        else:
+            motor.base_path = base_path_noticias
+            if motor._embeddings_disponibles():
+                motor.cache_embeddings = CacheEmbeddings(os.path.join(path, "cache_embeddings"),
+                                                         motor.nombre_modelo_embeddings)
+            if motor.huella_indice != huella_noticias(base_path_noticias, motor.manifiesto):
+                motor.refresh()
+                guardar = True
+            if motor.matrix_embeddings is None and motor._embeddings_disponibles() and not motor.df.empty:
+                # Índice guardado sin embeddings o con los de otro modelo: se generan con el actual
+                motor._generar_embeddings()
+                guardar = True
+            if indice_embeddings is not None and (
+                indice_embeddings != motor.tipo_indice or dict(parametros_indice or {}) != motor.parametros_indice
+            ):
+                motor.configurar_indice_embeddings(indice_embeddings, **(parametros_indice or {}))
+                guardar = True
+            if compacto and motor.textos is None:
+                motor.compactar()
+                guardar = True
+            if tipo_vectores is not None and tipo_vectores != motor.tipo_vectores:
+                motor.convertir_embeddings(tipo_vectores)
+                guardar = True
+            if parametros_lexicos is not None and (
+                ModeloLexico(**parametros_lexicos).parametros() != motor.modelo_lexico.parametros()
+            ):
+                motor.configurar_modelo_lexico(**parametros_lexicos)
+                guardar = True
+
+        if puntuacion_tfidf is not None and puntuacion_tfidf != motor.puntuacion_tfidf:
+            motor.configurar_puntuacion_tfidf(puntuacion_tfidf)
+            guardar = guardar or not motor.df.empty
+
+        if k_vecinos is not None and not motor.df.empty:
+            faltan = [
+                metodo for metodo in ('tfidf', 'embeddings')
+                if motor._matriz_metodo(metodo) is not None
+                and (metodo not in motor.tabla_vecinos or motor.tabla_vecinos[metodo]["posiciones"].shape[1] < k_vecinos)
+            ]
+            if faltan:
+                motor.construir_tabla_vecinos(k=k_vecinos, metodos=faltan)
+                guardar = True
+
+        if guardar:
+            motor.save(path)
+        return motor
+
+    # --- INGESTA INCREMENTAL ---
+
+    def add_documents(self, rutas):
+        """
+        Añade noticias nuevas (o actualiza las ya cargadas desde la misma ruta) sin
+        reentrenar el motor: se preprocesan y vectorizan solo esos archivos y se
+        añaden filas a las matrices. Las noticias actualizadas conservan su id.
+        :param rutas: Lista de rutas a .txt del scraper (o claves '#<id>' si la fuente es un almacén)
+        :return: Lista de ids añadidos o actualizados
+        """
+        cargador = self._cargador()
+        registros = list(cargador.registros(rutas))
+        self._registrar_errores(cargador.errores)
+        if not registros:
+            return []
+
+        nuevos = tipar_fechas(pd.DataFrame(registros))
+
+        # Las rutas ya presentes se reemplazan manteniendo su id
+        ids_previos = {}
+        if not self.df.empty:
+            ids_previos = dict(zip(self.df['ruta'], self.df['id']))
+        ids = self._asignar_ids(registros, ids_previos)
+        nuevos['id'] = ids
+        self._eliminar_filas(self.df['id'].isin(ids).values if not self.df.empty else None)
+
+        with self.metricas.medir("motor_preprocesado_segundos", origen="corpus"):
+            nuevos['texto_procesado'] = self.preprocesador.procesar_lote(nuevos['contenido_completo'].tolist())
+        self._agrupar_duplicados(ids, nuevos['texto_procesado'].tolist())
+        if self.textos is not None:
+            # Modo compacto: los textos van al almacén y a la tabla solo las columnas ligeras
+            self.textos.agregar_lote(ids, {campo: nuevos[campo].tolist() for campo in CAMPOS_TEXTO})
+            self.df = self._tabla_compacta(pd.concat([self.df, self._tabla_compacta(nuevos)], ignore_index=True))
+        else:
+            self.df = pd.concat([self.df, nuevos], ignore_index=True)
+        self._actualizar_columnas()
+
+        if not self.modelo_lexico.ajustado or self.matrix_tfidf is None or self.matrix_tfidf.shape[0] == 0:
+            self._entrenar_tfidf()
+            self._docs_desde_idf = 0
+        else:
+            # Vocabulario e IDF fijos: los términos nuevos se ignoran hasta el próximo refresco
+            # (con hashing no hay vocabulario: solo se queda fijo el IDF)
+            self.matrix_tfidf = sp.vstack(
+                [sp.csr_matrix(self.matrix_tfidf), self._vectorizar(nuevos['texto_procesado'])],
+                format="csr",
+            )
+            self._docs_desde_idf += len(nuevos)
+            if self._docs_desde_idf > UMBRAL_REFRESCO_IDF * len(self.df):
+                self.refrescar_idf()
+
+        if self.matrix_embeddings is not None:
+            emb_nuevos = comprimir(self._codificar(nuevos['contenido_completo'].tolist()), self.tipo_vectores)
+            self.indice_embeddings.agregar(emb_nuevos, normalizados=True)
+            # El motor y el índice comparten la misma matriz (una sola copia)
+            self.matrix_embeddings = self.indice_embeddings.vectores
+        elif self._embeddings_disponibles() and len(self.df) == len(nuevos):
+            self._generar_embeddings()
+
+        self._ampliar_tabla_vecinos()
+        self._nueva_version()
+
+        print(f"Noticias añadidas/actualizadas: {len(nuevos)} (total {len(self.df)})")
+        return ids
+
+    def remove_documents(self, ids):
+        """
+        Elimina noticias del motor por id. El resto conserva su id.
+        :return: Número de noticias eliminadas
+        """
+        if self.df.empty:
+            return 0
+        mascara = self.df['id'].isin(list(ids)).values
+        n = int(mascara.sum())
+        self._eliminar_filas(mascara)
+        if n:
+            print(f"Noticias eliminadas: {n} (total {len(self.df)})")
+        return n
+
+    def refresh(self):
+        """
+        Sincroniza el motor con la carpeta de noticias: añade los archivos nuevos,
+        actualiza los modificados (tamaño/mtime distinto y hash distinto) y elimina los borrados.
+        Un archivo modificado que ya no se puede cargar (ilegible o sin formato) también se elimina.
+        :return: dict con los ids nuevos, actualizados y eliminados
+        """
+        cargador = self._cargador()
+        nuevas, modificadas, eliminadas = cargador.detectar_cambios()
+
+        conocidas = {}
+        if not self.df.empty:
+            conocidas = dict(zip(self.df['ruta'], self.df['id'].tolist()))
+        ids_eliminados = [conocidas[ruta] for ruta in eliminadas if ruta in conocidas]
+        ids_actualizados = [
+            conocidas[ruta] for ruta in (cargador.clave(p) for p in modificadas) if ruta in conocidas
+        ]
+        for ruta in eliminadas:
+            self.manifiesto.eliminar(ruta)
+
+        self.remove_documents(ids_eliminados)
+        ids_tocados = self.add_documents(nuevas + modificadas)
+        # Las modificadas que no han dado registro han fallado al releerlas: fuera del motor
+        tocados = set(ids_tocados)
+        ids_fallidos = [i for i in ids_actualizados if i not in tocados]
+        if ids_fallidos:
+            self.remove_documents(ids_fallidos)
+            ids_actualizados = [i for i in ids_actualizados if i not in ids_fallidos]
+            ids_eliminados = ids_eliminados + ids_fallidos
+
+        return {
+            "nuevas": [int(i) for i in ids_tocados if i not in ids_actualizados],
+            "actualizadas": ids_actualizados,
+            "eliminadas": ids_eliminados,
+        }
+
+    def refrescar_idf(self):
+        """Reajusta vocabulario e IDF con el corpus actual (los embeddings no se tocan)."""
+        print("Reajustando vocabulario e IDF del modelo léxico...")
+        self._entrenar_tfidf()
+        self._docs_desde_idf = 0
+        # Con otro IDF cambian todas las similitudes TF-IDF
+        if 'tfidf' in self.tabla_vecinos:
+            k = self.tabla_vecinos['tfidf']["posiciones"].shape[1]
+            self.construir_tabla_vecinos(k=k, metodos=['tfidf'])
+
+    def _eliminar_filas(self, mascara):
+        """Quita del DataFrame y de las matrices las filas marcadas en la máscara booleana."""
+        if mascara is None or not mascara.any():
+            return
+        conservar = np.flatnonzero(~mascara)
+        for id_noticia in self._col_ids[mascara].tolist():
+            self.duplicados.eliminar(id_noticia)
+            if self.textos is not None:
+                self.textos.eliminar(id_noticia)
+        self.df = self.df.iloc[conservar].reset_index(drop=True)
+        self._actualizar_columnas()
+        if self.matrix_tfidf is not None:
+            self.matrix_tfidf = sp.csr_matrix(self.matrix_tfidf)[conservar]
+        if self.matrix_embeddings is not None:
+            self.indice_embeddings.conservar(conservar)
+            self.matrix_embeddings = self.indice_embeddings.vectores
+
+        # Tabla de vecinos: renumeramos posiciones y recalculamos las filas que apuntaban a eliminadas
+        nueva_posicion = np.full(len(mascara) + 1, -1, dtype=np.int64)  # el último índice mapea el relleno -1
+        nueva_posicion[conservar] = np.arange(len(conservar))
+        for metodo, tabla in self.tabla_vecinos.items():
+            posiciones = tabla["posiciones"][conservar]
+            similitudes = tabla["similitudes"][conservar]
+            afectadas = np.flatnonzero(((posiciones >= 0) & (nueva_posicion[posiciones] < 0)).any(axis=1))
+            posiciones = nueva_posicion[posiciones]
+            if len(afectadas):
+                k = posiciones.shape[1]
+                posiciones[afectadas], similitudes[afectadas] = self._calcular_vecinos(
+                    self._matriz_metodo(metodo), afectadas, k
+                )
+            self.tabla_vecinos[metodo] = {"posiciones": posiciones, "similitudes": similitudes}
+        self._nueva_version()
+
+    # --- MODO COMPACTO (MEMORIA) ---
+
+    def compactar(self, tipo_vectores=None, ruta_textos=None):
+        """
+        Pasa al modo de memoria reducida, para servir corpus grandes o muchos procesos:
+        - cuerpo y texto preprocesado salen de la tabla a un AlmacenTextos en disco y se leen
+          solo cuando hacen falta (resúmenes de los resultados, detalle de una noticia,
+          reajuste del TF-IDF); contenido_completo (título + cuerpo) y filename se descartan
+        - la tabla se queda con COLUMNAS_COMPACTAS y la categoría como category
+        - la matriz TF-IDF y su tabla de vecinos pasan a float32
+        - opcionalmente, los embeddings pasan a float16 o int8 (ver convertir_embeddings)
+        save() guarda el almacén junto al índice y load() lo vuelve a abrir.
+        :param tipo_vectores: Tipo para los embeddings (None = el actual)
+        :param ruta_textos: Ruta base del almacén (por defecto, una carpeta temporal hasta que se guarde)
+        """
+        if self.textos is None:
+            if ruta_textos is None:
+                self._carpeta_textos_temporal = tempfile.mkdtemp(prefix="motor_textos_")
+                ruta_textos = os.path.join(self._carpeta_textos_temporal, "textos")
+            textos = AlmacenTextos(ruta_textos)
+            if not self.df.empty:
+                textos.agregar_lote(self._col_ids.tolist(), {campo: self.df[campo].tolist() for campo in CAMPOS_TEXTO})
+            self.textos = textos
+            self.df = self._tabla_compacta(self.df)
+            self._actualizar_columnas()
+
+        if self.tipo_tfidf != 'float32':
+            self.tipo_tfidf = 'float32'
+            if self.matrix_tfidf is not None:
+                self.matrix_tfidf = sp.csr_matrix(self.matrix_tfidf).astype(np.float32)
+            if 'tfidf' in self.tabla_vecinos:
+                tabla = self.tabla_vecinos['tfidf']
+                tabla["similitudes"] = tabla["similitudes"].astype(np.float32)
+
+        if tipo_vectores is not None:
+            self.convertir_embeddings(tipo_vectores)
+        self._nueva_version()
+
+    def convertir_embeddings(self, tipo):
+        """
+        Guarda los embeddings como 'float32', 'float16' (la mitad de memoria) o 'int8' (la
+        cuarta parte), a cambio de algo de precisión en las similitudes y de convertir a
+        float32 lo que se compara en cada consulta: con el índice exacto, una consulta por
+        texto recorre la matriz entera (con IVF o la tabla de vecinos se nota mucho menos).
+        El índice vectorial conserva sus listas y pasa a usar la nueva matriz.
+        """
+        if tipo not in TIPOS_VECTORES:
+            raise ValueError(f"Tipo de vectores desconocido: {tipo} (disponibles: {', '.join(TIPOS_VECTORES)})")
+        self.tipo_vectores = tipo
+        if self.matrix_embeddings is None or self.matrix_embeddings.dtype == np.dtype(tipo):
+            return
+        self.matrix_embeddings = comprimir(a_float32(self.matrix_embeddings), tipo)
+        self.indice_embeddings.usar_vectores(self.matrix_embeddings)
+        self._nueva_version()
+
+    @staticmethod
+    def _tabla_compacta(df):
+        """Tabla de noticias del modo compacto: solo COLUMNAS_COMPACTAS, con la categoría como category."""
+        df = df[[c for c in COLUMNAS_COMPACTAS if c in df.columns]]
+        if 'categoria' in df.columns:
+            df = df.assign(categoria=df['categoria'].astype('category'))
+        return df
+
+    def _textos(self, campo):
+        """
+        Texto de un campo ('cuerpo', 'texto_procesado' o 'contenido_completo') de todas las
+        noticias, en orden: de la tabla o, en modo compacto, del almacén de textos.
+        """
+        if self.df.empty:
+            return []
+        if campo in self.df.columns:
+            return self.df[campo].tolist()
+        if campo == 'contenido_completo':
+            cuerpos = self.textos.obtener_lote(self._col_ids.tolist(), 'cuerpo')
+            return [f"{titulo}. {cuerpo}" for titulo, cuerpo in zip(self._col_titulos, cuerpos)]
+        return self.textos.obtener_lote(self._col_ids.tolist(), campo)
+
+    def memoria(self):
+        """
+        Bytes que ocupa cada parte del motor. 'ram' es memoria propia del proceso; en
+        'compartida' van las matrices mapeadas desde disco (load con mmap), que comparten
+        todos los procesos que cargan el mismo índice, y en 'disco' el almacén de textos.
+        :return: dict con el desglose, los totales y los bytes por noticia
+        """
+        ram, compartida = {}, {}
+
+        def anotar(parte, *arrays):
+            for array in arrays:
+                if array is None:
+                    continue
+                destino = compartida if _mapeado(array) else ram
+                destino[parte] = destino.get(parte, 0) + int(array.nbytes)
+
+        ram["tabla"] = int(self.df.memory_usage(deep=True).sum()) if not self.df.empty else 0
+        if self._col_previews is not None:
+            ram["resumenes"] = int(sum(len(p) for p in self._col_previews)) + self._col_previews.nbytes
+        anotar("columnas", self._col_ids, self._col_titulos, self._col_grupos)
+        if self.matrix_tfidf is not None:
+            matriz = self.matrix_tfidf
+            anotar("tfidf", matriz.data, matriz.indices, matriz.indptr)
+        if self.modelo_lexico.ajustado:
+            ram["modelo_lexico"] = self.modelo_lexico.memoria()
+        if self._puntuador_tfidf is not None and self._puntuador_tfidf.matriz is self.matrix_tfidf:
+            anotar("puntuador_tfidf", *self._puntuador_tfidf.estructuras())
+        anotar("embeddings", self.matrix_embeddings)
+        if self.indice_embeddings is not None:
+            if self.indice_embeddings.vectores is not self.matrix_embeddings:
+                anotar("indice_embeddings", self.indice_embeddings.vectores)
+            anotar("indice_embeddings", *self.indice_embeddings.estructuras())
+        for metodo, tabla in self.tabla_vecinos.items():
+            anotar(f"vecinos_{metodo}", tabla["posiciones"], tabla["similitudes"])
+        anotar("duplicados", *self.duplicados.firmas.values())
+        if self._indice_palabras is not None:
+            ram["indice_palabras"] = self._indice_palabras.memoria()
+
+        disco = {"textos": self.textos.bytes_en_disco()} if self.textos is not None else {}
+        n = max(len(self._col_ids), 1)
+        total_ram = sum(ram.values())
+        return {
+            "ram": ram,
+            "compartida": compartida,
+            "disco": disco,
+            "total_ram": total_ram,
+            "total_compartida": sum(compartida.values()),
+            "bytes_por_noticia": round((total_ram + sum(compartida.values())) / n, 1),
+            "bytes_por_noticia_ram": round(total_ram / n, 1),
+        }
+
+    # --- TABLA DE VECINOS PRECALCULADA ---
+
+    def construir_tabla_vecinos(self, k=K_VECINOS, metodos=('tfidf', 'embeddings'), tam_bloque=None):
+        """
+        Precalcula, para cada noticia, sus k noticias más similares con cada método.
+        Con la tabla construida, recomendar_por_noticia (con top_n <= k) es una simple lectura.
+        Se calcula por bloques para acotar la memoria y se guarda junto al índice (save).
+        """
+        for metodo in metodos:
+            matriz = self._matriz_metodo(metodo)
+            if matriz is None:
+                continue
+            print(f"Calculando tabla de vecinos ({metodo}, k={k})...")
+            posiciones, similitudes = self._calcular_vecinos(matriz, np.arange(matriz.shape[0]), k, tam_bloque)
+            self.tabla_vecinos[metodo] = {"posiciones": posiciones, "similitudes": similitudes}
+
+    def _calcular_vecinos(self, matriz, posiciones, k, tam_bloque=None):
+        """Calcula las k vecinas (posiciones y similitudes) de las filas 'posiciones' de la matriz."""
+        posiciones = np.asarray(posiciones)
+        vecinas = np.full((len(posiciones), k), -1, dtype=np.int64)
+        # float16/int8 se comparan en float32 (ver _bloques_similitud)
+        similitudes = np.full((len(posiciones), k), -np.inf, dtype=np.result_type(matriz.dtype, np.float32))
+        for inicio, bloque in _bloques_similitud(matriz[posiciones], matriz, tam_bloque):
+            for j, fila in enumerate(bloque):
+                indices = top_k(fila, k, excluir=posiciones[inicio + j])
+                vecinas[inicio + j, :len(indices)] = indices
+                similitudes[inicio + j, :len(indices)] = fila[indices]
+        return vecinas, similitudes
+
+    def _ampliar_tabla_vecinos(self):
+        """
+        Parchea las tablas de vecinos tras añadir filas al final de las matrices:
+        calcula las vecinas de las noticias nuevas y mete las nuevas en las listas
+        de las antiguas cuando superan a alguna de sus vecinas actuales.
+        """
+        for metodo, tabla in self.tabla_vecinos.items():
+            matriz = self._matriz_metodo(metodo)
+            n_previas, k = tabla["posiciones"].shape
+            n = matriz.shape[0]
+            if n_previas >= n:
+                continue
+            nuevas = np.arange(n_previas, n)
+
+            posiciones = tabla["posiciones"].copy()
+            similitudes = tabla["similitudes"].copy()
+            for inicio, bloque in _bloques_similitud(matriz[:n_previas], matriz[nuevas]):
+                fin = inicio + len(bloque)
+                pos_todas = np.hstack([posiciones[inicio:fin], np.broadcast_to(nuevas, bloque.shape)])
+                sim_todas = np.hstack([similitudes[inicio:fin], bloque.astype(similitudes.dtype)])
+                # Mismo criterio que top_k: similitud descendente, empates por posición mayor
+                orden = np.lexsort((-pos_todas, -sim_todas), axis=-1)[:, :k]
+                posiciones[inicio:fin] = np.take_along_axis(pos_todas, orden, axis=1)
+                similitudes[inicio:fin] = np.take_along_axis(sim_todas, orden, axis=1)
+
+            pos_nuevas, sim_nuevas = self._calcular_vecinos(matriz, nuevas, k)
+            self.tabla_vecinos[metodo] = {
+                "posiciones": np.vstack([posiciones, pos_nuevas]),
+                "similitudes": np.vstack([similitudes, sim_nuevas]),
+            }
+
+    def _vecinos_desde_tabla(self, metodo, idx, top_n, permitidas=None):
+        """
+        Lee de la tabla las top_n vecinas de la posición idx (None si no hay tabla suficiente,
+        p. ej. si al colapsar duplicados o al filtrar quedan menos de top_n y la fila no tiene más).
+        :param permitidas: Máscara de las noticias que pueden salir (ver _mascara_filtro)
+        """
+        tabla = self.tabla_vecinos.get(metodo)
+        if tabla is None or top_n > tabla["posiciones"].shape[1]:
+            return None
+        posiciones = tabla["posiciones"][idx]
+        similitudes = tabla["similitudes"][idx]
+        validas = posiciones >= 0
+        completa = validas.all()
+        if permitidas is not None:
+            validas &= permitidas[np.maximum(posiciones, 0)]
+        resultados = self._materializar(posiciones[validas], similitudes[validas], top_n, excluir=idx)
+        # Fila completa (sin relleno) pero sin top_n grupos distintos: puede haber más fuera de la tabla
+        if len(resultados) < top_n and completa:
+            self.metricas.contar("motor_tabla_vecinos_total", metodo=metodo, resultado="insuficiente")
+            return None
+        self.metricas.contar("motor_tabla_vecinos_total", metodo=metodo, resultado="acierto")
+        return resultados
+
+    # --- ÍNDICE VECTORIAL (EMBEDDINGS) ---
+
+    def configurar_indice_embeddings(self, tipo='exacto', **parametros):
+        """
+        Cambia el índice vectorial del método embeddings y lo reconstruye.
+        'exacto' = fuerza bruta; 'ivf' = aproximado (n_listas, n_sondas, iteraciones, semilla);
+        'cuantizado' = recorrido de códigos int8 o PQ y reordenación exacta de los mejores
+        candidatos (cuantizacion, factor_reordenacion, n_subespacios, iteraciones, semilla).
+        """
+        self.tipo_indice = tipo
+        self.parametros_indice = dict(parametros)
+        self._construir_indice_embeddings()
+
+    def _construir_indice_embeddings(self):
+        if self.matrix_embeddings is None:
+            self.indice_embeddings = None
+            return
+        self.indice_embeddings = crear_indice(self.tipo_indice, **self.parametros_indice)
+        self.indice_embeddings.construir(self.matrix_embeddings, normalizados=True)
+        self._nueva_version()
+
+    def evaluar_indice_embeddings(self, n_consultas=200, k=10, semilla=0):
+        """
+        Mide el recall@k del índice de embeddings frente a la búsqueda exacta, usando
+        noticias del corpus al azar como consultas (excluyendo la propia noticia).
+        :return: dict con recall y milisegundos por consulta (ver indice_vectorial.evaluar_recall)
+        """
+        if self.indice_embeddings is None:
+            print("Embeddings no disponibles.")
+            return {}
+        rng = np.random.default_rng(semilla)
+        n = self.matrix_embeddings.shape[0]
+        posiciones = rng.choice(n, min(n_consultas, n), replace=False)
+        resultado = evaluar_recall(self.indice_embeddings, self.matrix_embeddings[posiciones], k, excluir=list(posiciones))
+        print(f"Índice {resultado['tipo']}: recall@{k} = {resultado['recall']:.3f} "
+              f"({resultado['ms_por_consulta_indice']:.2f} ms/consulta vs {resultado['ms_por_consulta_exacto']:.2f} ms exacto)")
+        return resultado
+
+    def _buscar_embeddings(self, vectores, top_n, exclude_indices=None, permitidas=None):
+        """Top-n por embeddings a través del índice vectorial, ya materializado por query."""
+        with self.metricas.medir("motor_similitud_segundos", metodo='embeddings'):
+            resultados = self.indice_embeddings.buscar(vectores, self._k_busqueda(top_n), excluir=exclude_indices,
+                                                       permitidas=permitidas)
+        return [
+            self._materializar(indices, similitudes, top_n, excluir=exclude_indices[j] if exclude_indices is not None else None)
+            for j, (indices, similitudes) in enumerate(resultados)
+        ]
+
+    def _matriz_metodo(self, metodo):
+        """Matriz de documentos del método ('tfidf' o 'embeddings'), o None si no está disponible."""
+        if metodo == 'tfidf':
+            return self.matrix_tfidf
+        elif metodo == 'embeddings':
+            return self.matrix_embeddings
+        return None
+
+    def _embeddings_disponibles(self):
+        """True si se pueden generar embeddings (sentence-transformers instalado o modelo ya cargado)."""
+        return EMBEDDINGS_AVAILABLE or self.model_embeddings is not None
+
+    def usar_modelo_embeddings(self, modelo):
+        """
+        Fija el modelo de embeddings (None = MODELO_EMBEDDINGS, cargado al usarlo) y su
+        identidad (ver nombre_modelo_embeddings). No regenera los embeddings ya calculados.
+        """
+        self.model_embeddings = modelo
+        self.nombre_modelo_embeddings = nombre_modelo_embeddings(modelo)
+
+    def _modelo_embeddings(self):
+        """Devuelve el modelo de embeddings, cargándolo solo cuando se necesita."""
+        if self.model_embeddings is None:
+            self.model_embeddings = SentenceTransformer(MODELO_EMBEDDINGS)
+        return self.model_embeddings
+
+    def _cargar_noticias(self):
+        """Recorre las carpetas y carga los .txt generados por el scraper (en paralelo)."""
+        self.manifiesto = Manifiesto()
+        cargador = self._cargador()
+        with self.metricas.medir("motor_carga_segundos"):
+            registros = list(cargador.registros())
+        self.metricas.contar("motor_noticias_cargadas_total", len(registros))
+        self.df = tipar_fechas(pd.DataFrame(registros))
+        self._registrar_errores(cargador.errores)
+
+        # ID numérico estable (derivado de la ruta del archivo o del almacén), no de la posición
+        self.df['id'] = self._asignar_ids(registros) if registros else []
+        self._actualizar_columnas()
         print(f"Noticias cargadas: {len(self.df)}")
 
+    def _asignar_ids(self, registros, ids_previos=None):
+        """
+        Id de cada registro: el que ya tenía su ruta (si se está actualizando) o el id
+        estable que trae del cargador. Si dos noticias distintas coinciden en id (colisión
+        del hash), la que llega después se desambigua con su ruta.
+        :param ids_previos: dict ruta -> id de las noticias ya cargadas
+        """
+        ids_previos = ids_previos or {}
+        reemplazados = {ids_previos[r['ruta']] for r in registros if r['ruta'] in ids_previos}
+        ocupados = set(self._pos_por_id) - reemplazados
+        ids = []
+        for registro in registros:
+            id_noticia = ids_previos[registro['ruta']] if registro['ruta'] in ids_previos else registro['id']
+            while id_noticia in ocupados:
+                id_noticia = id_estable(f"{id_noticia}\n{registro['ruta']}")
+            ocupados.add(id_noticia)
+            ids.append(id_noticia)
+        return ids
+
+    def _agrupar_duplicados(self, ids, textos_procesados):
+        """Añade las noticias al detector de casi duplicados y avisa de los grupos encontrados."""
+        with self.metricas.medir("motor_duplicados_segundos"):
+            self.duplicados.agregar_lote(ids, textos_procesados)
+        if self.duplicados.n_repetidas():
+            print(f"Noticias casi duplicadas: {self.duplicados.n_repetidas()} "
+                  f"(en {len(self.duplicados.grupos())} grupos)")
+
+    def _cargador(self):
+        """Cargador adecuado a la fuente (árbol de .txt o almacén de corpus), sobre self.manifiesto."""
+        if es_almacen(self.base_path):
+            return CargadorAlmacen(self.base_path, manifiesto=self.manifiesto)
+        return CargadorNoticias(self.base_path, manifiesto=self.manifiesto)
+
+    def _registrar_errores(self, errores):
+        """Guarda los errores de carga (dicts con ruta, tipo y mensaje) y avisa de cuántos hubo."""
+        if errores:
+            self.errores_carga.extend(errores)
+            print(f"Archivos con errores: {len(errores)} (ver errores_carga)")
+
     def _preprocesar_texto(self, texto):
-        """Tokeniza, pasa a minúsculas y elimina stopwords."""
-        if not isinstance(texto, str):
-            return ""
-        
-        # 1. Minúsculas
-        texto = texto.lower()
-        
-        # 2. Tokenización
-        tokens = word_tokenize(texto, language='spanish')
-        
-        # 3. Stopwords (en español)
-        stop_words = set(stopwords.words('spanish'))
-        
-        # Filtrado de tokens (quitamos signos de puntuación y stopwords)
-        tokens_limpios = [word for word in tokens if word.isalnum() and word not in stop_words]
-        
-        return " ".join(tokens_limpios)
+        """Tokeniza, pasa a minúsculas y elimina stopwords (sin caché: se usa para las queries)."""
+        with self.metricas.medir("motor_preprocesado_segundos", origen="query"):
+            return self.preprocesador.procesar(texto, cachear=False)
+
+    def _vectorizar(self, textos_procesados):
+        """Vectores TF-IDF de textos ya preprocesados, con el vocabulario e IDF actuales."""
+        with self.metricas.medir("motor_vectorizacion_segundos", operacion="transformar"):
+            return self.modelo_lexico.transformar(textos_procesados).astype(self.tipo_tfidf, copy=False)
 
     def _entrenar_tfidf(self):
-        """Configura y entrena el vectorizador TF-IDF (Bag of Words avanzado)."""
-        # Usamos TfidfVectorizer que combina CountVectorizer (BoW) + TfidfTransformer
-        self.vectorizer_tfidf = TfidfVectorizer()
-        self.matrix_tfidf = self.vectorizer_tfidf.fit_transform(self.df['texto_procesado'])
+        """Entrena el modelo léxico (Bag of Words con pesos TF-IDF o BM25, ver ModeloLexico)."""
+        with self.metricas.medir("motor_vectorizacion_segundos", operacion="ajuste"):
+            self.matrix_tfidf = self.modelo_lexico.ajustar_transformar(
+                self._textos('texto_procesado')
+            ).astype(self.tipo_tfidf, copy=False)
+        self._nueva_version()
+
+    def configurar_modelo_lexico(self, **parametros):
+        """
+        Cambia el modelo léxico del método 'tfidf' (ver ModeloLexico: ponderación TF-IDF o
+        BM25, n-gramas, poda del vocabulario, hashing) y lo reentrena con el corpus actual.
+        """
+        self.modelo_lexico = ModeloLexico(**parametros)
+        if self.df.empty:
+            self._nueva_version()
+        else:
+            self.refrescar_idf()
 
     def _generar_embeddings(self):
         """Carga un modelo pre-entrenado y genera embeddings semánticos."""
-        # 'paraphrase-multilingual-MiniLM-L12-v2' funciona muy bien para español
-        self.model_embeddings = SentenceTransformer('paraphrase-multilingual-MiniLM-L12-v2')
         # Generamos embeddings del contenido original (los transformers manejan bien el contexto, no necesitan tanto preproceso)
-        self.matrix_embeddings = self.model_embeddings.encode(self.df['contenido_completo'].tolist(), show_progress_bar=True)
+        # Se guardan ya normalizados y en tipo_vectores: el índice vectorial usa la misma matriz
+        self.matrix_embeddings = comprimir(
+            self._codificar(self._textos('contenido_completo'), mostrar_progreso=True), self.tipo_vectores
+        )
+        self._construir_indice_embeddings()
+
+    def _codificar(self, textos, mostrar_progreso=False):
+        """
+        Embeddings de una lista de textos. Con caché de embeddings, solo se envían al
+        modelo los textos que no estaban ya codificados (y el modelo solo se carga si hace falta).
+        """
+        with self.metricas.medir("motor_codificacion_segundos", origen="corpus"):
+            if self.cache_embeddings is not None:
+                return self.cache_embeddings.codificar(
+                    textos, self._modelo_embeddings, tam_lote=self.tam_lote_embeddings, mostrar_progreso=mostrar_progreso
+                )
+            return self._modelo_embeddings().encode(textos, batch_size=self.tam_lote_embeddings, show_progress_bar=mostrar_progreso)
+
+    def _codificar_queries(self, queries):
+        """Embeddings de las queries (sin caché: cada query se codifica al vuelo)."""
+        with self.metricas.medir("motor_codificacion_segundos", origen="query"):
+            return self._modelo_embeddings().encode(queries)
+
+    def _calcular_similitud(self, vector_query, top_n=5, exclude_index=None, permitidas=None):
+        """
+        Coseno TF-IDF de una query con las noticias y resultados ordenados.
+        :param permitidas: Máscara de las noticias que pueden salir (ver _mascara_filtro);
+                           solo se calcula la similitud con esas filas
+        """
+        with self.metricas.medir("motor_similitud_segundos", metodo='tfidf'):
+            indices, similitudes = self._top_tfidf(vector_query, self._k_busqueda(top_n), exclude_index, permitidas)
+        return self._materializar(indices, similitudes, top_n, excluir=exclude_index)
+
+    def configurar_puntuacion_tfidf(self, modo):
+        """
+        Elige cómo se puntúan las consultas TF-IDF individuales (texto, noticia y la primera
+        fase del híbrido): 'densa', 'postings' o 'maxscore' (ver PUNTUACIONES_TFIDF). Las
+        tres dan el mismo top-k; las consultas por lotes siguen con el producto matricial.
+        """
+        if modo not in PUNTUACIONES_TFIDF:
+            raise ValueError(f"Puntuación TF-IDF desconocida: {modo} (disponibles: {', '.join(PUNTUACIONES_TFIDF)})")
+        self.puntuacion_tfidf = modo
+        self._nueva_version()
+
+    def _top_tfidf(self, vector_query, k, exclude_index=None, permitidas=None):
+        """Posiciones y similitudes de las k noticias más parecidas por TF-IDF (según puntuacion_tfidf)."""
+        if self.puntuacion_tfidf == 'densa':
+            return self._top_similitud(vector_query, self.matrix_tfidf, k, exclude_index, permitidas)
+        puntuador = self._puntuador_tfidf
+        if puntuador is None or puntuador.matriz is not self.matrix_tfidf:
+            # La matriz ha cambiado (entrenamiento, noticias nuevas, compactar...): índice nuevo
+            puntuador = self._puntuador_tfidf = PuntuadorDisperso(self.matrix_tfidf)
+        return puntuador.buscar(vector_query, k, excluir=exclude_index, permitidas=permitidas,
+                                poda=self.puntuacion_tfidf == 'maxscore')
+
+    @staticmethod
+    def _top_similitud(vector_query, matriz_documentos, k, exclude_index=None, permitidas=None):
+        """Posiciones y similitudes (coseno) de las k filas más parecidas, de mayor a menor."""
+        posiciones, excluir = None, exclude_index
+        if permitidas is not None:
+            posiciones = np.flatnonzero(permitidas)
+            if len(posiciones) == 0:
+                return np.array([], dtype=np.int64), np.array([])
+            matriz_documentos = matriz_documentos[posiciones]
+            excluir = posicion_local(posiciones, exclude_index)
 
-    def _calcular_similitud(self, vector_query, matriz_documentos, top_n=5, exclude_index=None):
-        """Función genérica para calcular coseno y ordenar resultados."""
         # Calcular similitud de coseno
         # cosine_similarity devuelve una matriz, tomamos la primera fila [0]
         similitudes = cosine_similarity(vector_query, matriz_documentos)[0]
-        
-        # Obtener índices ordenados de mayor a menor similitud
-        indices_ordenados = similitudes.argsort()[::-1]
-        
-        resultados = []
-        i = 0
-        total_docs = len(indices_ordenados)
-        
-        # REFACTORIZADO: Usamos un while con condición compuesta para evitar 'break' y 'continue' (volvemos a resubir por este problema)
-        while len(resultados) < top_n and i < total_docs:
-            idx = indices_ordenados[i]
-            
-            # Solo procesamos si NO es el índice a excluir
-            if exclude_index is None or idx != exclude_index:
-                resultados.append({
-                    "id": self.df.iloc[idx]['id'],
-                    "titulo": self.df.iloc[idx]['titulo'],
-                    "similitud": round(float(similitudes[idx]), 4),
-                    "contenido_preview": self.df.iloc[idx]['cuerpo'][:150] + "..."
-                })
-            
-            i += 1
-                
-        return resultados
+
+        # Solo ordenamos los k mejores (no el corpus entero)
+        indices = top_k(similitudes, k, excluir=excluir)
+        similitudes = similitudes[indices]
+        if posiciones is not None:
+            indices = posiciones[indices]
+        return indices, similitudes
+
+    def _calcular_similitud_lote(self, vectores_query, matriz_documentos, top_n=5, exclude_indices=None, tam_bloque=None,
+                                 metodo='tfidf', permitidas=None):
+        """
+        Igual que _calcular_similitud pero para muchas queries a la vez: el coseno se
+        calcula como un producto matriz-matriz por bloques de queries.
+        :param exclude_indices: Lista (una posición o None por query) de posiciones a excluir
+        :param tam_bloque: Queries por bloque; por defecto se ajusta a MAX_ELEMENTOS_BLOQUE
+        :param permitidas: Máscara de las noticias que pueden salir (ver _calcular_similitud)
+        """
+        if exclude_indices is None:
+            exclude_indices = [None] * vectores_query.shape[0]
+        posiciones = None
+        if permitidas is not None:
+            posiciones = np.flatnonzero(permitidas)
+            if len(posiciones) == 0:
+                return [[] for _ in exclude_indices]
+            matriz_documentos = matriz_documentos[posiciones]
+
+        candidatos = []
+        with self.metricas.medir("motor_similitud_segundos", metodo=metodo):
+            for inicio, similitudes in _bloques_similitud(vectores_query, matriz_documentos, tam_bloque):
+                for j, fila in enumerate(similitudes):
+                    excluir = exclude_indices[inicio + j]
+                    if posiciones is None:
+                        indices = top_k(fila, self._k_busqueda(top_n), excluir=excluir)
+                        candidatos.append((indices, fila[indices], excluir))
+                    else:
+                        indices = top_k(fila, self._k_busqueda(top_n), excluir=posicion_local(posiciones, excluir))
+                        candidatos.append((posiciones[indices], fila[indices], excluir))
+        return [self._materializar(indices, sims, top_n, excluir=excluir) for indices, sims, excluir in candidatos]
+
+    def _k_busqueda(self, top_n):
+        """
+        Candidatos a pedir para que, tras colapsar duplicados, queden top_n grupos distintos.
+        Entre los top_n + n_repetidas mejores siempre hay al menos top_n grupos (sin contar
+        el de la noticia excluida), así que basta una búsqueda, sin comparar resultados entre sí.
+        """
+        if not self.colapsar_duplicados:
+            return top_n
+        return top_n + self._n_repetidas
+
+    def _materializar(self, indices, similitudes, top_n=None, excluir=None):
+        """
+        Construye la lista de resultados a partir de posiciones y similitudes ya ordenadas.
+        Con top_n, se queda con los top_n primeros, dejando solo la primera noticia de cada
+        grupo de duplicados (y ninguna del grupo de la posición 'excluir').
+        """
+        with self.metricas.medir("motor_materializacion_segundos"):
+            if top_n is not None:
+                if self.colapsar_duplicados and self._n_repetidas:
+                    vistos = set() if excluir is None else {self._col_grupos[excluir]}
+                    conservar = []
+                    for i, grupo in enumerate(self._col_grupos[indices].tolist()):
+                        if grupo not in vistos:
+                            vistos.add(grupo)
+                            conservar.append(i)
+                            if len(conservar) == top_n:
+                                break
+                    indices, similitudes = indices[conservar], similitudes[conservar]
+                else:
+                    indices, similitudes = indices[:top_n], similitudes[:top_n]
+            return [
+                {
+                    "id": self._col_ids[idx],
+                    "titulo": self._col_titulos[idx],
+                    "similitud": round(float(sim), 4),
+                    "contenido_preview": preview,
+                }
+                for idx, sim, preview in zip(indices, similitudes, self._previews(indices))
+            ]
+
+    def _previews(self, indices):
+        """Resumen del cuerpo de las noticias en esas posiciones (en modo compacto, leído del almacén)."""
+        if self._col_previews is not None:
+            return self._col_previews[indices]
+        # Como mucho 4 bytes UTF-8 por carácter: no hace falta leer el cuerpo entero
+        return [
+            self.textos.obtener(id_noticia, 'cuerpo', max_bytes=4 * LONGITUD_PREVIEW)[:LONGITUD_PREVIEW] + "..."
+            for id_noticia in self._col_ids[indices].tolist()
+        ]
+
+    def _actualizar_columnas(self):
+        """
+        Precalcula las columnas que se usan al devolver resultados, para no acceder
+        fila a fila al DataFrame en cada consulta. Hay que llamarlo cada vez que cambia self.df.
+        """
+        if self.df.empty:
+            self._col_ids = np.array([], dtype=np.int64)
+            self._col_titulos = np.array([], dtype=object)
+            self._col_previews = np.array([], dtype=object)
+            self._col_grupos = np.array([], dtype=np.int64)
+            self._n_repetidas = 0
+            self._pos_por_id = {}
+            self._indice_palabras = None
+            self._mascaras_categoria = {}
+            self._orden_fechas = np.array([], dtype=np.int64)
+            self._fechas_ordenadas = np.array([], dtype='datetime64[ns]')
+            self._mascaras_filtro = {}
+            return
+        self._col_ids = self.df['id'].to_numpy()
+        self._col_titulos = self.df['titulo'].to_numpy(dtype=object)
+        # En modo compacto no hay cuerpo en memoria: los resúmenes se leen al devolver resultados
+        self._col_previews = None
+        if 'cuerpo' in self.df.columns:
+            self._col_previews = np.array([cuerpo[:LONGITUD_PREVIEW] + "..." for cuerpo in self.df['cuerpo']], dtype=object)
+        self._pos_por_id = {id_: pos for pos, id_ in enumerate(self._col_ids.tolist())}
+        self._col_grupos = np.array([self.duplicados.grupo(id_) for id_ in self._col_ids.tolist()], dtype=np.int64)
+        self._n_repetidas = self.duplicados.n_repetidas()
+        self._indice_palabras = None
+
+        # Filtros: una máscara por categoría y las posiciones con fecha ordenadas por fecha,
+        # para sacar las de un rango con dos búsquedas binarias (ver _mascara_filtro)
+        codigos, categorias = pd.factorize(self.df['categoria'])
+        self._mascaras_categoria = {categoria: codigos == i for i, categoria in enumerate(categorias)}
+        if 'fecha_publicacion' in self.df.columns:
+            fechas = self.df['fecha_publicacion'].to_numpy(dtype='datetime64[ns]')
+        else:
+            fechas = np.full(len(self.df), np.datetime64('NaT'), dtype='datetime64[ns]')
+        con_fecha = np.flatnonzero(~np.isnat(fechas))
+        self._orden_fechas = con_fecha[np.argsort(fechas[con_fecha], kind='stable')]
+        self._fechas_ordenadas = fechas[self._orden_fechas]
+        self._mascaras_filtro = {}
+        self._nueva_version()
+
+    def _nueva_version(self):
+        """
+        Marca que han cambiado las noticias o los modelos: sube la versión del índice y
+        vacía la caché de resultados. add_documents y _eliminar_filas la vuelven a llamar
+        al terminar, para descartar lo que se haya cacheado a mitad de la actualización.
+        """
+        self.version_indice += 1
+        if self.cache_resultados is not None:
+            self.cache_resultados.invalidar()
+
+    # --- FILTROS ---
+
+    @staticmethod
+    def _clave_filtro(categorias=None, desde=None, hasta=None):
+        """
+        Forma canónica de un filtro (None si no filtra nada): categorías ordenadas y
+        fechas como pd.Timestamp. Sirve de clave para las máscaras y para la caché.
+        """
+        if categorias is None and desde is None and hasta is None:
+            return None
+        if isinstance(categorias, str):
+            categorias = [categorias]
+        return (
+            tuple(sorted(set(categorias))) if categorias is not None else None,
+            pd.Timestamp(desde) if desde is not None else None,
+            pd.Timestamp(hasta) if hasta is not None else None,
+        )
+
+    def _mascara_filtro(self, categorias=None, desde=None, hasta=None):
+        """
+        Máscara booleana de las noticias que cumplen el filtro (None si no hay filtro):
+        de alguna de las categorías y con fecha de publicación en [desde, hasta] (ambas
+        incluidas; las noticias sin fecha no pasan un filtro de fechas). Se guarda por
+        combinación de filtros hasta que cambian las noticias.
+        """
+        clave = self._clave_filtro(categorias, desde, hasta)
+        if clave is None:
+            return None
+        mascara = self._mascaras_filtro.get(clave)
+        if mascara is not None:
+            return mascara
+
+        categorias, desde, hasta = clave
+        n = len(self._col_ids)
+        if categorias is None:
+            mascara = np.ones(n, dtype=bool)
+        else:
+            mascara = np.zeros(n, dtype=bool)
+            for categoria in categorias:
+                if categoria in self._mascaras_categoria:
+                    mascara |= self._mascaras_categoria[categoria]
+        if desde is not None or hasta is not None:
+            inicio = 0 if desde is None else np.searchsorted(self._fechas_ordenadas, desde.to_datetime64(), 'left')
+            fin = len(self._fechas_ordenadas) if hasta is None else \
+                np.searchsorted(self._fechas_ordenadas, hasta.to_datetime64(), 'right')
+            en_rango = np.zeros(n, dtype=bool)
+            en_rango[self._orden_fechas[inicio:fin]] = True
+            mascara &= en_rango
+
+        if len(self._mascaras_filtro) >= MAX_MASCARAS_FILTRO:
+            self._mascaras_filtro.pop(next(iter(self._mascaras_filtro)))
+        self._mascaras_filtro[clave] = mascara
+        return mascara
+
+    def facetas(self):
+        """
+        Valores posibles de los filtros: noticias por categoría y rango de fechas de
+        publicación (fecha_min/fecha_max como datetime, None si ninguna tiene fecha).
+        """
+        fechas = self._fechas_ordenadas
+        return {
+            "categorias": {categoria: int(m.sum()) for categoria, m in self._mascaras_categoria.items()},
+            "fecha_min": pd.Timestamp(fechas[0]).to_pydatetime() if len(fechas) else None,
+            "fecha_max": pd.Timestamp(fechas[-1]).to_pydatetime() if len(fechas) else None,
+            "sin_fecha": len(self._col_ids) - len(fechas),
+        }
+
+    def estadisticas_cache(self):
+        """Aciertos, fallos, tamaño, etc. de la caché de resultados (None si está desactivada)."""
+        if self.cache_resultados is None:
+            return None
+        return dict(self.cache_resultados.estadisticas(), version_indice=self.version_indice)
+
+    # --- MÉTODO HÍBRIDO ---
+
+    def configurar_hibrido(self, primera_fase='tfidf', fusion='rrf', n_candidatos=CANDIDATOS_HIBRIDO,
+                           peso_tfidf=PESO_TFIDF_HIBRIDO, k_rrf=K_RRF):
+        """
+        Configura el método 'hibrido', que combina TF-IDF y embeddings con una sola pasada
+        completa: primera_fase ('tfidf', el producto disperso, o 'embeddings', a través del
+        índice vectorial) elige n_candidatos, solo esos se puntúan con la otra representación
+        y las dos puntuaciones se fusionan:
+        - 'rrf' (reciprocal rank fusion): suma de 1 / (k_rrf + rango) en cada representación
+        - 'ponderada': peso_tfidf * coseno TF-IDF + (1 - peso_tfidf) * coseno de embeddings
+        """
+        if primera_fase not in ('tfidf', 'embeddings'):
+            raise ValueError(f"Primera fase desconocida: {primera_fase} (disponibles: tfidf, embeddings)")
+        if fusion not in FUSIONES_HIBRIDO:
+            raise ValueError(f"Fusión desconocida: {fusion} (disponibles: {', '.join(FUSIONES_HIBRIDO)})")
+        self.config_hibrido = {"primera_fase": primera_fase, "fusion": fusion, "n_candidatos": int(n_candidatos),
+                               "peso_tfidf": float(peso_tfidf), "k_rrf": k_rrf}
+        self._nueva_version()
+
+    def _vectores_noticia(self, idx):
+        """Vectores de la noticia en la posición idx en las dos representaciones (para el método híbrido)."""
+        return {'tfidf': self.matrix_tfidf[idx], 'embeddings': self.matrix_embeddings[idx].reshape(1, -1)}
+
+    def _recomendar_hibrido(self, vectores, top_n, exclude_index=None, permitidas=None):
+        """
+        Top-n del método híbrido (ver configurar_hibrido), ya materializado.
+        :param vectores: dict método -> vector de la consulta (una fila) en esa representación
+        """
+        config = self.config_hibrido
+        primera = config["primera_fase"]
+        k = max(config["n_candidatos"], self._k_busqueda(top_n))
+        with self.metricas.medir("motor_similitud_segundos", metodo=primera):
+            indices, similitudes = self._candidatos_hibrido(primera, vectores[primera], k, exclude_index, permitidas)
+            if primera == 'tfidf':
+                # Sin palabras en común el coseno es 0 y ese orden no significa nada: si el TF-IDF
+                # no llega a top_n candidatos con coincidencias, la primera fase la hacen los embeddings
+                con_coincidencias = similitudes > 0
+                if con_coincidencias.sum() < self._k_busqueda(top_n):
+                    primera = 'embeddings'
+                    indices, similitudes = self._candidatos_hibrido(primera, vectores[primera], k, exclude_index,
+                                                                    permitidas)
+                else:
+                    indices, similitudes = indices[con_coincidencias], similitudes[con_coincidencias]
+
+        with self.metricas.medir("motor_similitud_segundos", metodo='hibrido'):
+            # Candidatos por posición, para que la fusión no dependa del orden de la primera fase
+            orden = np.argsort(indices, kind='stable')
+            indices, similitudes = indices[orden], similitudes[orden]
+            segunda = 'embeddings' if primera == 'tfidf' else 'tfidf'
+            otras = self._similitud_filas(segunda, vectores[segunda], indices)
+            if primera == 'tfidf':
+                puntuaciones = self._fusionar(similitudes, otras)
+            else:
+                puntuaciones = self._fusionar(otras, similitudes)
+            # Mismo criterio que top_k: puntuación descendente, empates por posición mayor
+            orden = np.lexsort((-indices, -puntuaciones))
+        return self._materializar(indices[orden], puntuaciones[orden], top_n, excluir=exclude_index)
+
+    def _candidatos_hibrido(self, metodo, vector, k, exclude_index=None, permitidas=None):
+        """Primera fase del híbrido: las k mejores (posiciones, similitudes) con un método."""
+        if metodo == 'tfidf':
+            return self._top_tfidf(vector, k, exclude_index, permitidas)
+        return self.indice_embeddings.buscar(vector, k, excluir=[exclude_index], permitidas=permitidas)[0]
+
+    def _similitud_filas(self, metodo, vector, indices):
+        """Coseno del vector con las filas 'indices' de la matriz del método (solo esas filas)."""
+        if len(indices) == 0:
+            return np.array([], dtype=np.float32)
+        if metodo == 'tfidf':
+            return cosine_similarity(vector, self.matrix_tfidf[indices])[0]
+        # Los embeddings están guardados ya normalizados (ver indice_vectorial.comprimir)
+        return a_float32(self.matrix_embeddings[indices]) @ normalizar(vector)[0]
+
+    def _fusionar(self, similitudes_tfidf, similitudes_embeddings):
+        """Puntuación final de los candidatos a partir de las dos similitudes (ver configurar_hibrido)."""
+        config = self.config_hibrido
+        if config["fusion"] == 'ponderada':
+            return config["peso_tfidf"] * similitudes_tfidf + (1 - config["peso_tfidf"]) * similitudes_embeddings
+        puntuaciones = np.zeros(len(similitudes_tfidf))
+        for similitudes in (similitudes_tfidf, similitudes_embeddings):
+            rangos = np.empty(len(similitudes))
+            rangos[np.argsort(-similitudes, kind='stable')] = np.arange(1, len(similitudes) + 1)
+            puntuaciones += 1.0 / (config["k_rrf"] + rangos)
+        return puntuaciones
 
     # --- FUNCIONES PÚBLICAS REQUERIDAS ---
 
-    def recomendar_por_texto(self, query, metodo='tfidf', top_n=5):
+    @_consulta("texto")
+    @_cacheada("texto")
+    def recomendar_por_texto(self, query, metodo='tfidf', top_n=5, *, categorias=None, desde=None, hasta=None):
         """
         Recomendación basada en una búsqueda de texto libre (Query).
+        Los filtros (opcionales) se aplican antes de elegir las top_n, así que siempre
+        se devuelven las top_n mejores que los cumplen:
+        :param categorias: Categoría o lista de categorías permitidas
+        :param desde: Fecha de publicación mínima (str 'AAAA-MM-DD', date o datetime), incluida
+        :param hasta: Fecha de publicación máxima, incluida
         """
-        print(f"--- Recomendando por Query ('{query}') usando {metodo} ---")
+        if not self.silencioso:
+            print(f"--- Recomendando por Query ('{query}') usando {metodo} ---")
+        permitidas = self._mascara_filtro(categorias, desde, hasta)
         
         if metodo == 'tfidf':
             query_procesada = self._preprocesar_texto(query)
-            vector_query = self.vectorizer_tfidf.transform([query_procesada])
-            return self._calcular_similitud(vector_query, self.matrix_tfidf, top_n)
+            vector_query = self._vectorizar([query_procesada])
+            return self._calcular_similitud(vector_query, top_n, permitidas=permitidas)
         
-        elif metodo == 'embeddings' and EMBEDDINGS_AVAILABLE:
-            vector_query = self.model_embeddings.encode([query])
-            return self._calcular_similitud(vector_query, self.matrix_embeddings, top_n)
+        elif metodo == 'embeddings' and self.matrix_embeddings is not None:
+            vector_query = self._codificar_queries([query])
+            return self._buscar_embeddings(vector_query, top_n, permitidas=permitidas)[0]
+
+        elif metodo == 'hibrido' and self.matrix_embeddings is not None:
+            vectores = {'tfidf': self._vectorizar([self._preprocesar_texto(query)]),
+                        'embeddings': self._codificar_queries([query])}
+            return self._recomendar_hibrido(vectores, top_n, permitidas=permitidas)
         
         else:
             return []
 
-    def recomendar_por_noticia(self, id_noticia, metodo='tfidf', top_n=5):
+    @_consulta("noticia")
+    @_cacheada("noticia")
+    def recomendar_por_noticia(self, id_noticia, metodo='tfidf', top_n=5, *, categorias=None, desde=None, hasta=None):
         """
         Recomendación basada en similitud con una noticia existente (Item-to-Item).
+        Admite los mismos filtros que recomendar_por_texto.
         """
-        if id_noticia not in self.df['id'].values:
-            print("ID de noticia no encontrado.")
+        # Obtenemos el índice numérico en el DataFrame
+        idx = self._pos_por_id.get(id_noticia)
+        if idx is None:
+            if not self.silencioso:
+                print("ID de noticia no encontrado.")
             return []
 
-        titulo_ref = self.df.loc[self.df['id'] == id_noticia, 'titulo'].values[0]
-        print(f"--- Noticias similares a: '{titulo_ref}' usando {metodo} ---")
-        
-        # Obtenemos el índice numérico en el DataFrame
-        idx = self.df.index[self.df['id'] == id_noticia][0]
+        titulo_ref = self._col_titulos[idx]
+        if not self.silencioso:
+            print(f"--- Noticias similares a: '{titulo_ref}' usando {metodo} ---")
+        permitidas = self._mascara_filtro(categorias, desde, hasta)
+
+        # Si hay tabla de vecinos precalculada, la respuesta es una lectura O(k)
+        desde_tabla = self._vecinos_desde_tabla(metodo, idx, top_n, permitidas)
+        if desde_tabla is not None:
+            return desde_tabla
         
         if metodo == 'tfidf':
             vector_ref = self.matrix_tfidf[idx]
-            return self._calcular_similitud(vector_ref, self.matrix_tfidf, top_n, exclude_index=idx)
+            return self._calcular_similitud(vector_ref, top_n, exclude_index=idx, permitidas=permitidas)
         
-        elif metodo == 'embeddings' and EMBEDDINGS_AVAILABLE:
+        elif metodo == 'embeddings' and self.matrix_embeddings is not None:
             # Reshape necesario para que sea (1, n_features)
             vector_ref = self.matrix_embeddings[idx].reshape(1, -1)
-            return self._calcular_similitud(vector_ref, self.matrix_embeddings, top_n, exclude_index=idx)
+            return self._buscar_embeddings(vector_ref, top_n, exclude_indices=[idx], permitidas=permitidas)[0]
+
+        elif metodo == 'hibrido' and self.matrix_embeddings is not None:
+            return self._recomendar_hibrido(self._vectores_noticia(idx), top_n, exclude_index=idx, permitidas=permitidas)
         
         else:
             return []
 
+    @_consulta("textos")
+    @_cacheada("texto", lote=True)
+    def recomendar_por_textos(self, queries, metodo='tfidf', top_n=5, tam_bloque=None, *, categorias=None, desde=None,
+                              hasta=None):
+        """
+        Versión por lotes de recomendar_por_texto: vectoriza/codifica todas las queries
+        de una vez y las puntúa con un único producto matricial (por bloques).
+        Los filtros son los de recomendar_por_texto y se aplican a todas las queries.
+        :return: Una lista de resultados por query, en el mismo orden
+        """
+        queries = list(queries)
+        if not self.silencioso:
+            print(f"--- Recomendando {len(queries)} queries usando {metodo} ---")
+        if not queries:
+            return []
+        permitidas = self._mascara_filtro(categorias, desde, hasta)
+
+        if metodo == 'tfidf':
+            queries_procesadas = [self._preprocesar_texto(q) for q in queries]
+            vectores = self._vectorizar(queries_procesadas)
+            return self._calcular_similitud_lote(vectores, self.matrix_tfidf, top_n, tam_bloque=tam_bloque,
+                                                 permitidas=permitidas)
+
+        elif metodo == 'embeddings' and self.matrix_embeddings is not None:
+            vectores = self._codificar_queries(queries)
+            return self._buscar_embeddings(vectores, top_n, permitidas=permitidas)
+
+        elif metodo == 'hibrido' and self.matrix_embeddings is not None:
+            # Vectorización y codificación por lotes; la búsqueda, query a query
+            vectores_tfidf = self._vectorizar([self._preprocesar_texto(q) for q in queries])
+            vectores_embeddings = self._codificar_queries(queries)
+            return [
+                self._recomendar_hibrido({'tfidf': vectores_tfidf[i], 'embeddings': vectores_embeddings[i:i + 1]},
+                                         top_n, permitidas=permitidas)
+                for i in range(len(queries))
+            ]
+
+        else:
+            return [[] for _ in queries]
+
+    @_consulta("noticias")
+    @_cacheada("noticia", lote=True)
+    def recomendar_por_noticias(self, ids_noticias, metodo='tfidf', top_n=5, tam_bloque=None, *, categorias=None,
+                                desde=None, hasta=None):
+        """
+        Versión por lotes de recomendar_por_noticia (con los mismos filtros).
+        :return: Una lista de resultados por id, en el mismo orden ([] si el id no existe)
+        """
+        ids_noticias = list(ids_noticias)
+        if not self.silencioso:
+            print(f"--- Noticias similares a {len(ids_noticias)} noticias usando {metodo} ---")
+
+        matriz = self._matriz_metodo(metodo if metodo != 'hibrido' else 'embeddings')
+        if matriz is None:
+            return [[] for _ in ids_noticias]
+        permitidas = self._mascara_filtro(categorias, desde, hasta)
+
+        posiciones = [self._pos_por_id.get(id_noticia) for id_noticia in ids_noticias]
+        if metodo == 'hibrido':
+            return [
+                self._recomendar_hibrido(self._vectores_noticia(pos), top_n, exclude_index=pos, permitidas=permitidas)
+                if pos is not None else []
+                for pos in posiciones
+            ]
+        resultados = [[] for _ in posiciones]
+        pendientes = [i for i, pos in enumerate(posiciones) if pos is not None]
+        if metodo in self.tabla_vecinos:
+            restantes = []
+            for i in pendientes:
+                desde_tabla = self._vecinos_desde_tabla(metodo, posiciones[i], top_n, permitidas)
+                if desde_tabla is None:
+                    restantes.append(i)
+                else:
+                    resultados[i] = desde_tabla
+            pendientes = restantes
+
+        validas = [posiciones[i] for i in pendientes]
+        if not validas:
+            calculados = []
+        elif metodo == 'embeddings':
+            calculados = self._buscar_embeddings(matriz[validas], top_n, exclude_indices=validas, permitidas=permitidas)
+        else:
+            calculados = self._calcular_similitud_lote(
+                matriz[validas], matriz, top_n, exclude_indices=validas, tam_bloque=tam_bloque, permitidas=permitidas
+            )
+        for i, resultado in zip(pendientes, calculados):
+            resultados[i] = resultado
+        return resultados
+
+    # --- CONSULTA DE NOTICIAS ---
+
+    def contiene(self, id_noticia):
+        """True si el id es de una noticia del motor (sin leer nada del disco)."""
+        return id_noticia in self._pos_por_id
+
+    def obtener_noticia(self, id_noticia):
+        """Noticia completa (dict con tipos nativos de Python) o None si el id no existe."""
+        idx = self._pos_por_id.get(id_noticia)
+        if idx is None:
+            return None
+        fila = self.df.iloc[idx]
+        campos = [c for c in self.df.columns if c not in ('texto_procesado', 'ruta')]
+        noticia = {campo: _valor_nativo(fila[campo]) for campo in campos}
+        if self.textos is not None:
+            noticia['cuerpo'] = self.textos.obtener(noticia['id'], 'cuerpo')
+            noticia['contenido_completo'] = f"{noticia['titulo']}. {noticia['cuerpo']}"
+        return noticia
+
+    def listar_noticias(self, desde=0, limite=50, categoria=None, con_cuerpo=False):
+        """
+        Página de noticias en el orden del motor.
+        :param categoria: Si se indica, solo las de esa categoría
+        :param con_cuerpo: Incluir también el cuerpo de cada noticia
+        :return: (total de noticias que cumplen el filtro, lista de dicts de la página)
+        """
+        vista = self.df
+        if categoria is not None and not vista.empty:
+            vista = vista[vista['categoria'] == categoria]
+        return len(vista), self._registros_listado(vista.iloc[desde:desde + limite], con_cuerpo)
+
+    def buscar_noticias(self, texto, desde=0, limite=50, con_cuerpo=False):
+        """
+        Búsqueda por palabras (en título y cuerpo, sin distinguir acentos ni mayúsculas)
+        con el índice invertido: devuelve las noticias que contienen todas las palabras
+        de texto, las más relevantes primero. Si texto no termina en espacio, su última
+        palabra se toma como prefijo ('bitc' encuentra 'bitcoin'), para buscar mientras se escribe.
+        :return: (total de coincidencias, lista de dicts de la página con su 'puntuacion')
+        """
+        if self._indice_palabras is None:
+            self._indice_palabras = IndicePalabras().construir(self._textos('texto_procesado'))
+
+        with self.metricas.medir("motor_busqueda_segundos"):
+            # Mismo tokenizador que el preprocesado; las stopwords no están en el índice
+            tokens = self.preprocesador.tokenizar(texto) if isinstance(texto, str) else []
+            prefijo = None
+            if tokens and not texto[-1].isspace():
+                prefijo = tokens.pop()
+            terminos = [t for t in tokens if t not in self.preprocesador.stop_words]
+            if not terminos and not prefijo:
+                return 0, []
+            posiciones, puntuaciones = self._indice_palabras.buscar(terminos, prefijo)
+
+        pagina = slice(desde, desde + limite)
+        registros = self._registros_listado(self.df.iloc[posiciones[pagina]], con_cuerpo)
+        for registro, puntuacion in zip(registros, puntuaciones[pagina].tolist()):
+            registro['puntuacion'] = round(puntuacion, 4)
+        return len(posiciones), registros
+
+    def _registros_listado(self, filas, con_cuerpo=False):
+        """Filas del DataFrame como lista de dicts (tipos nativos) con los CAMPOS_LISTADO."""
+        campos = [c for c in CAMPOS_LISTADO + (('cuerpo',) if con_cuerpo else ()) if c in filas.columns]
+        registros = [
+            {campo: _valor_nativo(valor) for campo, valor in fila.items()}
+            for fila in filas[campos].to_dict(orient='records')
+        ]
+        if con_cuerpo and self.textos is not None:
+            for registro in registros:
+                registro['cuerpo'] = self.textos.obtener(registro['id'], 'cuerpo')
+        return registros
+
     def comparar_resultados(self, query=None, id_noticia=None):
-        """Imprime una comparación visual entre ambos métodos."""
-        if not EMBEDDINGS_AVAILABLE:
+        """Imprime una comparación visual entre los métodos (TF-IDF, embeddings e híbrido)."""
+        if not self._embeddings_disponibles():
             print("No se puede comparar, Embeddings no disponibles.")
             return
 
@@ -205,10 +1757,12 @@ class MotorRecomendacion:
         if query:
             res_tfidf = self.recomendar_por_texto(query, metodo='tfidf')
             res_emb = self.recomendar_por_texto(query, metodo='embeddings')
+            res_hib = self.recomendar_por_texto(query, metodo='hibrido')
             label = f"Query: {query}"
         elif id_noticia is not None:
             res_tfidf = self.recomendar_por_noticia(id_noticia, metodo='tfidf')
             res_emb = self.recomendar_por_noticia(id_noticia, metodo='embeddings')
+            res_hib = self.recomendar_por_noticia(id_noticia, metodo='hibrido')
             label = f"Noticia ID: {id_noticia}"
         else:
             return
@@ -217,7 +1771,7 @@ class MotorRecomendacion:
         
         # Crear un DataFrame temporal para mostrar lado a lado
         data_comp = []
-        max_len = max(len(res_tfidf), len(res_emb))
+        max_len = max(len(res_tfidf), len(res_emb), len(res_hib))
         
         for i in range(max_len):
             row = {}
@@ -227,6 +1781,9 @@ class MotorRecomendacion:
             if i < len(res_emb):
                 row['Embeddings Título'] = res_emb[i]['titulo'][:40]
                 row['Embeddings Score'] = res_emb[i]['similitud']
+            if i < len(res_hib):
+                row['Híbrido Título'] = res_hib[i]['titulo'][:40]
+                row['Híbrido Score'] = res_hib[i]['similitud']
             data_comp.append(row)
             
         df_comp = pd.DataFrame(data_comp)
@@ -0,0 +1,467 @@
+import os
+import re
+import sys
+import time
+import queue
+import hashlib
+import datetime
+import threading
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from estado_crawl import hash_noticia, canonicalizar_url
+
+try:
+    from selenium import webdriver
+    from selenium.webdriver.edge.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
+# Navegadores (workers) en paralelo por defecto
+N_WORKERS_SCRAPING = 4
+# Peticiones por segundo a un mismo host, sumando todos los workers
+PETICIONES_POR_HOST = 2.0
+# Segundos máximos de espera a que aparezca el contenido de una página
+TIMEOUT_PAGINA = 10
+
+# Selectores de cada web (los mismos que usan scraping.py y scraping2.py).
+# "parrafos" es el XPath de los párrafos dentro de "cuerpo" (None = el texto del propio elemento).
+SITIOS = {
+    "bitcoin": {
+        "titulo": "h1.sc-hrAiUm.hEjuKt",
+        "fecha": "span.sc-dhNZpn.bSTjtI",
+        "cuerpo": "div.article__body",
+        "parrafos": "./p[not(*)]",
+        "sin_fecha": "Fecha no encontrada",
+        "sin_cuerpo": "",
+        "sobrescribir": True,
+    },
+    "elpais": {
+        "titulo": "h1.a_t",
+        "fecha": "div.a_md_f",
+        "cuerpo": "p.a_st",
+        "parrafos": None,
+        "sin_fecha": "Sin fecha de publicación",
+        "sin_cuerpo": "Sin contexto",
+        "sobrescribir": False,
+    },
+}
+
+
+def crear_driver_edge(headless=False):
+    """Edge con las opciones de los scripts de scraping (msedgedriver.exe en el directorio actual)."""
+    options = webdriver.EdgeOptions()
+    options.add_argument("--log-level=3")
+    options.add_argument("--disable-logging")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--no-sandbox")
+    if headless:
+        options.add_argument("--headless=new")
+    return webdriver.Edge(
+        service=Service(os.path.join(os.getcwd(), "msedgedriver.exe")),
+        options=options
+    )
+
+
+def desplazar_hasta_el_final(driver, selector, max_desplazamientos=5, timeout=4):
+    """
+    Hace scroll para cargar el contenido dinámico. En lugar de dormir un tiempo fijo
+    tras cada scroll, espera a que aparezcan más elementos que cumplan 'selector' y
+    para en cuanto un scroll no carga nada nuevo.
+    :return: Número de elementos encontrados al final
+    """
+    n = len(driver.find_elements(By.CSS_SELECTOR, selector))
+    for _ in range(max_desplazamientos):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        try:
+            WebDriverWait(driver, timeout).until(lambda d: len(d.find_elements(By.CSS_SELECTOR, selector)) > n)
+        except TimeoutException:
+            break
+        n = len(driver.find_elements(By.CSS_SELECTOR, selector))
+    return n
+
+
+def nombre_archivo_noticia(titulo, url=None):
+    """
+    Nombre del .txt de una noticia: las cuatro primeras palabras del título (sin caracteres
+    que no admita el sistema de archivos) y, si se conoce la URL, un hash corto de su URL
+    canónica, para que dos noticias que empiezan igual no se pisen.
+    """
+    nombre = re.sub(r'[<>:"/\\|?*\x00-\x1f]', "-", "_".join(titulo.split()[:4])).strip(". ") or "noticia"
+    if url is None:
+        return nombre
+    return f"{nombre}_{hashlib.sha1(canonicalizar_url(url).encode('utf-8')).hexdigest()[:8]}"
+
+
+def nombre_archivo_legado(titulo):
+    """Nombre que daban scraping.py y scraping2.py antes de nombre_archivo_noticia (sin hash)."""
+    return "_".join(titulo.split()[:4]).replace("/", "-").replace("\\", "-")
+
+
+def migrar_archivo_legado(noticia, carpeta, noticia_path):
+    """
+    Si la noticia ya se guardó con el nombre antiguo (sin hash de la URL), renombra ese
+    archivo a noticia_path, para que volver a descargarla no la duplique. Solo se renombra
+    si el archivo es de esta noticia (mismo título): con el nombre antiguo, dos noticias
+    que empezaban igual compartían archivo.
+    :return: True si se ha renombrado
+    """
+    legado_path = os.path.join(carpeta, f"{nombre_archivo_legado(noticia['titulo'])}.txt")
+    if legado_path == noticia_path or os.path.exists(noticia_path) or not os.path.isfile(legado_path):
+        return False
+    with open(legado_path, "r", encoding="utf-8") as f:
+        linea = f.readline()
+    # Formato fecha;titulo;cuerpo;fecha_extraccion (la fecha puede ser relativa y cambiar)
+    if not linea.partition(";")[2].startswith(f"{noticia['titulo']};"):
+        return False
+    os.replace(legado_path, noticia_path)
+    return True
+
+
+def escribir_noticia(noticia, carpeta, url=None):
+    """
+    Escribe la noticia en el formato del scraper (fecha;titulo;cuerpo;fecha_extraccion).
+    Un archivo de la misma noticia con el nombre antiguo se reutiliza (ver migrar_archivo_legado).
+    :param url: URL de la noticia (forma parte del nombre del archivo)
+    :return: Ruta del archivo, o None si ya existía y la web no permite sobrescribir
+    """
+    noticia_path = os.path.join(carpeta, f"{nombre_archivo_noticia(noticia['titulo'], url)}.txt")
+    migrar_archivo_legado(noticia, carpeta, noticia_path)
+    if not SITIOS[noticia["sitio"]]["sobrescribir"] and os.path.exists(noticia_path):
+        return None
+    os.makedirs(carpeta, exist_ok=True)
+    with open(noticia_path, "w", encoding="utf-8") as nf:
+        nf.write(f"{noticia['fecha']};{noticia['titulo']};{noticia['cuerpo']};{noticia['fecha_extraccion']}\n")
+    return noticia_path
+
+
+def guardar_noticia(noticia, carpeta, url, estado_crawl=None, **datos_descarga):
+    """
+    Escribe la noticia solo si es nueva o ha cambiado desde la última descarga (sin
+    estado del crawl, siempre) y registra la descarga en el estado.
+    Si la noticia cambió de archivo (p. ej. por un título nuevo), se borra el anterior.
+    :param datos_descarga: estado_http, url_canonica, etag, last_modified (ver EstadoCrawl.registrar)
+    :return: Ruta escrita, o None si no había nada que escribir
+    """
+    if estado_crawl is None:
+        return escribir_noticia(noticia, carpeta, url)
+
+    hash_contenido = hash_noticia(noticia)
+    noticia_path = None
+    if estado_crawl.ha_cambiado(url, hash_contenido):
+        anterior = estado_crawl.obtener(url)
+        noticia_path = escribir_noticia(noticia, carpeta, url)
+        if noticia_path is not None and anterior is not None and anterior["ruta"] \
+                and anterior["ruta"] != noticia_path and os.path.exists(anterior["ruta"]):
+            os.remove(anterior["ruta"])
+    estado_crawl.registrar(url, hash_contenido=hash_contenido, ruta=noticia_path, **datos_descarga)
+    return noticia_path
+
+
+def trabajos_desde_enlaces(base_path_noticias, archivo_enlaces="enlaceen.txt", categorias=None):
+    """
+    Lista de trabajos (url, carpeta de destino) a partir de los archivos de enlaces
+    de cada categoría (noticias/<cat>/<archivo_enlaces>), sin URLs repetidas.
+    :param categorias: Categorías a incluir (por defecto, todas las carpetas)
+    """
+    if categorias is None:
+        categorias = sorted(
+            d for d in os.listdir(base_path_noticias) if os.path.isdir(os.path.join(base_path_noticias, d))
+        )
+    trabajos, vistas = [], set()
+    for cat in categorias:
+        subfolder = os.path.join(base_path_noticias, cat)
+        enlaces_path = os.path.join(subfolder, archivo_enlaces)
+        if not os.path.exists(enlaces_path):
+            continue
+        with open(enlaces_path, "r", encoding="utf-8") as f:
+            for linea in f:
+                url = linea.strip()
+                if url and url not in vistas:
+                    vistas.add(url)
+                    trabajos.append((url, os.path.join(subfolder, "noticias")))
+    return trabajos
+
+
+class LimitadorHost:
+    """
+    Limita las peticiones por segundo a cada host, compartido entre todos los workers.
+    Cada petición reserva el siguiente hueco libre de su host y espera hasta él.
+    """
+
+    def __init__(self, peticiones_por_segundo=PETICIONES_POR_HOST):
+        self.intervalo = 1.0 / peticiones_por_segundo if peticiones_por_segundo else 0.0
+        self._siguiente = {}
+        self._lock = threading.Lock()
+
+    def reservar(self, url):
+        """Reserva el siguiente hueco del host de 'url' y devuelve los segundos que faltan para él."""
+        host = urlparse(url).netloc
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._siguiente.get(host, 0.0))
+            self._siguiente[host] = turno + self.intervalo
+        return turno - ahora
+
+    def esperar(self, url):
+        espera = self.reservar(url)
+        if espera > 0:
+            time.sleep(espera)
+
+
+class MotorScraping:
+    """
+    Descarga noticias con varios navegadores en paralelo. Las URLs se reparten por
+    una cola compartida; cada worker tiene su propio driver, respeta el límite de
+    peticiones por host y espera a que aparezca el título (espera explícita) en
+    lugar de dormir un tiempo fijo. La web de cada página se reconoce por sus selectores.
+    Con un EstadoCrawl solo se escriben las noticias nuevas o que han cambiado.
+    """
+
+    def __init__(self, n_workers=N_WORKERS_SCRAPING, crear_driver=None,
+                 peticiones_por_host=PETICIONES_POR_HOST, timeout=TIMEOUT_PAGINA, estado_crawl=None):
+        """
+        :param crear_driver: Función sin argumentos que devuelve un WebDriver (por defecto Edge)
+        :param peticiones_por_host: Máximo de peticiones por segundo a cada host (None = sin límite)
+        :param timeout: Segundos máximos de espera al contenido de cada página
+        :param estado_crawl: EstadoCrawl donde registrar las descargas (opcional)
+        """
+        self.n_workers = n_workers
+        self.crear_driver = crear_driver or crear_driver_edge
+        self.limitador = LimitadorHost(peticiones_por_host)
+        self.timeout = timeout
+        self.estado_crawl = estado_crawl
+        self.errores = []
+        self.documentos = []
+        self._lock = threading.Lock()
+
+    def ejecutar(self, trabajos):
+        """
+        Procesa todos los trabajos y guarda cada noticia en su carpeta de destino.
+        :param trabajos: Iterable de (url, carpeta de destino)
+        :return: dict con paginas, guardadas, errores, segundos, paginas_por_segundo y
+                 documentos (archivos escritos: las noticias nuevas o modificadas, para la ingesta)
+        """
+        cola = queue.Queue()
+        for trabajo in trabajos:
+            cola.put(trabajo)
+        n_trabajos = cola.qsize()
+
+        self.errores = []
+        self.documentos = []
+        inicio = time.perf_counter()
+        hilos = [
+            threading.Thread(target=self._worker, args=(cola,), daemon=True)
+            for _ in range(min(self.n_workers, n_trabajos))
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        segundos = time.perf_counter() - inicio
+
+        estadisticas = {
+            "paginas": n_trabajos,
+            "guardadas": len(self.documentos),
+            "errores": len(self.errores),
+            "segundos": segundos,
+            "paginas_por_segundo": n_trabajos / segundos if segundos > 0 else 0.0,
+            "documentos": list(self.documentos),
+        }
+        print(f"Scraping terminado: {n_trabajos} páginas en {segundos:.1f}s "
+              f"({estadisticas['paginas_por_segundo']:.2f} páginas/s, {len(self.errores)} errores)")
+        return estadisticas
+
+    def _worker(self, cola):
+        try:
+            driver = self.crear_driver()
+        except Exception as e:
+            # Sin navegador este worker no puede hacer nada; el resto sigue con la cola
+            self._registrar_error(None, f"No se pudo crear el navegador: {e}")
+            return
+        try:
+            while True:
+                try:
+                    url, carpeta = cola.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    self.limitador.esperar(url)
+                    noticia = self.extraer(driver, url)
+                    self._guardar(noticia, carpeta, url)
+                except Exception as e:
+                    self._registrar_error(url, e)
+        finally:
+            driver.quit()
+
+    def extraer(self, driver, url):
+        """
+        Abre una noticia y extrae sus campos.
+        :return: dict con sitio, fecha, titulo, cuerpo y fecha_extraccion
+        """
+        driver.get(url)
+        # Esperamos al título de cualquiera de las webs conocidas (y así sabemos cuál es)
+        try:
+            WebDriverWait(driver, self.timeout).until(EC.any_of(*[
+                EC.presence_of_element_located((By.CSS_SELECTOR, sitio["titulo"])) for sitio in SITIOS.values()
+            ]))
+        except TimeoutException:
+            raise ValueError(f"no apareció el título en {self.timeout}s")
+        nombre_sitio = next(n for n, s in SITIOS.items() if driver.find_elements(By.CSS_SELECTOR, s["titulo"]))
+        sitio = SITIOS[nombre_sitio]
+
+        titulo = driver.find_element(By.CSS_SELECTOR, sitio["titulo"]).text.strip()
+        fechas = driver.find_elements(By.CSS_SELECTOR, sitio["fecha"])
+        fecha_pub = fechas[0].text.strip() if fechas else sitio["sin_fecha"]
+
+        cuerpos = driver.find_elements(By.CSS_SELECTOR, sitio["cuerpo"])
+        if not cuerpos:
+            cuerpo = sitio["sin_cuerpo"]
+        elif sitio["parrafos"]:
+            parrafos = [p.text.strip() for p in cuerpos[0].find_elements(By.XPATH, sitio["parrafos"])]
+            cuerpo = " | ".join(p for p in parrafos if p)
+        else:
+            cuerpo = cuerpos[0].text.strip()
+
+        return {
+            "sitio": nombre_sitio,
+            "fecha": fecha_pub,
+            "titulo": titulo,
+            "cuerpo": cuerpo,
+            "fecha_extraccion": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+    def _guardar(self, noticia, carpeta, url):
+        # Con lock: dos workers con noticias del mismo título no deben pisarse
+        with self._lock:
+            noticia_path = guardar_noticia(noticia, carpeta, url, self.estado_crawl, estado_http=200)
+            if noticia_path is None:
+                return
+            self.documentos.append(noticia_path)
+        print(f"Guardada noticia: {noticia_path}")
+
+    def _registrar_error(self, url, error):
+        with self._lock:
+            self.errores.append({"url": url, "mensaje": str(error)})
+            if self.estado_crawl is not None and url is not None:
+                self.estado_crawl.registrar(url, error=str(error))
+        print(f"Error procesando noticia {url}: {error}")
+
+
+class ServidorFixtures:
+    """
+    Servidor HTTP local con noticias de prueba que imitan el HTML de las webs reales
+    (mismos selectores), para probar y medir el scraping sin salir a internet.
+    También puede servir páginas reales guardadas (.html de una carpeta).
+    Uso: with ServidorFixtures(50) as servidor: motor.ejecutar([(u, carpeta) for u in servidor.urls()])
+    """
+
+    def __init__(self, n_paginas=50, retardo=0.0, puerto=0, directorio=None):
+        """
+        :param n_paginas: Noticias por web (se sirven en /<sitio>/<n>)
+        :param retardo: Segundos que tarda cada respuesta (para simular la red)
+        :param puerto: Puerto local (0 = uno libre cualquiera)
+        :param directorio: Carpeta con páginas guardadas; cada <nombre>.html se sirve en /<nombre>
+                           (en lugar de las noticias generadas)
+        """
+        self.n_paginas = n_paginas
+        self.retardo = retardo
+        self.directorio = directorio
+        self.puerto = puerto
+        self._servidor = None
+
+    def __enter__(self):
+        fixtures = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            def do_GET(self):
+                html = fixtures.pagina(self.path)
+                if fixtures.retardo:
+                    time.sleep(fixtures.retardo)
+                if html is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    self.wfile.write(b"<html><body>No encontrada</body></html>")
+                    return
+                cuerpo = html.encode("utf-8")
+                # ETag del contenido, para probar las peticiones condicionales
+                etag = '"' + hashlib.sha1(cuerpo).hexdigest() + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args):
+                pass
+
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", self.puerto), Manejador)
+        self.puerto = self._servidor.server_address[1]
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def urls(self):
+        if self.directorio is not None:
+            return [
+                f"http://127.0.0.1:{self.puerto}/{nombre[:-len('.html')]}"
+                for nombre in sorted(os.listdir(self.directorio)) if nombre.endswith(".html")
+            ]
+        return [
+            f"http://127.0.0.1:{self.puerto}/{sitio}/{i}"
+            for sitio in SITIOS for i in range(self.n_paginas)
+        ]
+
+    def pagina(self, ruta):
+        """HTML de la noticia de prueba en 'ruta' (o None si no existe)."""
+        if self.directorio is not None:
+            nombre = os.path.basename(ruta.strip("/"))
+            path = os.path.join(self.directorio, nombre + ".html")
+            if not nombre or not os.path.isfile(path):
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return f.read()
+        partes = ruta.strip("/").split("/")
+        if len(partes) != 2 or partes[0] not in SITIOS or not partes[1].isdigit():
+            return None
+        sitio, i = partes[0], int(partes[1])
+        if i >= self.n_paginas:
+            return None
+        titulo = f"Prueba {sitio} número {i} con titular de ejemplo"
+        if sitio == "bitcoin":
+            return (
+                f"<html><body><h1 class=\"sc-hrAiUm hEjuKt\">{titulo}</h1>"
+                f"<span class=\"sc-dhNZpn bSTjtI\">09 DIC 2025</span>"
+                f"<div class=\"article__body\"><p>Primer párrafo de la noticia {i}.</p>"
+                f"<p>Segundo párrafo con <a href=\"#\">enlace</a>.</p><p>Tercer párrafo.</p></div>"
+                f"</body></html>"
+            )
+        return (
+            f"<html><body><h1 class=\"a_t\">{titulo}</h1>"
+            f"<div class=\"a_md_f\">09 dic 2025 - 10:00 CET</div>"
+            f"<p class=\"a_st\">Entradilla de la noticia {i}.</p>"
+            f"</body></html>"
+        )
+
+
+# --- PRUEBA DE RENDIMIENTO CON FIXTURES (USO: python src/motor_scraping.py [n_paginas] [n_workers]) ---
+if __name__ == "__main__":
+    import tempfile
+    n_paginas = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    n_workers = int(sys.argv[2]) if len(sys.argv) > 2 else N_WORKERS_SCRAPING
+    with ServidorFixtures(n_paginas) as servidor, tempfile.TemporaryDirectory() as destino:
+        motor = MotorScraping(n_workers=n_workers, crear_driver=lambda: crear_driver_edge(headless=True),
+                              peticiones_por_host=None)
+        motor.ejecutar([(url, destino) for url in servidor.urls()])
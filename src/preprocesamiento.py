@@ -0,0 +1,105 @@
+import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from nltk.corpus import stopwords
+from nltk.tokenize import word_tokenize
+
+# Por debajo de este número de textos pendientes no compensa arrancar procesos
+MIN_TEXTOS_PARALELO = 2000
+
+# Preprocesador de cada proceso del pool (se crea una vez por proceso en _iniciar_proceso)
+_preprocesador_proceso = None
+
+
+def _iniciar_proceso(idioma):
+    global _preprocesador_proceso
+    _preprocesador_proceso = Preprocesador(idioma)
+
+
+def _procesar_bloque(textos):
+    return [_preprocesador_proceso.procesar(texto, cachear=False) for texto in textos]
+
+
+def hash_texto(texto):
+    """Clave de caché de un texto (sha1 de su contenido)."""
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+class Preprocesador:
+    """
+    Preprocesado de textos para el TF-IDF: minúsculas, tokenización NLTK y
+    eliminación de stopwords. Los recursos (stopwords) se cargan una sola vez y
+    los textos ya procesados se guardan en una caché por hash de contenido.
+    """
+
+    def __init__(self, idioma='spanish', ruta_cache=None):
+        """
+        :param idioma: Idioma de NLTK para tokenizar y para las stopwords
+        :param ruta_cache: JSON donde persistir la caché (se carga si ya existe)
+        """
+        self.idioma = idioma
+        self.stop_words = set(stopwords.words(idioma))
+        self.ruta_cache = ruta_cache
+        self.cache = {}
+        if ruta_cache and os.path.exists(ruta_cache):
+            with open(ruta_cache, "r", encoding="utf-8") as f:
+                self.cache = json.load(f)
+
+    def procesar(self, texto, cachear=True):
+        """Tokeniza, pasa a minúsculas y elimina stopwords."""
+        if not isinstance(texto, str):
+            return ""
+
+        clave = hash_texto(texto) if cachear else None
+        if clave is not None and clave in self.cache:
+            return self.cache[clave]
+
+        # 1. Minúsculas, tokenización y sin signos de puntuación (ver tokenizar)
+        # 2. Filtrado de stopwords
+        tokens_limpios = [word for word in self.tokenizar(texto) if word not in self.stop_words]
+        resultado = " ".join(tokens_limpios)
+
+        if clave is not None:
+            self.cache[clave] = resultado
+        return resultado
+
+    def tokenizar(self, texto):
+        """Palabras del texto en minúsculas (tokenización NLTK, sin signos de puntuación ni quitar stopwords)."""
+        return [word for word in word_tokenize(texto.lower(), language=self.idioma) if word.isalnum()]
+
+    def procesar_lote(self, textos, n_procesos=None, tam_bloque=256):
+        """
+        Procesa muchos textos. Solo se tokenizan los que no están en caché (y cada
+        texto repetido una sola vez); si son muchos, se reparten por bloques en un pool de procesos.
+        :param n_procesos: Procesos a usar (None = automático, 1 = sin paralelismo)
+        :return: Lista de textos procesados, en el mismo orden
+        """
+        claves = [hash_texto(t) if isinstance(t, str) else None for t in textos]
+        pendientes = {}
+        for clave, texto in zip(claves, textos):
+            if clave is not None and clave not in self.cache:
+                pendientes[clave] = texto
+
+        if n_procesos is None:
+            n_procesos = (os.cpu_count() or 1) if len(pendientes) >= MIN_TEXTOS_PARALELO else 1
+
+        textos_pendientes = list(pendientes.values())
+        if n_procesos > 1 and len(textos_pendientes) > tam_bloque:
+            bloques = [textos_pendientes[i:i + tam_bloque] for i in range(0, len(textos_pendientes), tam_bloque)]
+            with ProcessPoolExecutor(max_workers=n_procesos, initializer=_iniciar_proceso, initargs=(self.idioma,)) as pool:
+                procesados = [p for bloque in pool.map(_procesar_bloque, bloques) for p in bloque]
+        else:
+            procesados = [self.procesar(texto, cachear=False) for texto in textos_pendientes]
+
+        self.cache.update(zip(pendientes.keys(), procesados))
+        return [self.cache[clave] if clave is not None else "" for clave in claves]
+
+    def guardar_cache(self, ruta=None):
+        """Guarda la caché en JSON (en ruta o en la ruta_cache del constructor)."""
+        ruta = ruta or self.ruta_cache
+        if not ruta:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, ensure_ascii=False)
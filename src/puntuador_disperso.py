@@ -0,0 +1,154 @@
+import numpy as np
+import scipy.sparse as sp
+from indice_vectorial import top_k
+
+# Margen relativo de la poda MaxScore: las sumas en coma flotante pueden pasarse de la
+# cota por unos pocos ulp, así que solo se poda con cierta holgura (float32 ~ 1e-7)
+MARGEN_PODA = 1e-5
+# Si las listas de una query suman más de n_documentos / FRACCION_ACUMULADOR_DENSO
+# entradas, se acumula en un array del tamaño del corpus (bincount) en vez de ordenarlas
+FRACCION_ACUMULADOR_DENSO = 8
+
+
+class PuntuadorDisperso:
+    """
+    Similitud TF-IDF de una query con las noticias recorriendo solo las listas de sus
+    términos. La matriz en formato CSC es un índice invertido: la columna de cada término
+    tiene las posiciones de las noticias que lo contienen (crecientes) y sus pesos. Como
+    el modelo léxico normaliza las filas, el producto escalar es el coseno. El coste de una
+    consulta depende de la longitud de las listas de sus términos y no del tamaño del corpus.
+    Con poda=True se usa MaxScore: los términos se recorren de mayor a menor aportación
+    máxima y, en cuanto las noticias aún no vistas no pueden alcanzar el top-k, el resto
+    de términos solo se puntúa en los candidatos que quedan (mismo top-k que sin poda).
+    """
+
+    def __init__(self, matriz):
+        """:param matriz: Matriz TF-IDF (noticias x términos) de la que se construye el índice"""
+        self.matriz = matriz
+        self._filas = sp.csr_matrix(matriz)
+        csc = self._filas.tocsc()
+        csc.sort_indices()
+        self.n_documentos = csc.shape[0]
+        self._inicios = csc.indptr
+        self._posiciones = csc.indices
+        self._pesos = csc.data
+        # Mayor peso de cada término: cota de lo que puede aportar a una noticia (para la poda)
+        self._maximos = csc.max(axis=0).toarray().ravel()
+
+    def _lista(self, termino, excluir=None, permitidas=None):
+        """Posiciones y pesos de las noticias con el término, sin las que no pueden salir."""
+        inicio, fin = self._inicios[termino], self._inicios[termino + 1]
+        posiciones, pesos = self._posiciones[inicio:fin], self._pesos[inicio:fin]
+        if permitidas is not None:
+            validas = permitidas[posiciones]
+            posiciones, pesos = posiciones[validas], pesos[validas]
+        if excluir is not None:
+            validas = posiciones != excluir
+            posiciones, pesos = posiciones[validas], pesos[validas]
+        return posiciones, pesos
+
+    def _acumular(self, posiciones, aportaciones):
+        """Suma las aportaciones por posición (en el orden en que llegan): (posiciones crecientes, sumas)."""
+        if len(posiciones) == 0:
+            return posiciones.astype(np.int64), aportaciones
+        if len(posiciones) * FRACCION_ACUMULADOR_DENSO > self.n_documentos:
+            sumas = np.bincount(posiciones, weights=aportaciones, minlength=self.n_documentos)
+            candidatos = np.flatnonzero(sumas)
+            return candidatos, sumas[candidatos].astype(aportaciones.dtype)
+        orden = np.argsort(posiciones, kind='stable')
+        posiciones, aportaciones = posiciones[orden], aportaciones[orden]
+        inicios = np.flatnonzero(np.r_[True, posiciones[1:] != posiciones[:-1]])
+        return posiciones[inicios].astype(np.int64), np.add.reduceat(aportaciones, inicios)
+
+    def buscar(self, vector_query, k, excluir=None, permitidas=None, poda=False):
+        """
+        Las k noticias más parecidas a la query, de mayor a menor similitud, con los mismos
+        empates que la búsqueda densa (top_k): primero la posición mayor. Si menos de k
+        noticias comparten algún término, se completa con noticias de similitud 0.
+        :param vector_query: Vector TF-IDF de la query (una fila dispersa)
+        :param excluir: Posición a dejar fuera (p. ej. la propia noticia)
+        :param permitidas: Máscara de las noticias que pueden salir
+        :param poda: Usar la poda MaxScore
+        :return: (posiciones, similitudes)
+        """
+        vector = sp.csr_matrix(vector_query)
+        orden = np.argsort(vector.indices, kind='stable')
+        terminos, pesos_query = vector.indices[orden], vector.data[orden]
+        if poda:
+            candidatos, puntuaciones = self._acumular_maxscore(terminos, pesos_query, k, excluir, permitidas)
+        else:
+            listas = [self._lista(t, excluir, permitidas) for t in terminos]
+            candidatos, puntuaciones = self._acumular(
+                np.concatenate([p for p, _ in listas] + [np.array([], dtype=np.int32)]),
+                np.concatenate([q * w for q, (_, w) in zip(pesos_query, listas)] + [np.array([], dtype=self._pesos.dtype)]),
+            )
+
+        # Candidatos por posición creciente: top_k desempata igual que sobre el corpus entero
+        elegidos = top_k(puntuaciones, k)
+        posiciones, similitudes = candidatos[elegidos], puntuaciones[elegidos]
+        if len(posiciones) < k:
+            relleno = self._relleno(k - len(posiciones), candidatos, excluir, permitidas)
+            posiciones = np.concatenate([posiciones, relleno])
+            similitudes = np.concatenate([similitudes, np.zeros(len(relleno), dtype=similitudes.dtype)])
+        return posiciones, similitudes
+
+    def _acumular_maxscore(self, terminos, pesos_query, k, excluir=None, permitidas=None):
+        """
+        Candidatos y puntuaciones (exactas) con la poda MaxScore (ver la clase). Los términos
+        de mayor cota se acumulan en tandas (1, 2, 4... términos) hasta que lo que suman los
+        que faltan no llega al k-ésimo candidato; a partir de ahí los términos restantes solo
+        se puntúan en las filas de los candidatos que aún pueden entrar.
+        """
+        cotas = pesos_query * self._maximos[terminos]
+        orden = np.argsort(-cotas, kind='stable')
+        # restantes[i]: lo máximo que suman los términos del i-ésimo en adelante
+        restantes = np.r_[np.cumsum(cotas[orden][::-1])[::-1], 0.0]
+        candidatos = np.array([], dtype=np.int64)
+        puntuaciones = np.array([], dtype=np.result_type(pesos_query, self._pesos))
+        umbral = -np.inf
+
+        i, tanda = 0, 1
+        while i < len(orden) and not restantes[i] * (1 + MARGEN_PODA) < umbral:
+            listas = [(pesos_query[j], self._lista(terminos[j], excluir, permitidas)) for j in orden[i:i + tanda]]
+            candidatos, puntuaciones = self._acumular(
+                np.concatenate([candidatos] + [p for _, (p, _) in listas]),
+                np.concatenate([puntuaciones] + [q * w for q, (_, w) in listas]),
+            )
+            i, tanda = i + len(listas), tanda * 2
+            if len(candidatos) >= k:
+                umbral = np.partition(puntuaciones, len(puntuaciones) - k)[len(puntuaciones) - k]
+
+        if i < len(orden):
+            # Ninguna noticia nueva llega al umbral ni con todo lo que queda: se descartan los
+            # candidatos que ya no pueden alcanzarlo y el resto de términos se suma solo a los
+            # demás, con un producto sobre sus filas (no hace falta recorrer más listas)
+            vivos = (puntuaciones + restantes[i]) * (1 + MARGEN_PODA) >= umbral
+            candidatos, puntuaciones = candidatos[vivos], puntuaciones[vivos]
+            resto = orden[i:]
+            query_resto = np.zeros(self._filas.shape[1], dtype=puntuaciones.dtype)
+            query_resto[terminos[resto]] = pesos_query[resto]
+            puntuaciones = puntuaciones + self._filas[candidatos] @ query_resto
+        return candidatos, puntuaciones
+
+    def _relleno(self, n_faltan, candidatos, excluir=None, permitidas=None):
+        """
+        Noticias de similitud 0 que completan el resultado, en el orden de la búsqueda
+        densa (posición mayor primero), recorriendo el corpus desde el final por bloques.
+        """
+        relleno = []
+        fin, tam = self.n_documentos, n_faltan + len(candidatos) + 1
+        while len(relleno) < n_faltan and fin > 0:
+            inicio = max(0, fin - tam)
+            bloque = np.arange(fin - 1, inicio - 1, -1)
+            libres = ~np.isin(bloque, candidatos)
+            if permitidas is not None:
+                libres &= permitidas[bloque]
+            if excluir is not None:
+                libres &= bloque != excluir
+            relleno.extend(bloque[libres][:n_faltan - len(relleno)].tolist())
+            fin, tam = inicio, tam * 2
+        return np.array(relleno, dtype=np.int64)
+
+    def estructuras(self):
+        """Arrays que ocupa el índice (además de la matriz CSR del motor)."""
+        return [self._inicios, self._posiciones, self._pesos, self._maximos]
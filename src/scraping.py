@@ -1,22 +1,12 @@
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import os
-import time
-import datetime
-
-options = webdriver.EdgeOptions()
-options.add_argument("--log-level=3")
-options.add_argument("--disable-logging")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--no-sandbox")
-
-driver = webdriver.Edge(
-    service=Service(os.path.join(os.getcwd(), "msedgedriver.exe")),
-    options=options
-)
+from motor_scraping import crear_driver_edge, desplazar_hasta_el_final, trabajos_desde_enlaces
+from descarga_http import DescargadorHTTP
+from estado_crawl import EstadoCrawl
+
+driver = crear_driver_edge()
 
 driver.get("https://news.bitcoin.com/es/")
 
@@ -32,17 +22,13 @@ try:
     boton_rechazar.click()
 except:
     print("No apareció el botón de rechazar consentimiento")
-time.sleep(5)  # Espera a que la página cargue después de rechazar cookies
 contenedor = wait.until(
     EC.presence_of_element_located(
         (By.CSS_SELECTOR, "div.sc-bfabSb.gvquir")
     )
 )
-time.sleep(10)  # Espera adicional para asegurar que el contenido dinámico se cargue
-# Scroll varias veces para cargar todo el contenido dinámico
-for _ in range(5):  # Ajusta el rango según lo que observes en la web
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(2)  # Espera a que cargue más contenido
+# Scroll hasta que deje de cargarse contenido dinámico (esperando a los nuevos h2, sin pausas fijas)
+desplazar_hasta_el_final(driver, "h2", max_desplazamientos=5)
 
 # Diccionario de palabras clave para cada archivo
 CLASIFICACION = {
@@ -110,13 +96,12 @@ for cat, enlaces in enlaces_por_categoria.items():
                     url = f"{enlace}/page/{pagina}/"
             try:
                 driver.get(url)
-                time.sleep(5)  # Espera a que cargue la página
-                for _ in range(3):
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(4)
                 # Buscar solo dentro del div con la clase específica
                 try:
-                    div_contenedor = driver.find_element(By.CSS_SELECTOR, "div.sc-bfabSb.gvquir")
+                    div_contenedor = wait.until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "div.sc-bfabSb.gvquir"))
+                    )
+                    desplazar_hasta_el_final(driver, "div.sc-bfabSb.gvquir a", max_desplazamientos=3)
                     a_tags = div_contenedor.find_elements(By.TAG_NAME, "a")
                     for a in a_tags:
                         href = a.get_attribute("href")
@@ -140,57 +125,12 @@ for cat, enlaces in enlaces_por_categoria.items():
             f.write(href + "\n")
     print(f"Guardados {len(nuevos_enlaces_extraidos)} enlaces nuevos en {enlaceen_path}")
 
-# EXTRAER Y GUARDAR TODAS LAS NOTICIAS INDIVIDUALES EN FORMATO CSV
-for cat in CLASIFICACION:
-    subfolder = os.path.join(noticias_dir, cat)
-    noticias_folder = os.path.join(subfolder, "noticias")
-    os.makedirs(noticias_folder, exist_ok=True)
-    enlaceen_path = os.path.join(subfolder, "enlaceen.txt")
-    if not os.path.exists(enlaceen_path):
-        continue
+driver.quit()
 
-    with open(enlaceen_path, "r", encoding="utf-8") as f:
-        enlaces_noticias = [line.strip() for line in f if line.strip()]
-
-    # Procesar todas las noticias
-    for url in enlaces_noticias:
-        try:
-            driver.get(url)
-            time.sleep(4)
-            # Fecha de publicación
-            try:
-                fecha_pub = driver.find_element(By.CSS_SELECTOR, "span.sc-dhNZpn.bSTjtI").text.strip()
-            except:
-                fecha_pub = "Fecha no encontrada"
-            # Título
-            try:
-                titulo = driver.find_element(By.CSS_SELECTOR, "h1.sc-hrAiUm.hEjuKt").text.strip()
-                nombre_archivo = "_".join(titulo.split()[:4]).replace("/", "-").replace("\\", "-")
-            except:
-                titulo = "Título no encontrado"
-                nombre_archivo = "noticia_sin_titulo"
-            # Texto de la noticia
-            cuerpo = []
-            try:
-                div_body = driver.find_element(By.CSS_SELECTOR, "div.article__body")
-                p_tags = div_body.find_elements(By.XPATH, "./p[not(*)]")
-                for p in p_tags:
-                    texto = p.text.strip()
-                    if texto:
-                        cuerpo.append(texto)
-            except:
-                cuerpo = []
-
-            # Fecha de extracción
-            fecha_extraccion = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            # Guardar noticia en formato CSV-like (separado por ;)
-            noticia_path = os.path.join(noticias_folder, f"{nombre_archivo}.txt")
-            with open(noticia_path, "w", encoding="utf-8") as nf:
-                cuerpo_unido = " | ".join(cuerpo)
-                nf.write(f"{fecha_pub};{titulo};{cuerpo_unido};{fecha_extraccion}\n")
-            print(f"Guardada noticia: {noticia_path}")
-        except Exception as e:
-            print(f"Error procesando noticia {url}: {e}")
-
-driver.quit()
\ No newline at end of file
+# EXTRAER Y GUARDAR TODAS LAS NOTICIAS INDIVIDUALES EN FORMATO CSV
+# Descarga HTTP sin navegador; Selenium solo para las páginas que no se pueden extraer del HTML
+# (ver descarga_http.py y motor_scraping.py). Con el estado del crawl solo se reescriben las
+# noticias nuevas o modificadas, así que el refresco del motor solo tiene que leer esas.
+estado = EstadoCrawl(os.path.join(base_dir, "estado_crawl.sqlite"))
+DescargadorHTTP(estado_crawl=estado).ejecutar(trabajos_desde_enlaces(noticias_dir, "enlaceen.txt", list(CLASIFICACION)))
+estado.cerrar()
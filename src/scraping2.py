@@ -1,22 +1,12 @@
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import os
-import time
-import datetime
+from motor_scraping import crear_driver_edge, trabajos_desde_enlaces
+from descarga_http import DescargadorHTTP
+from estado_crawl import EstadoCrawl
 
-options = webdriver.EdgeOptions()
-options.add_argument("--log-level=3")
-options.add_argument("--disable-logging")
-options.add_argument("--disable-dev-shm-usage")
-options.add_argument("--no-sandbox")
-
-driver = webdriver.Edge(
-    service=Service(os.path.join(os.getcwd(), "msedgedriver.exe")),
-    options=options
-)
+driver = crear_driver_edge()
 
 driver.get("https://elpais.com/")
 
@@ -65,15 +55,11 @@ for enlace in enlaces_categorias:
 for categoria, urls in enlaces_por_categoria.items():
     for url in urls:
         print(f"Procesando {url} para categoría {categoria}")
-        driver2 = webdriver.Edge(
-            service=Service(os.path.join(os.getcwd(), "msedgedriver.exe")),
-            options=options
-        )
+        driver2 = crear_driver_edge()
         try:
             driver2.get(url)
-            time.sleep(2)
+            # Las esperas explícitas de abajo sustituyen a las pausas fijas tras el scroll
             driver2.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(15)
             wait2 = WebDriverWait(driver2, 10)
             divs_clave = []
             try:
@@ -109,68 +95,12 @@ for categoria, urls in enlaces_por_categoria.items():
         finally:
             driver2.quit()
 
-for categoria in CLASIFICACION:
-    subfolder = os.path.join(os.path.dirname(__file__), "..", "noticias", categoria)
-    noticias_folder = os.path.join(subfolder, "noticias")
-    os.makedirs(noticias_folder, exist_ok=True)
-    enlaceen_path = os.path.join(subfolder, "enlaceen2.txt")
-    if not os.path.exists(enlaceen_path):
-        continue
-
-    with open(enlaceen_path, "r", encoding="utf-8") as f:
-        enlaces_noticias = [line.strip() for line in f if line.strip()]
-
-
-    noticias_guardadas = set()
-
-    for url in enlaces_noticias:
-        try:
-            driver2 = webdriver.Edge(
-                service=Service(os.path.join(os.getcwd(), "msedgedriver.exe")),
-                options=options
-            )
-            driver2.get(url)
-            time.sleep(4)
-
-            # Fecha de publicación
-            try:
-                fecha_pub = driver2.find_element(By.CSS_SELECTOR, "div.a_md_f").text.strip()
-            except:
-                fecha_pub = "Sin fecha de publicación"
-
-            # Título
-            try:
-                titulo_elem = driver2.find_element(By.CSS_SELECTOR, "h1.a_t")
-                titulo = titulo_elem.text.strip()
-                nombre_archivo = "_".join(titulo.split()[:4]).replace("/", "-").replace("\\", "-")
-            except:
-                titulo = "Sin título"
-                nombre_archivo = "noticia_sin_titulo"
-
-            # Contexto
-            try:
-                contexto_elem = driver2.find_element(By.CSS_SELECTOR, "p.a_st")
-                contexto = contexto_elem.text.strip()
-            except:
-                contexto = "Sin contexto"
-
-            # Fecha de extracción
-            fecha_extraccion = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            # Evitar duplicados por título y archivo
-            noticia_path = os.path.join(noticias_folder, f"{nombre_archivo}.txt")
-            if titulo not in noticias_guardadas and not os.path.exists(noticia_path):
-                with open(noticia_path, "w", encoding="utf-8") as nf:
-                    nf.write(f"{fecha_pub};{titulo};{contexto};{fecha_extraccion}\n")
-                print(f"Guardada noticia: {noticia_path}")
-                noticias_guardadas.add(titulo)
-
-            driver2.quit()
-        except Exception as e:
-            print(f"Error procesando noticia {url}: {e}")
-            try:
-                driver2.quit()
-            except:
-                pass
+driver.quit()
 
-driver.quit()
\ No newline at end of file
+# Noticias de cada categoría: descarga HTTP sin navegador y Selenium solo si hace falta.
+# Las que ya existen no se sobrescriben y las que no han cambiado ni se descargan enteras
+# (peticiones condicionales con el estado del crawl; ver descarga_http.py y estado_crawl.py)
+base_noticias = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "noticias"))
+estado = EstadoCrawl(os.path.join(os.path.dirname(base_noticias), "estado_crawl.sqlite"))
+DescargadorHTTP(estado_crawl=estado).ejecutar(trabajos_desde_enlaces(base_noticias, "enlaceen2.txt", list(CLASIFICACION)))
+estado.cerrar()
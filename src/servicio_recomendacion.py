@@ -0,0 +1,421 @@
+import os
+import sys
+import json
+import socket
+import asyncio
+import argparse
+import datetime
+import multiprocessing
+import numpy as np
+from urllib.parse import urlsplit, parse_qs, unquote
+from concurrent.futures import ThreadPoolExecutor
+
+PUERTO = 8000
+N_WORKERS = 1
+
+# Micro-lotes: las consultas que llegan a la vez se agrupan hasta este tiempo o tamaño
+# y se resuelven con una sola llamada por lotes del motor (un producto matricial)
+ESPERA_LOTE = 0.002
+TAM_MAX_LOTE = 64
+
+# Tamaño máximo del cuerpo de una petición y de una página de /articles
+MAX_BYTES_CUERPO = 1 << 20
+MAX_LIMITE_PAGINA = 1000
+
+METODOS = ('tfidf', 'embeddings', 'hibrido')
+
+RAIZ_REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ESTADOS_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErrorPeticion(Exception):
+    """Petición inválida: se responde con su código HTTP y el mensaje."""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+def _json_por_defecto(valor):
+    # Los ids y similitudes del motor pueden venir como tipos de numpy
+    if isinstance(valor, np.integer):
+        return int(valor)
+    if isinstance(valor, np.floating):
+        return float(valor)
+    # Fechas de las noticias (fecha_publicacion, fecha_extraccion) y de las facetas
+    if isinstance(valor, datetime.date):
+        return valor.isoformat()
+    raise TypeError(f"No serializable: {type(valor).__name__}")
+
+
+class MicroLotes:
+    """
+    Agrupa las consultas concurrentes en lotes. Cada consulta espera como mucho
+    'espera' segundos a que lleguen otras con la misma clave (tipo, método, top_n, filtros);
+    el lote se resuelve en un único hilo con las funciones por lotes del motor,
+    que puntúan todas las queries con un producto matricial en vez de una a una.
+    """
+
+    def __init__(self, motor, espera=ESPERA_LOTE, tam_max=TAM_MAX_LOTE):
+        self.motor = motor
+        self.espera = espera
+        self.tam_max = tam_max
+        # Un solo hilo: el motor no se usa nunca desde dos hilos a la vez
+        self._ejecutor = ThreadPoolExecutor(max_workers=1)
+        self._pendientes = {}       # clave -> [(entrada, futuro)]
+        self._temporizadores = {}   # clave -> handle de call_later
+
+    async def consultar(self, tipo, metodo, top_n, entrada, filtros=None):
+        """
+        Resultado de una consulta ('texto' con una query o 'noticia' con un id), resuelta en lote.
+        :param filtros: dict con categorias (tupla), desde y hasta (ver MotorRecomendacion.recomendar_por_texto)
+        """
+        bucle = asyncio.get_running_loop()
+        futuro = bucle.create_future()
+        clave = (tipo, metodo, top_n, tuple(sorted((filtros or {}).items())))
+        pendientes = self._pendientes.setdefault(clave, [])
+        pendientes.append((entrada, futuro))
+        if len(pendientes) >= self.tam_max:
+            self._despachar(clave)
+        elif len(pendientes) == 1:
+            self._temporizadores[clave] = bucle.call_later(self.espera, self._despachar, clave)
+        return await futuro
+
+    async def ejecutar(self, funcion, *args):
+        """Ejecuta cualquier otra operación del motor en el mismo hilo que los lotes."""
+        return await asyncio.get_running_loop().run_in_executor(self._ejecutor, funcion, *args)
+
+    def _despachar(self, clave):
+        temporizador = self._temporizadores.pop(clave, None)
+        if temporizador is not None:
+            temporizador.cancel()
+        pendientes = self._pendientes.pop(clave, None)
+        if not pendientes:
+            return
+        tipo, metodo, top_n, filtros = clave
+        entradas = [entrada for entrada, _ in pendientes]
+        # Tamaño medio de lote = consultas_en_lote / lotes
+        self.motor.metricas.contar("servicio_lotes_total", tipo=tipo)
+        self.motor.metricas.contar("servicio_consultas_en_lote_total", len(entradas), tipo=tipo)
+        tarea = asyncio.get_running_loop().run_in_executor(self._ejecutor, self._resolver, tipo, metodo, top_n, entradas,
+                                                       dict(filtros))
+        tarea.add_done_callback(lambda t: self._repartir(t, pendientes))
+
+    def _resolver(self, tipo, metodo, top_n, entradas, filtros):
+        if tipo == 'texto':
+            return self.motor.recomendar_por_textos(entradas, metodo=metodo, top_n=top_n, **filtros)
+        return self.motor.recomendar_por_noticias(entradas, metodo=metodo, top_n=top_n, **filtros)
+
+    @staticmethod
+    def _repartir(tarea, pendientes):
+        for i, (_, futuro) in enumerate(pendientes):
+            if futuro.cancelled():
+                continue
+            if tarea.exception() is not None:
+                futuro.set_exception(tarea.exception())
+            else:
+                futuro.set_result(tarea.result()[i])
+
+    def cerrar(self):
+        self._ejecutor.shutdown(wait=False)
+
+
+class ServicioRecomendacion:
+    """
+    Servicio HTTP (asyncio, sin dependencias) sobre un MotorRecomendacion:
+
+    GET  /recommend/text?q=...&metodo=tfidf&top_n=5   (o POST con {"query": ...})
+    GET  /recommend/item/{id}?metodo=tfidf&top_n=5
+    POST /recommend/batch  {"queries": [...], "ids": [...], "metodo": ..., "top_n": ...}
+    GET  /articles?desde=0&limite=50&categoria=...&cuerpo=1
+    GET  /articles?q=palabras&desde=0&limite=50       (búsqueda por palabras)
+    GET  /articles/{id}
+    GET  /facets                                      (categorías y rango de fechas)
+    GET  /health, GET /metrics (Prometheus) y GET /metrics.json
+
+    Las recomendaciones admiten filtros: categorias=a,b, desde=AAAA-MM-DD y hasta=AAAA-MM-DD.
+
+    Las consultas sueltas que llegan a la vez se resuelven juntas (ver MicroLotes).
+    """
+
+    def __init__(self, motor, espera_lote=ESPERA_LOTE, tam_max_lote=TAM_MAX_LOTE):
+        self.motor = motor
+        self.motor.silencioso = True
+        self.lotes = MicroLotes(motor, espera_lote, tam_max_lote)
+
+    # --- HTTP ---
+
+    async def atender(self, lector, escritor):
+        """Atiende una conexión (HTTP/1.1 con keep-alive)."""
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                try:
+                    metodo_http, destino, version = linea.decode("latin-1").split()
+                except ValueError:
+                    await self._escribir(escritor, 400, {"error": "línea de petición inválida"}, cerrar=True)
+                    break
+                cabeceras = {}
+                while True:
+                    linea = await lector.readline()
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+
+                longitud = int(cabeceras.get("content-length") or 0)
+                if longitud > MAX_BYTES_CUERPO:
+                    await self._escribir(escritor, 413, {"error": "cuerpo demasiado grande"}, cerrar=True)
+                    break
+                cuerpo = await lector.readexactly(longitud) if longitud else b""
+
+                estado, contenido = await self.responder(metodo_http, destino, cuerpo)
+                cerrar = version != "HTTP/1.1" or cabeceras.get("connection", "").lower() == "close"
+                await self._escribir(escritor, estado, contenido, cerrar)
+                if cerrar:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            # Conexión cortada o cabeceras ilegibles (p. ej. Content-Length no numérico)
+            pass
+        finally:
+            escritor.close()
+
+    async def _escribir(self, escritor, estado, contenido, cerrar=False):
+        if isinstance(contenido, str):
+            datos, tipo = contenido.encode("utf-8"), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            datos = json.dumps(contenido, ensure_ascii=False, default=_json_por_defecto).encode("utf-8")
+            tipo = "application/json; charset=utf-8"
+        cabecera = (
+            f"HTTP/1.1 {estado} {ESTADOS_HTTP.get(estado, '')}\r\n"
+            f"Content-Type: {tipo}\r\nContent-Length: {len(datos)}\r\n"
+            f"Connection: {'close' if cerrar else 'keep-alive'}\r\n\r\n"
+        )
+        escritor.write(cabecera.encode("latin-1") + datos)
+        await escritor.drain()
+
+    async def responder(self, metodo_http, destino, cuerpo=b""):
+        """
+        Resuelve una petición.
+        :return: (estado HTTP, contenido): dict/list para JSON o str para texto plano
+        """
+        partes = urlsplit(destino)
+        ruta = [unquote(p) for p in partes.path.strip("/").split("/") if p]
+        parametros = {clave: valores[-1] for clave, valores in parse_qs(partes.query).items()}
+        try:
+            if cuerpo:
+                try:
+                    datos = json.loads(cuerpo)
+                except ValueError:
+                    raise ErrorPeticion(400, "el cuerpo no es JSON válido")
+                if not isinstance(datos, dict):
+                    raise ErrorPeticion(400, "el cuerpo tiene que ser un objeto JSON")
+                parametros.update(datos)
+            return 200, await self._enrutar(metodo_http, ruta, parametros)
+        except ErrorPeticion as e:
+            return e.estado, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    async def _enrutar(self, metodo_http, ruta, parametros):
+        if ruta == ["health"]:
+            return {"estado": "ok", "noticias": len(self.motor.df), "pid": os.getpid(),
+                    "cache": self.motor.estadisticas_cache()}
+        if ruta == ["metrics"]:
+            return self.motor.metricas.a_prometheus()
+        if ruta == ["metrics.json"]:
+            return self.motor.metricas.a_dict()
+        if ruta == ["facets"]:
+            return await self.lotes.ejecutar(self.motor.facetas)
+
+        if ruta == ["recommend", "text"]:
+            query = parametros.get("q", parametros.get("query"))
+            if not isinstance(query, str) or not query.strip():
+                raise ErrorPeticion(400, "falta la query (parámetro q)")
+            metodo, top_n = self._metodo_y_top_n(parametros)
+            return {"query": query, "metodo": metodo,
+                    "resultados": await self.lotes.consultar('texto', metodo, top_n, query, self._filtros(parametros))}
+
+        if len(ruta) == 3 and ruta[:2] == ["recommend", "item"]:
+            id_noticia = self._entero(ruta[2], "id")
+            if not self.motor.contiene(id_noticia):
+                raise ErrorPeticion(404, f"no existe la noticia {id_noticia}")
+            metodo, top_n = self._metodo_y_top_n(parametros)
+            return {"id": id_noticia, "metodo": metodo,
+                    "resultados": await self.lotes.consultar('noticia', metodo, top_n, id_noticia,
+                                                             self._filtros(parametros))}
+
+        if ruta == ["recommend", "batch"]:
+            if metodo_http != "POST":
+                raise ErrorPeticion(405, "usa POST con {\"queries\": [...], \"ids\": [...]}")
+            queries = parametros.get("queries") or []
+            ids = [self._entero(i, "ids") for i in parametros.get("ids") or []]
+            if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+                raise ErrorPeticion(400, "queries tiene que ser una lista de textos")
+            metodo, top_n = self._metodo_y_top_n(parametros)
+            filtros = self._filtros(parametros)
+            respuesta = {"metodo": metodo}
+            if queries:
+                respuesta["queries"] = await self.lotes.ejecutar(
+                    lambda: self.motor.recomendar_por_textos(queries, metodo=metodo, top_n=top_n, **filtros))
+            if ids:
+                respuesta["ids"] = await self.lotes.ejecutar(
+                    lambda: self.motor.recomendar_por_noticias(ids, metodo=metodo, top_n=top_n, **filtros))
+            return respuesta
+
+        if ruta == ["articles"]:
+            desde = self._entero(parametros.get("desde", 0), "desde")
+            limite = min(self._entero(parametros.get("limite", 50), "limite"), MAX_LIMITE_PAGINA)
+            con_cuerpo = str(parametros.get("cuerpo", "0")).lower() in ("1", "true", "si", "sí")
+            busqueda = parametros.get("q")
+            if busqueda:
+                total, noticias = await self.lotes.ejecutar(
+                    lambda: self.motor.buscar_noticias(busqueda, max(desde, 0), max(limite, 0), con_cuerpo))
+            else:
+                total, noticias = await self.lotes.ejecutar(
+                    lambda: self.motor.listar_noticias(max(desde, 0), max(limite, 0), parametros.get("categoria"), con_cuerpo))
+            return {"total": total, "desde": desde, "noticias": noticias}
+
+        if len(ruta) == 2 and ruta[0] == "articles":
+            noticia = await self.lotes.ejecutar(self.motor.obtener_noticia, self._entero(ruta[1], "id"))
+            if noticia is None:
+                raise ErrorPeticion(404, f"no existe la noticia {ruta[1]}")
+            return noticia
+
+        raise ErrorPeticion(404, f"ruta desconocida: /{'/'.join(ruta)}")
+
+    @staticmethod
+    def _entero(valor, nombre):
+        try:
+            return int(valor)
+        except (TypeError, ValueError):
+            raise ErrorPeticion(400, f"{nombre} tiene que ser un entero")
+
+    @staticmethod
+    def _filtros(parametros):
+        """
+        Filtros de una consulta de recomendación: categorias (lista, o separadas por comas
+        en la URL), desde y hasta (fechas de publicación AAAA-MM-DD, incluidas).
+        """
+        filtros = {}
+        categorias = parametros.get("categorias")
+        if categorias:
+            if isinstance(categorias, str):
+                categorias = categorias.split(",")
+            if not isinstance(categorias, list) or not all(isinstance(c, str) for c in categorias):
+                raise ErrorPeticion(400, "categorias tiene que ser una lista de textos")
+            filtros["categorias"] = tuple(c.strip() for c in categorias if c.strip())
+        for campo in ("desde", "hasta"):
+            if parametros.get(campo):
+                try:
+                    filtros[campo] = datetime.date.fromisoformat(str(parametros[campo])).isoformat()
+                except ValueError:
+                    raise ErrorPeticion(400, f"{campo} tiene que ser una fecha AAAA-MM-DD")
+        return filtros
+
+    def _metodo_y_top_n(self, parametros):
+        metodo = parametros.get("metodo", "tfidf")
+        if metodo not in METODOS:
+            raise ErrorPeticion(400, f"método desconocido: {metodo} (disponibles: {', '.join(METODOS)})")
+        top_n = self._entero(parametros.get("top_n", 5), "top_n")
+        if not 1 <= top_n <= 100:
+            raise ErrorPeticion(400, "top_n tiene que estar entre 1 y 100")
+        return metodo, top_n
+
+    async def servir(self, host="127.0.0.1", puerto=PUERTO, reuse_port=False):
+        """Atiende peticiones hasta que se cancele la tarea (o Ctrl+C)."""
+        servidor = await asyncio.start_server(self.atender, host, puerto, reuse_port=reuse_port or None)
+        async with servidor:
+            await servidor.serve_forever()
+
+
+def _worker(path_indice, host, puerto, reuse_port):
+    """Proceso worker: abre el índice mapeado en memoria (compartido con los demás) y sirve."""
+    from motor_recomendacion import MotorRecomendacion
+
+    motor = MotorRecomendacion.load(path_indice, mmap=True)
+    print(f"Worker {os.getpid()} atendiendo en http://{host}:{puerto}")
+    try:
+        asyncio.run(ServicioRecomendacion(motor).servir(host, puerto, reuse_port=reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de recomendación de noticias.")
+    parser.add_argument("--noticias", default=os.path.join(RAIZ_REPO, "noticias"),
+                        help="Carpeta de noticias o almacén de corpus")
+    parser.add_argument("--indice", default=os.path.join(RAIZ_REPO, "indice"), help="Carpeta del índice")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("--workers", type=int, default=N_WORKERS,
+                        help="Procesos que atienden peticiones (comparten el índice mapeado en memoria)")
+    parser.add_argument("--compacto", action="store_true",
+                        help="Índice en modo de memoria reducida (textos en disco, ver MotorRecomendacion.compactar)")
+    parser.add_argument("--tipo-vectores", choices=("float32", "float16", "int8"), default=None,
+                        help="Tipo en que se guardan los embeddings")
+    parser.add_argument("--indice-embeddings", default=None,
+                        help="Índice vectorial: exacto, ivf, cuantizado:int8 o cuantizado:pq")
+    parser.add_argument("--puntuacion-tfidf", choices=("densa", "postings", "maxscore"), default=None,
+                        help="Cómo se puntúan las consultas TF-IDF (ver MotorRecomendacion.configurar_puntuacion_tfidf)")
+    parser.add_argument("--modelo-lexico", default=None,
+                        help="Modelo léxico del método tfidf, p. ej. bm25 o tfidf:min_df=2,max_terminos=50000 "
+                             "(ver modelo_lexico.parametros_desde_texto)")
+    args = parser.parse_args()
+
+    from motor_recomendacion import MotorRecomendacion, K_VECINOS
+    from modelo_lexico import parametros_desde_texto
+    # Se construye/actualiza y guarda el índice una sola vez; los workers solo lo abren
+    tipo_indice, parametros_indice = None, None
+    if args.indice_embeddings:
+        tipo_indice, _, cuantizacion = args.indice_embeddings.partition(":")
+        parametros_indice = {"cuantizacion": cuantizacion} if cuantizacion else {}
+    motor = MotorRecomendacion.cargar_o_construir(args.noticias, args.indice, k_vecinos=K_VECINOS,
+                                                  indice_embeddings=tipo_indice, parametros_indice=parametros_indice,
+                                                  compacto=args.compacto, tipo_vectores=args.tipo_vectores,
+                                                  puntuacion_tfidf=args.puntuacion_tfidf,
+                                                  parametros_lexicos=parametros_desde_texto(args.modelo_lexico)
+                                                  if args.modelo_lexico else None)
+    if motor.df.empty:
+        print("No hay noticias que servir.")
+        return 1
+
+    n_workers = args.workers
+    if n_workers > 1 and not hasattr(socket, "SO_REUSEPORT"):
+        print("Esta plataforma no permite compartir el puerto entre procesos: se usa un solo worker.")
+        n_workers = 1
+
+    if n_workers == 1:
+        print(f"Servicio atendiendo en http://{args.host}:{args.puerto}")
+        try:
+            asyncio.run(ServicioRecomendacion(motor).servir(args.host, args.puerto))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    del motor
+    contexto = multiprocessing.get_context("spawn")
+    procesos = [
+        contexto.Process(target=_worker, args=(args.indice, args.host, args.puerto, True))
+        for _ in range(n_workers)
+    ]
+    for proceso in procesos:
+        proceso.start()
+    try:
+        for proceso in procesos:
+            proceso.join()
+    except KeyboardInterrupt:
+        for proceso in procesos:
+            proceso.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    # Uso: python src/servicio_recomendacion.py [--puerto 8000] [--workers 4] [--noticias DIR] [--indice DIR]
+    #                                         [--compacto] [--tipo-vectores float16] [--indice-embeddings cuantizado:int8]
+    #                                         [--puntuacion-tfidf maxscore] [--modelo-lexico bm25:min_df=2]
+    sys.exit(main())